@@ -0,0 +1,26 @@
+const PAGE_SIZE = 100;
+
+// GET /products/ returns one keyset page ({ items, next_cursor }); follow
+// next_cursor until the catalog is exhausted.
+export async function fetchAllProducts(apiBase, init = {}) {
+  const items = [];
+  let cursor = null;
+
+  do {
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+    if (cursor) {
+      params.set("cursor", cursor);
+    }
+
+    const response = await fetch(`${apiBase}/products/?${params}`, init);
+    if (!response.ok) {
+      throw new Error("Failed to fetch products");
+    }
+
+    const page = await response.json();
+    items.push(...(Array.isArray(page?.items) ? page.items : []));
+    cursor = page?.next_cursor || null;
+  } while (cursor);
+
+  return items;
+}
@@ -2,6 +2,7 @@ import React, { useEffect, useMemo, useState } from "react";
 import { Link } from "react-router-dom";
 import { FiUsers, FiShield, FiCheckCircle, FiAlertTriangle, FiTrendingUp } from "react-icons/fi";
 import { useAuth } from "../context/AuthContext.jsx";
+import { fetchAllProducts } from "../lib/products.js";
 
 const API_BASE = import.meta.env.VITE_API_BASE || "http://localhost:5000/api";
 
@@ -24,8 +25,8 @@ const AdminDashboard = () => {
       try {
         setLoading(true);
 
-        const [productsRes, statsRes] = await Promise.all([
-          fetch(`${API_BASE}/products/`, {
+        const [products, statsRes] = await Promise.all([
+          fetchAllProducts(API_BASE, {
             headers: { Authorization: `Bearer ${token}` },
           }),
           fetch(`${API_BASE}/products/stats/platform`, {
@@ -33,15 +34,14 @@ const AdminDashboard = () => {
           }),
         ]);
 
-        if (!productsRes.ok || !statsRes.ok) {
+        if (!statsRes.ok) {
           throw new Error("Failed to load admin data");
         }
 
-        const productsJson = await productsRes.json();
         const statsJson = await statsRes.json();
 
         if (!ignore) {
-          setModerationQueue(productsJson.items || []);
+          setModerationQueue(products);
           setPlatformMetrics(statsJson || {});
           setError("");
         }
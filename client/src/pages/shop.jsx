@@ -2,6 +2,7 @@ import React, { useEffect, useMemo, useRef, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import ProductCard from '../components/ProductCard';
 import { useAuth } from '../context/AuthContext.jsx';
+import { fetchAllProducts } from '../lib/products.js';
 
 const FALLBACK_IMAGE = 'https://via.placeholder.com/600x480?text=Image+Coming+Soon';
 
@@ -215,13 +216,7 @@ const Shop = () => {
       const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:5000/api';
 
       try {
-        const response = await fetch(`${API_BASE}/products/`);
-        if (!response.ok) {
-          throw new Error('Failed to fetch products');
-        }
-
-        const data = await response.json();
-        const items = Array.isArray(data?.items) ? data.items : [];
+        const items = await fetchAllProducts(API_BASE);
 
         const transformed = items.map((item) => {
           const normalized = mapApiProductToClient(item);
@@ -1,4 +1,4 @@
-from flask import Flask
+from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
@@ -6,6 +6,7 @@ from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from config import get_config
 from dotenv import load_dotenv
+from .utils.cache import ResultCache
 load_dotenv()
 
 # Extensions
@@ -13,11 +14,12 @@ db = SQLAlchemy()
 migrate = Migrate()
 bcrypt = Bcrypt()
 jwt = JWTManager()
+cache = ResultCache()
 
 
-def create_app():
+def create_app(config_object=None):
     app = Flask(__name__, instance_relative_config=True)
-    app.config.from_object(get_config())
+    app.config.from_object(config_object or get_config())
 
     # CORS Configuration - use regex pattern to match Vercel deployments
     import re
@@ -45,30 +47,84 @@ def create_app():
          expose_headers=["Content-Type", "Content-Length"],
          max_age=600)
 
+    from .utils.database import configure_sqlite, engine_options
+
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **engine_options(app.config),
+        **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+    }
+
     # Init extensions
     db.init_app(app)
+    with app.app_context():
+        configure_sqlite(db.engine, app.config)
     migrate.init_app(app, db)
     bcrypt.init_app(app)
     jwt.init_app(app)
+    cache.init_app(app)
+
+    from .services.summary_cache import init_summary_cache
+    from .utils.compression import init_compression
+    from .utils.metrics import init_metrics
+    from .utils.profiling import init_profiling
+    from .utils.query_budget import init_query_budget
+
+    init_compression(app)
+    init_summary_cache(app)
+    with app.app_context():
+        init_metrics(app, db.engine)
+        # before the budget check: the admin lookup that triggers a
+        # profile must not count against the view's budget
+        init_profiling(app, db.engine)
+        init_query_budget(app, db.engine)
+
+    from .utils.sustainability import load_factors
+
+    load_factors(app.config.get("IMPACT_FACTORS_PATH"))
 
     # Register blueprints
     from .routes.auth_routes import auth_bp
     from .routes.product_routes import product_bp
     from .services.insight_routes import insight_bp
     from .routes.chat_routes import chat_bp
+    from .routes.admin_routes import admin_bp
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(product_bp, url_prefix="/api/products")
     app.register_blueprint(insight_bp, url_prefix="/api/insights")
     app.register_blueprint(chat_bp, url_prefix="/api/chat")
+    app.register_blueprint(admin_bp, url_prefix="/api/admin")
+
+    from .services.password_service import PasswordHasherBusyError
+
+    # any route that hashes (signup, login rehash, the demo seller) can hit
+    # a saturated hashing pool
+    @app.errorhandler(PasswordHasherBusyError)
+    def password_hasher_busy(exc):
+        db.session.rollback()
+        response = jsonify({"error": "The server is busy right now. Please try again shortly."})
+        response.headers["Retry-After"] = "1"
+        return response, 503
+
+    # CLI commands
+    from .services.impact_service import rebuild_impact_command, refresh_co2_command
+    from .services.search_service import rebuild_search_index_command
+    from .utils.profiling import profile_token_command
+
+    app.cli.add_command(rebuild_impact_command)
+    app.cli.add_command(refresh_co2_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(profile_token_command)
 
     # Populate development database with sample data if empty
     if app.config.get("DEBUG", False):
         from .models import ensure_sample_data
+        from .services.search_service import ensure_search_index
 
         with app.app_context():
             db.create_all()
             ensure_sample_data()
+            ensure_search_index()
 
     # Simple health route
     @app.get("/api/health")
@@ -1,6 +1,15 @@
-from . import db, bcrypt
+from . import db
 from datetime import datetime
 
+from sqlalchemy import event
+
+from .utils.sustainability import estimate_product_co2_per_purchase, factors_version
+
+
+DEFAULT_PRODUCT_IMAGE_URL = (
+    "https://images.unsplash.com/photo-1521572163474-6864f9cf17ab?auto=format&fit=crop&w=800&q=80"
+)
+
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -42,9 +51,32 @@ class Product(db.Model):
     is_donation = db.Column(db.Boolean, default=False)
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Precomputed estimate_product_co2_per_purchase() and the factor table
+    # version it was computed with; kept current on every insert/update and
+    # refreshed in bulk by ``flask refresh-co2`` when the factors change
+    co2_savings = db.Column(db.Float)
+    co2_factors_version = db.Column(db.String(32))
+
+    # Catalog listing is keyset-paginated on (created_at, id); the filtered
+    # variants keep each page an index range scan. owner_id/created_at serves
+    # the seller dashboard and the sales joins in /stats.
+    __table_args__ = (
+        db.Index('ix_products_owner_id_created_at', 'owner_id', 'created_at'),
+        db.Index('ix_products_created_at_id', 'created_at', 'id'),
+        db.Index('ix_products_category_created_at_id', 'category', 'created_at', 'id'),
+        db.Index('ix_products_location_created_at_id', 'location', 'created_at', 'id'),
+        db.Index('ix_products_is_donation_created_at_id', 'is_donation', 'created_at', 'id'),
+    )
     
-    def to_dict(self):
-        return {
+    def to_dict(self, include_owner=True):
+        """Serialize the listing.
+
+        ``include_owner`` embeds the owner's public profile. List endpoints
+        should eager-load ``Product.owner`` or pass ``include_owner=False`` so
+        serialization never triggers a lazy load per row.
+        """
+        data = {
             'id': self.id,
             'title': self.title,
             'description': self.description,
@@ -52,25 +84,35 @@ class Product(db.Model):
             'condition': self.condition,
             'category': self.category,
             'location': self.location,
-            'image_url': self.image_url or "https://images.unsplash.com/photo-1521572163474-6864f9cf17ab?auto=format&fit=crop&w=800&q=80",
+            'image_url': self.image_url or DEFAULT_PRODUCT_IMAGE_URL,
             'is_donation': self.is_donation,
             'owner_id': self.owner_id,
-            'owner': self.owner.to_dict() if hasattr(self, "owner") and self.owner else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if hasattr(self, 'updated_at') and self.updated_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'status': getattr(self, 'status', 'approved'),
             'verified': getattr(self, 'verified', True),
             'admin_notes': getattr(self, 'admin_notes', None),
             'co2_savings_per_purchase': round(self.co2_savings_per_purchase, 2),
         }
+        if include_owner:
+            data['owner'] = self.owner.to_dict() if self.owner else None
+        return data
 
     @property
     def co2_savings_per_purchase(self) -> float:
-        """Calculate CO2 savings for this product."""
-        from .utils.sustainability import estimate_product_co2_per_purchase
+        """CO2 savings for this product (stored value, computed if missing or stale)."""
+        if self.co2_savings is not None and self.co2_factors_version == factors_version():
+            return self.co2_savings
         return estimate_product_co2_per_purchase(self)
 
 
+@event.listens_for(Product, 'before_insert')
+@event.listens_for(Product, 'before_update')
+def _store_co2_savings(mapper, connection, product):
+    product.co2_savings = estimate_product_co2_per_purchase(product)
+    product.co2_factors_version = factors_version()
+
+
 class Order(db.Model):
     __tablename__ = 'orders'
 
@@ -80,6 +122,14 @@ class Order(db.Model):
     price = db.Column(db.Float, nullable=False)
     purchased_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Buyer history and insight windows filter on buyer_id and range over
+    # purchased_at; platform insights range over purchased_at alone.
+    __table_args__ = (
+        db.Index('ix_orders_buyer_id_purchased_at', 'buyer_id', 'purchased_at'),
+        db.Index('ix_orders_product_id', 'product_id'),
+        db.Index('ix_orders_purchased_at', 'purchased_at'),
+    )
+
     buyer = db.relationship('User', backref=db.backref('orders', lazy=True), foreign_keys=[buyer_id])
     product = db.relationship('Product', backref=db.backref('orders', lazy=True))
 
@@ -112,6 +162,43 @@ class Order(db.Model):
             }
 
         return data
+
+
+class UserImpactBucket(db.Model):
+    """Running per-buyer, per-day, per-category purchase totals.
+
+    Maintained by ``services.impact_service.record_orders`` in the same
+    transaction as the orders themselves, so sustainability insights read a
+    handful of buckets instead of rescanning every order.
+    """
+    __tablename__ = 'user_impact_buckets'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    category = db.Column(db.String(100), nullable=False)
+    orders_count = db.Column(db.Integer, nullable=False, default=0)
+    circular_orders = db.Column(db.Integer, nullable=False, default=0)
+    total_spent = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'day', 'category', name='uq_user_impact_buckets_user_day_category'),
+    )
+
+
+class AISummaryCache(db.Model):
+    """Persisted OpenAI insight summaries keyed by a hash of the prompt."""
+    __tablename__ = 'ai_summary_cache'
+
+    key = db.Column(db.String(64), primary_key=True)
+    model = db.Column(db.String(100), nullable=False)
+    summary = db.Column(db.Text, nullable=False)
+    tokens = db.Column(db.Integer, nullable=False, default=0)
+    hits = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
 class ChatMessage(db.Model):
     __tablename__ = 'chat_messages'
 
@@ -121,6 +208,10 @@ class ChatMessage(db.Model):
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_chat_messages_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+    )
+
     user = db.relationship('User', backref=db.backref('chat_messages', lazy=True))
 
     def to_dict(self):
@@ -133,6 +224,30 @@ class ChatMessage(db.Model):
         }
 
 
+class CatalogState(db.Model):
+    """Single-row counter bumped whenever a listing is created, changed or
+    removed; catalog ETags are derived from it (see ``services.catalog_version``).
+    """
+    __tablename__ = 'catalog_state'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ChatSummary(db.Model):
+    """Rolling summary of a user's older chat turns.
+
+    Covers every message with ``id <= through_message_id``; newer messages
+    are sent to the model verbatim (see ``services.chat_history``).
+    """
+    __tablename__ = 'chat_summaries'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    content = db.Column(db.Text, nullable=False)
+    through_message_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 # ---------------------------------------------------------------------------
 # Sample data helpers (useful for manual testing or seeding utilities)
 # ---------------------------------------------------------------------------
@@ -324,12 +439,15 @@ def ensure_sample_data():
     if User.query.first():
         return
 
+    from .services.password_service import hash_passwords
+
     email_to_user = {}
-    for sample in SAMPLE_USERS:
+    hashes = hash_passwords(sample["password"] for sample in SAMPLE_USERS)
+    for sample, password_hash in zip(SAMPLE_USERS, hashes):
         user = User(
             email=sample["email"],
             name=sample.get("name"),
-            password_hash=bcrypt.generate_password_hash(sample["password"]).decode("utf-8"),
+            password_hash=password_hash,
             role=sample.get("role", "buyer"),
         )
         db.session.add(user)
@@ -357,6 +475,7 @@ def ensure_sample_data():
         db.session.flush()
         title_to_product[product.title] = product
 
+    orders = []
     for sample in SAMPLE_ORDERS:
         buyer = email_to_user.get(sample["buyer_email"])
         product = title_to_product.get(sample["product_title"])
@@ -369,10 +488,14 @@ def ensure_sample_data():
 
         order = Order(
             buyer_id=buyer.id,
-            product_id=product.id,
+            product=product,
             price=sample.get("price", product.price),
             purchased_at=purchased_at,
         )
         db.session.add(order)
+        orders.append(order)
+
+    from .services.impact_service import record_orders
+    record_orders(orders)
 
     db.session.commit()
@@ -0,0 +1,46 @@
+import os
+
+from flask import Blueprint, abort, current_app, jsonify, send_from_directory
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from werkzeug.security import safe_join
+
+from .. import db
+from ..models import User
+from ..utils.profiling import list_profiles, profile_directory
+
+admin_bp = Blueprint('admin', __name__)
+
+
+@admin_bp.before_request
+@jwt_required()
+def _require_admin():
+    try:
+        user_id = int(get_jwt_identity())
+    except (TypeError, ValueError):
+        return jsonify({'error': 'unauthorized'}), 403
+    user = db.session.get(User, user_id)
+    if not user or not user.is_admin():
+        return jsonify({'error': 'forbidden'}), 403
+
+
+@admin_bp.route('/profiles', methods=['GET'])
+def get_profiles():
+    """Stored request profiles, newest first."""
+    return jsonify({'items': list_profiles(profile_directory(current_app))})
+
+
+@admin_bp.route('/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """A profile's JSON summary (spans included)."""
+    return send_from_directory(profile_directory(current_app), f'{profile_id}.json', mimetype='application/json')
+
+
+@admin_bp.route('/profiles/<profile_id>/data', methods=['GET'])
+def download_profile(profile_id):
+    """The raw profile: pstats (``.prof``) or folded stacks (``.folded``)."""
+    directory = profile_directory(current_app)
+    for suffix in ('.prof', '.folded'):
+        path = safe_join(directory, profile_id + suffix)
+        if path and os.path.isfile(path):
+            return send_from_directory(directory, profile_id + suffix, as_attachment=True)
+    abort(404)
@@ -1,7 +1,13 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from .. import db, bcrypt
+from .. import db
 from ..models import User
+from ..services.password_service import (
+    PasswordHasherBusyError,
+    hash_password,
+    upgrade_hash,
+    verify_password,
+)
 from sqlalchemy.exc import IntegrityError
 
 auth_bp = Blueprint('auth', __name__)
@@ -21,7 +27,7 @@ def signup():
         return jsonify({'error': 'Account already exists. Please sign in instead.'}), 400
 
     try:
-        pw_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        pw_hash = hash_password(password)
         user = User(email=email, password_hash=pw_hash, name=name)
         db.session.add(user)
         db.session.commit()
@@ -32,6 +38,8 @@ def signup():
             'user': user.to_dict(),
             'access_token': token
         }), 201
+    except PasswordHasherBusyError:
+        raise
     except IntegrityError as e:
         db.session.rollback()
         return jsonify({'error': 'Account already exists. Please sign in instead.'}), 400
@@ -54,9 +62,16 @@ def login():
     if not user:
         return jsonify({'error': 'Account not found. Please try again.'}), 404
 
-    if not bcrypt.check_password_hash(user.password_hash, password):
+    if not verify_password(user.password_hash, password):
         return jsonify({'error': 'Incorrect password. Please try again.'}), 401
 
+    # BCRYPT_LOG_ROUNDS changed since this hash was made: migrate it now
+    # that the plain password is at hand
+    new_hash = upgrade_hash(user.password_hash, password)
+    if new_hash is not None:
+        user.password_hash = new_hash
+        db.session.commit()
+
     token = create_access_token(identity=str(user.id))
     return jsonify({
         'message': 'Login successful.',
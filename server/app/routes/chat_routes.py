@@ -1,25 +1,71 @@
-from flask import Blueprint, jsonify, request
+import json
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from flask_jwt_extended import get_jwt_identity, jwt_required
-from sqlalchemy import asc
+from sqlalchemy import tuple_
 
 from .. import db
-from ..models import ChatMessage, User
-from ..services.chat_service import generate_ai_response
+from ..models import ChatMessage, ChatSummary, User
+from ..services.chat_history import load_context, schedule_condense
+from ..services.chat_service import generate_ai_response, stream_ai_response
+from ..utils.helpers import decode_cursor, encode_cursor, parse_limit
+from ..utils.query_budget import query_budget
 
 
 chat_bp = Blueprint("chat", __name__)
 
+CHAT_PAGE_SIZE = 50
+
 
 @chat_bp.route("/messages", methods=["GET"])
+@query_budget(1)
 @jwt_required()
 def get_messages():
+    """Return one page of the user's messages, oldest first.
+
+    Without a cursor this is the newest ``limit`` messages. Pass the
+    ``before`` cursor of a page to load older scrollback, or its ``after``
+    cursor to fetch anything newer. ``before`` is null once the start of
+    the conversation has been reached.
+    """
     user_id = int(get_jwt_identity())
-    messages = (
-        ChatMessage.query.filter_by(user_id=user_id)
-        .order_by(asc(ChatMessage.created_at))
-        .all()
-    )
-    return jsonify({"messages": [message.to_dict() for message in messages]})
+    args = request.args
+    if args.get("before") and args.get("after"):
+        return jsonify({"error": "use either before or after, not both"}), 400
+    try:
+        limit = parse_limit(args.get("limit"), default=CHAT_PAGE_SIZE)
+        before = decode_cursor(args["before"]) if args.get("before") else None
+        after = decode_cursor(args["after"]) if args.get("after") else None
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    position = tuple_(ChatMessage.created_at, ChatMessage.id)
+    query = ChatMessage.query.filter_by(user_id=user_id)
+    if after is not None:
+        query = query.filter(position > after).order_by(
+            ChatMessage.created_at.asc(), ChatMessage.id.asc()
+        )
+    else:
+        if before is not None:
+            query = query.filter(position < before)
+        query = query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    messages = rows[:limit]
+    if after is None:
+        messages.reverse()
+
+    older = has_more if after is None else bool(messages)
+    return jsonify({
+        "messages": [message.to_dict() for message in messages],
+        "before": encode_cursor(messages[0].created_at, messages[0].id) if older else None,
+        "after": (
+            encode_cursor(messages[-1].created_at, messages[-1].id)
+            if messages
+            else args.get("after")
+        ),
+    })
 
 
 @chat_bp.route("/send", methods=["POST"])
@@ -35,22 +81,15 @@ def send_message():
     if User.query.get(user_id) is None:
         return jsonify({"error": "user not found"}), 404
 
-    history = (
-        ChatMessage.query.filter_by(user_id=user_id)
-        .order_by(asc(ChatMessage.created_at))
-        .all()
-    )
-
-    ai_response = generate_ai_response(
-        user_message,
-        [{"role": item.role, "content": item.content} for item in history],
-    )
+    history, summary = load_context(user_id)
+    ai_response = generate_ai_response(user_message, history, summary)
 
     user_entry = ChatMessage(user_id=user_id, role="user", content=user_message)
     ai_entry = ChatMessage(user_id=user_id, role="assistant", content=ai_response)
 
     db.session.add_all([user_entry, ai_entry])
     db.session.commit()
+    schedule_condense(user_id)
 
     return jsonify(
         {
@@ -60,10 +99,60 @@ def send_message():
     ), 201
 
 
+@chat_bp.route("/stream", methods=["POST"])
+@jwt_required()
+def stream_message():
+    """Like ``/send`` but relays the reply as server-sent events.
+
+    Emits ``token`` events (``{"content": ...}``) while the model generates,
+    then stores both messages and emits a final ``done`` event carrying
+    them in the same shape ``/send`` returns.
+    """
+    user_id = int(get_jwt_identity())
+    payload = request.get_json() or {}
+    user_message = (payload.get("message") or "").strip()
+
+    if not user_message:
+        return jsonify({"error": "message is required"}), 400
+
+    if User.query.get(user_id) is None:
+        return jsonify({"error": "user not found"}), 404
+
+    history, summary = load_context(user_id)
+
+    def events():
+        parts = []
+        for chunk in stream_ai_response(user_message, history, summary):
+            parts.append(chunk)
+            yield _sse("token", {"content": chunk})
+
+        user_entry = ChatMessage(user_id=user_id, role="user", content=user_message)
+        ai_entry = ChatMessage(user_id=user_id, role="assistant", content="".join(parts).strip())
+        db.session.add_all([user_entry, ai_entry])
+        db.session.commit()
+
+        yield _sse("done", {
+            "user_message": user_entry.to_dict(),
+            "ai_message": ai_entry.to_dict(),
+        })
+        schedule_condense(user_id)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @chat_bp.route("/clear", methods=["DELETE"])
 @jwt_required()
 def clear_messages():
     user_id = int(get_jwt_identity())
     deleted = ChatMessage.query.filter_by(user_id=user_id).delete()
+    ChatSummary.query.filter_by(user_id=user_id).delete()
     db.session.commit()
     return jsonify({"cleared": deleted})
\ No newline at end of file
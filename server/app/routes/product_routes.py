@@ -1,22 +1,151 @@
 from datetime import datetime
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, abort, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from .. import db
+from sqlalchemy import insert, inspect, select, tuple_
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .. import cache, db
 from ..models import Product, Order, User
-from ..services.ai_service import generate_user_insights, generate_platform_insights
+from ..services.ai_service import generate_platform_insights, generate_user_insights, summary_pending
+from ..services.catalog_version import bump_catalog_version, get_catalog_version
+from ..services.impact_service import record_orders, refresh_product_buyers
+from ..services.search_service import SEARCH_FIELDS, index_product, remove_product, search_product_ids
+from ..utils.helpers import (
+    decode_cursor,
+    decode_offset_cursor,
+    encode_cursor,
+    encode_offset_cursor,
+    parse_bool,
+    parse_float,
+    parse_fields,
+    parse_limit,
+    pick_fields,
+)
+from ..utils.http import apply_cache_headers, make_etag, not_modified
+from ..utils.query_budget import query_budget
+from ..utils.serialization import (
+    ORDER_FIELDS,
+    PRODUCT_FIELDS,
+    STREAM_CHUNK_ROWS,
+    json_response,
+    product_row_to_dict,
+    product_rows,
+    stream_items,
+)
+from ..utils.sustainability import factors_version, get_factors
 
 product_bp = Blueprint('products', __name__)
 
 
 @product_bp.route('/', methods=['GET'])
+@query_budget(2)
 def get_products():
-    """Get all products."""
-    products = Product.query.order_by(Product.created_at.desc()).all()
-    return jsonify({'items': [p.to_dict() for p in products]})
+    """List products newest-first, one keyset page at a time.
+
+    Query args: ``limit``, ``cursor`` (the ``next_cursor`` of a previous page),
+    ``category``, ``location``, ``condition``, ``is_donation``, ``min_price``,
+    ``max_price``, ``include_owner`` (default true) and ``fields`` (a
+    comma-separated subset of keys to return).
+    """
+    args = request.args
+    try:
+        limit = parse_limit(args.get('limit'))
+        fields = parse_fields(args.get('fields'), PRODUCT_FIELDS)
+        include_owner = _wants_owner(args, fields)
+        is_donation = parse_bool(args.get('is_donation'))
+        min_price = parse_float(args.get('min_price'))
+        max_price = parse_float(args.get('max_price'))
+        cursor = decode_cursor(args['cursor']) if args.get('cursor') else None
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    etag = make_etag('catalog', get_catalog_version(), factors_version(), request.query_string)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    query = product_rows(include_owner)
+    for field in ('category', 'location', 'condition'):
+        value = (args.get(field) or '').strip()
+        if value:
+            query = query.where(getattr(Product, field) == value)
+    if is_donation is not None:
+        query = query.where(Product.is_donation == is_donation)
+    if min_price is not None:
+        query = query.where(Product.price >= min_price)
+    if max_price is not None:
+        query = query.where(Product.price <= max_price)
+    if cursor is not None:
+        query = query.where(tuple_(Product.created_at, Product.id) < cursor)
+
+    rows = db.session.execute(
+        query.order_by(Product.created_at.desc(), Product.id.desc()).limit(limit + 1)
+    ).all()
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    factors = get_factors()
+    response = json_response({
+        'items': [pick_fields(product_row_to_dict(row, include_owner, factors), fields) for row in page],
+        'next_cursor': next_cursor,
+    })
+    return apply_cache_headers(response, etag)
+
+
+def _wants_owner(args, fields):
+    """``include_owner`` flag, skipped entirely when ``fields`` omits it."""
+    if fields is not None and 'owner' not in fields:
+        return False
+    return parse_bool(args.get('include_owner')) is not False
+
+
+@product_bp.route('/search', methods=['GET'])
+@query_budget(2)
+def search_products():
+    """Full-text search over title, description, category and location.
+
+    Query args: ``q``, ``limit``, ``cursor`` (the ``next_cursor`` of a
+    previous page), ``include_owner`` (default true) and ``fields``. Results
+    are ordered by relevance.
+    """
+    args = request.args
+    query_text = (args.get('q') or '').strip()
+    if not query_text:
+        return jsonify({'error': 'q is required'}), 400
+    try:
+        limit = parse_limit(args.get('limit'))
+        fields = parse_fields(args.get('fields'), PRODUCT_FIELDS)
+        include_owner = _wants_owner(args, fields)
+        offset = decode_offset_cursor(args['cursor']) if args.get('cursor') else 0
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    ids, has_more = search_product_ids(query_text, limit, offset)
+
+    products = {}
+    if ids:
+        query = Product.query.filter(Product.id.in_(ids))
+        if include_owner:
+            query = query.options(joinedload(Product.owner))
+        products = {product.id: product for product in query}
+
+    return jsonify({
+        'items': [
+            pick_fields(products[pid].to_dict(include_owner=include_owner), fields)
+            for pid in ids
+            if pid in products
+        ],
+        'next_cursor': encode_offset_cursor(offset + limit) if has_more else None,
+    })
 
 
 @product_bp.route('/mine', methods=['GET'])
+@query_budget(1)
 @jwt_required()
 def get_my_products():
     """Get listings created by current user."""
@@ -26,11 +155,27 @@ def get_my_products():
     except (TypeError, ValueError):
         return jsonify({'error': 'unauthorized'}), 403
 
-    products = Product.query.filter_by(owner_id=user_id).order_by(Product.created_at.desc()).all()
-    return jsonify({'items': [p.to_dict() for p in products]})
+    try:
+        fields = parse_fields(request.args.get('fields'), PRODUCT_FIELDS)
+        include_owner = _wants_owner(request.args, fields)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    query = (
+        product_rows(include_owner)
+        .where(Product.owner_id == user_id)
+        .order_by(Product.created_at.desc(), Product.id.desc())
+        .execution_options(yield_per=STREAM_CHUNK_ROWS)
+    )
+    factors = get_factors()
+    return stream_items(
+        db.session.execute(query),
+        lambda row: pick_fields(product_row_to_dict(row, include_owner, factors), fields),
+    )
 
 
 @product_bp.route('/stats', methods=['GET'])
+@query_budget(8)
 @jwt_required()
 def get_product_stats():
     """Return aggregated stats for the current user."""
@@ -40,6 +185,16 @@ def get_product_stats():
     except (TypeError, ValueError):
         return jsonify({'error': 'unauthorized'}), 403
 
+    payload = cache.get_or_set(
+        f"stats:{user_id}:{factors_version()}",
+        lambda: _build_product_stats(user_id),
+        scopes=(f"user:{user_id}", "catalog"),
+        cache_if=lambda stats: not summary_pending(stats['insights']),
+    )
+    return jsonify(payload)
+
+
+def _build_product_stats(user_id):
     total_listings = Product.query.filter_by(owner_id=user_id).count()
     total_sales_q = db.session.query(db.func.count(Order.id)).join(Product).filter(Product.owner_id == user_id)
     total_sales = total_sales_q.scalar() or 0
@@ -51,13 +206,18 @@ def get_product_stats():
     )
     total_revenue = revenue_q.scalar() or 0.0
 
-    buyer_orders = Order.query.filter_by(buyer_id=user_id).order_by(Order.purchased_at.desc()).all()
+    buyer_orders = (
+        Order.query.filter_by(buyer_id=user_id)
+        .options(joinedload(Order.product).joinedload(Product.owner))
+        .order_by(Order.purchased_at.desc())
+        .all()
+    )
     purchases_count = len(buyer_orders)
     purchases_total = sum(order.price for order in buyer_orders)
 
     insights = generate_user_insights(user_id=user_id)
 
-    return jsonify({
+    return {
         'listings': total_listings,
         'sales': total_sales,
         'revenue': total_revenue,
@@ -65,7 +225,7 @@ def get_product_stats():
         'purchases_total': purchases_total,
         'recent_orders': [order.to_dict(include_product=True) for order in buyer_orders],
         'insights': insights,
-    })
+    }
 
 
 @product_bp.route('/stats/platform', methods=['GET'])
@@ -82,34 +242,56 @@ def get_platform_stats():
     if not user or not user.is_admin():
         return jsonify({'error': 'forbidden'}), 403
 
+    payload = cache.get_or_set(f"stats:platform:{factors_version()}", _build_platform_stats, scopes=("platform", "catalog"))
+    return jsonify(payload)
+
+
+def _build_platform_stats():
     total_products = Product.query.count()
     total_orders = Order.query.count()
     total_revenue = db.session.query(db.func.coalesce(db.func.sum(Order.price), 0.0)).scalar() or 0.0
 
     platform_insights = generate_platform_insights()
 
-    return jsonify({
+    return {
         'listings': total_products,
         'orders': total_orders,
         'revenue': total_revenue,
         'insights': platform_insights,
-    })
+    }
 
 
 @product_bp.route('/orders', methods=['GET'])
+@query_budget(1)
 @jwt_required()
 def get_my_orders():
-    """Orders placed by the current user."""
+    """Orders placed by the current user.
+
+    ``fields`` limits the keys returned; the product join is skipped unless
+    ``product`` is among them.
+    """
     identity = get_jwt_identity()
     try:
         user_id = int(identity)
     except (TypeError, ValueError):
         return jsonify({'error': 'unauthorized'}), 403
-    orders = Order.query.filter_by(buyer_id=user_id).order_by(Order.purchased_at.desc()).all()
-    return jsonify({'items': [order.to_dict(include_product=True) for order in orders]})
+    try:
+        fields = parse_fields(request.args.get('fields'), ORDER_FIELDS)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    include_product = fields is None or 'product' in fields
+
+    query = Order.query.filter_by(buyer_id=user_id)
+    if include_product:
+        query = query.options(joinedload(Order.product).joinedload(Product.owner))
+    orders = query.order_by(Order.purchased_at.desc()).all()
+    return jsonify({
+        'items': [pick_fields(order.to_dict(include_product=include_product), fields) for order in orders]
+    })
 
 
 @product_bp.route('/orders', methods=['POST'])
+@query_budget(10)
 @jwt_required()
 def create_orders():
     identity = get_jwt_identity()
@@ -124,51 +306,75 @@ def create_orders():
     if not isinstance(items, list) or not items:
         return jsonify({'error': 'items array is required'}), 400
 
-    created_orders = []
+    lines = []
+    for item in items:
+        try:
+            product_id = int(item.get('product_id') or item.get('id'))
+        except (TypeError, ValueError, AttributeError):
+            return jsonify({'error': 'invalid product_id'}), 400
+        lines.append((product_id, item))
+
+    # One IN query for the whole cart; owners come along for the response
+    products = {
+        product.id: product
+        for product in Product.query.options(joinedload(Product.owner))
+        .filter(Product.id.in_({product_id for product_id, _ in lines}))
+    }
+
+    rows = []
+    now = datetime.utcnow()
+    for product_id, item in lines:
+        product = products.get(product_id)
+        if not product:
+            return jsonify({'error': f'product {product_id} not found'}), 404
+
+        try:
+            quantity = max(int(item.get('quantity', 1)), 1)
+        except (TypeError, ValueError):
+            quantity = 1
+
+        try:
+            price_value = float(item.get('price_value', product.price or 0))
+        except (TypeError, ValueError):
+            price_value = float(product.price or 0)
+
+        rows.append({
+            'buyer_id': buyer_id,
+            'product_id': product_id,
+            'price': price_value * quantity,
+            'purchased_at': now,
+        })
 
     try:
-        for item in items:
-            try:
-                product_id = int(item.get('product_id') or item.get('id'))
-            except (TypeError, ValueError):
-                return jsonify({'error': 'invalid product_id'}), 400
-
-            product = Product.query.get(product_id)
-            if not product:
-                return jsonify({'error': f'product {product_id} not found'}), 404
-
-            try:
-                quantity = max(int(item.get('quantity', 1)), 1)
-            except (TypeError, ValueError):
-                quantity = 1
-
-            try:
-                price_value = float(item.get('price_value', product.price or 0))
-            except (TypeError, ValueError):
-                price_value = float(product.price or 0)
-
-            total_price = price_value * quantity
-
-            order = Order(
-                buyer_id=buyer_id,
-                product_id=product.id,
-                price=total_price,
-                purchased_at=datetime.utcnow(),
-            )
-            db.session.add(order)
-            created_orders.append(order)
-
+        # One multi-row INSERT for the whole cart
+        order_ids = db.session.scalars(insert(Order).returning(Order.id), rows).all()
+        record_orders(_transient_order(row, products[row['product_id']]) for row in rows)
         db.session.commit()
     except Exception as exc:
         db.session.rollback()
         return jsonify({'error': 'failed to create orders', 'details': str(exc)}), 500
 
-    stats_response = get_product_stats()
-    # get_product_stats returns a Response; if called directly we need JSON content
-    if stats_response.status_code == 200:
-        stats_data = stats_response.get_json()
+    # Commit expired everything; reload the new orders with their products in one go
+    created_orders = (
+        Order.query.options(joinedload(Order.product).joinedload(Product.owner))
+        .filter(Order.id.in_(order_ids))
+        .order_by(Order.id)
+        .all()
+    )
+    order_dicts = [order.to_dict(include_product=True) for order in created_orders]
+
+    stats_key, stats_scopes = f"stats:{buyer_id}:{factors_version()}", (f"user:{buyer_id}", "catalog")
+    previous = cache.get(stats_key, stats_scopes)
+
+    sellers = {order.product.owner_id for order in created_orders}
+    cache.invalidate(f"user:{buyer_id}", *(f"user:{owner_id}" for owner_id in sellers), "platform")
+
+    if previous is None:
+        dashboard = _build_product_stats(buyer_id)
     else:
-        stats_data = None
+        dashboard = _apply_checkout(previous, buyer_id, created_orders, order_dicts)
+    if not summary_pending(dashboard['insights']):
+        cache.set(stats_key, dashboard, stats_scopes)
 
     insights = generate_user_insights(
         user_id=buyer_id,
@@ -176,17 +382,73 @@ def create_orders():
     )
 
     return jsonify({
-        'orders': [order.to_dict(include_product=True) for order in created_orders],
-        'dashboard': stats_data,
+        'orders': order_dicts,
+        'dashboard': dashboard,
         'insights': insights,
     }), 201
 
 
+def _transient_order(row, product):
+    """Unsaved ``Order`` for ``record_orders``; the product is attached without
+    touching ``product.orders``, so nothing gets cascaded into the session."""
+    order = Order(**row)
+    set_committed_value(order, 'product', product)
+    return order
+
+
+def _apply_checkout(previous, buyer_id, orders, order_dicts):
+    """Fold a checkout into a cached ``_build_product_stats`` payload.
+
+    Only the buyer's purchase figures (and, for self-purchases, their sales)
+    move; insights are re-read from the impact buckets, which
+    ``record_orders`` already updated.
+    """
+    spent = sum(order.price for order in orders)
+    own = [order for order in orders if order.product.owner_id == buyer_id]
+
+    dashboard = dict(previous)
+    dashboard['purchases_count'] = previous['purchases_count'] + len(orders)
+    dashboard['purchases_total'] = previous['purchases_total'] + spent
+    dashboard['sales'] = previous['sales'] + len(own)
+    dashboard['revenue'] = previous['revenue'] + sum(order.price for order in own)
+    dashboard['recent_orders'] = list(reversed(order_dicts)) + list(previous['recent_orders'])
+    dashboard['insights'] = generate_user_insights(user_id=buyer_id)
+    return dashboard
+
+
 @product_bp.route('/<int:product_id>', methods=['GET'])
+@query_budget(2)
 def get_product(product_id):
-    """Get a single product by ID."""
-    product = Product.query.get_or_404(product_id)
-    return jsonify(product.to_dict())
+    """Get a single product by ID.
+
+    Answers ``If-None-Match`` / ``If-Modified-Since`` from the product's
+    ``updated_at`` alone, before the listing is loaded or serialized.
+    ``fields`` limits the keys returned.
+    """
+    try:
+        fields = parse_fields(request.args.get('fields'), PRODUCT_FIELDS)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    stamp = db.session.execute(
+        select(Product.updated_at).where(Product.id == product_id)
+    ).first()
+    if stamp is None:
+        abort(404)
+    updated_at = stamp.updated_at
+    etag = make_etag(
+        'product', product_id, updated_at.isoformat() if updated_at else '', factors_version(),
+        ','.join(sorted(fields)) if fields is not None else '',
+    )
+    cached = not_modified(etag, updated_at)
+    if cached is not None:
+        return cached
+
+    include_owner = fields is None or 'owner' in fields
+    options = [joinedload(Product.owner)] if include_owner else []
+    product = db.session.get(Product, product_id, options=options)
+    data = pick_fields(product.to_dict(include_owner=include_owner), fields)
+    return apply_cache_headers(json_response(data), etag, updated_at)
 
 
 @product_bp.route('/', methods=['POST'])
@@ -210,11 +472,11 @@ def create_product():
     if not user_id:
         demo_user = User.query.filter_by(email='demo@cirqlex.com').first()
         if not demo_user:
-            from .. import bcrypt
+            from ..services.password_service import hash_password
             demo_user = User(
                 email='demo@cirqlex.com',
                 name='Demo User',
-                password_hash=bcrypt.generate_password_hash('demo123').decode('utf-8')
+                password_hash=hash_password('demo123')
             )
             db.session.add(demo_user)
             db.session.flush()
@@ -233,7 +495,11 @@ def create_product():
     )
 
     db.session.add(product)
+    db.session.flush()
+    index_product(product)
+    bump_catalog_version()
     db.session.commit()
+    cache.invalidate(f"user:{user_id}", "platform")
 
     return jsonify(product.to_dict()), 201
 
@@ -272,7 +538,18 @@ def update_product(product_id):
     if 'image_url' in data:
         product.image_url = data['image_url']
 
+    # Buyers' impact buckets were computed from the old category/condition
+    state = inspect(product)
+    if state.attrs.category.history.has_changes() or state.attrs.condition.history.has_changes():
+        db.session.flush()
+        refresh_product_buyers(product.id)
+
+    if any(getattr(state.attrs, field).history.has_changes() for field in SEARCH_FIELDS):
+        index_product(product)
+
+    bump_catalog_version()
     db.session.commit()
+    cache.invalidate("catalog")
     return jsonify(product.to_dict())
 
 
@@ -292,7 +569,15 @@ def delete_product(product_id):
     if product.owner_id != user_id:
         return jsonify({'error': 'unauthorized'}), 403
 
+    # Orders keep their product (orders.product_id is NOT NULL), so sold
+    # products stay; buyers' impact buckets therefore never need a rebuild here
+    if db.session.scalar(select(Order.id).where(Order.product_id == product.id).limit(1)) is not None:
+        return jsonify({'error': 'product has orders and cannot be deleted'}), 409
+
+    remove_product(product.id)
     db.session.delete(product)
+    bump_catalog_version()
     db.session.commit()
+    cache.invalidate("catalog")
 
     return jsonify({'message': 'product deleted'}), 200
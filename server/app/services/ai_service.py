@@ -1,19 +1,25 @@
 """AI service for generating sustainability insights."""
+import hashlib
+import hmac
 import json
 import logging
 import os
-from collections import Counter
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Iterable, Optional, Sequence, Set
+from typing import Iterable, Optional, Sequence, Tuple
 
-import requests
+from flask import current_app, has_app_context
+from sqlalchemy import distinct, func
 from sqlalchemy.orm import joinedload
 
-from ..models import Order
-
-IMPACT_CO2_PER_CIRCULAR_ORDER = 2.5
-IMPACT_WASTE_PER_ORDER = 0.8
-IMPACT_TREES_PER_CIRCULAR_ORDER = 0.05
+from .. import db
+from ..models import Order, Product
+from ..utils.sustainability import circular_product_sql, get_factors, impact_category, is_circular_product
+from . import summary_cache
+from .impact_service import load_user_totals
+from .llm_client import get_llm_client
 
 OPENAI_URL = "https://api.openai.com/v1/chat/completions"
 
@@ -21,13 +27,7 @@ _logger = logging.getLogger(__name__)
 
 
 def _is_circular_purchase(order: Order) -> bool:
-    product = order.product
-    if product is None:
-        return False
-    if getattr(product, "is_donation", False):
-        return True
-    condition = (product.condition or "").lower()
-    return condition not in {"new", "brand new"}
+    return is_circular_product(order.product)
 
 
 def _format_kg(value: float) -> str:
@@ -39,59 +39,67 @@ def generate_user_insights(
     timeframe_days: Optional[int] = 180,
     orders: Optional[Sequence[Order]] = None,
 ) -> dict:
-    """Build a sustainability impact summary for a specific user."""
+    """Build a sustainability impact summary for a specific user.
+
+    Totals come from the user's ``UserImpactBucket`` rows; pass ``orders`` to
+    summarise an explicit set of orders (e.g. a just-placed checkout) instead.
+    """
 
     if not user_id:
         _logger.warning("generate_user_insights called without a user_id")
         return _empty_insights()
 
-    orders_list: list[Order]
-    if orders is None:
-        query = Order.query.filter(Order.buyer_id == user_id)
-
-        if timeframe_days and timeframe_days > 0:
-            start_date = datetime.utcnow() - timedelta(days=timeframe_days)
-            query = query.filter(Order.purchased_at >= start_date)
+    start_date = None
+    if timeframe_days and timeframe_days > 0:
+        start_date = datetime.utcnow() - timedelta(days=timeframe_days)
 
-        orders_list = query.options(joinedload(Order.product)).all()
+    sample_orders: list[Order]
+    if orders is None:
+        totals = load_user_totals(user_id, start_date)
+        sample_orders = []
+        if totals["orders"] and os.getenv("OPENAI_API_KEY"):
+            sample_query = Order.query.filter(Order.buyer_id == user_id)
+            if start_date is not None:
+                sample_query = sample_query.filter(Order.purchased_at >= start_date)
+            sample_orders = (
+                sample_query.options(joinedload(Order.product))
+                .order_by(Order.purchased_at.desc())
+                .limit(5)
+                .all()
+            )
     else:
-        orders_list = list(orders)
-        if timeframe_days and timeframe_days > 0:
-            start_date = datetime.utcnow() - timedelta(days=timeframe_days)
-            orders_list = [
-                order
-                for order in orders_list
-                if getattr(order, "purchased_at", None) is None
-                or order.purchased_at >= start_date
-            ]
-
-        # ensure product relationship is available when reusing pre-fetched orders
-        for order in orders_list:
-            if not hasattr(order, "product"):
-                db_order = Order.query.options(joinedload(Order.product)).get(order.id)
-                if db_order:
-                    order.product = db_order.product
-
-    if not orders_list:
+        sample_orders = [
+            order
+            for order in orders
+            if start_date is None
+            or getattr(order, "purchased_at", None) is None
+            or order.purchased_at >= start_date
+        ]
+        totals = {
+            "orders": len(sample_orders),
+            "circular": sum(1 for order in sample_orders if _is_circular_purchase(order)),
+            "spent": sum(order.price or 0 for order in sample_orders),
+            "categories": Counter(impact_category(order.product) for order in sample_orders),
+        }
+
+    if not totals["orders"]:
         return _empty_insights()
 
-    total_orders = len(orders_list)
-    total_spent = sum(order.price or 0 for order in orders_list)
-    circular_orders = sum(1 for order in orders_list if _is_circular_purchase(order))
+    total_orders = totals["orders"]
+    total_spent = totals["spent"]
+    circular_orders = totals["circular"]
     reuse_rate = (circular_orders / total_orders) * 100 if total_orders else 0
     average_order_value = (total_spent / total_orders) if total_orders else 0
 
-    categories = Counter(
-        (order.product.category or "General") if order.product else "General"
-        for order in orders_list
-    )
+    categories = Counter(totals["categories"])
     top_category, top_category_count = ("", 0)
     if categories:
         top_category, top_category_count = categories.most_common(1)[0]
 
-    co2_saved = circular_orders * IMPACT_CO2_PER_CIRCULAR_ORDER
-    waste_reduced = total_orders * IMPACT_WASTE_PER_ORDER
-    trees_saved = circular_orders * IMPACT_TREES_PER_CIRCULAR_ORDER
+    factors = get_factors()
+    co2_saved = circular_orders * factors.co2_per_circular_order
+    waste_reduced = total_orders * factors.waste_per_order
+    trees_saved = circular_orders * factors.trees_per_circular_order
 
     sustainability_score = min(
         100,
@@ -129,38 +137,50 @@ def generate_user_insights(
             "co2_saved": _format_kg(co2_saved),
             "waste_reduced": _format_kg(waste_reduced),
             "trees_saved": round(trees_saved, 2),
+            "factor_version": factors.version,
         },
         "recommendations": recommendations,
     }
 
-    ai_summary = _generate_ai_summary(insights, orders_list)
+    ai_summary = _generate_ai_summary(insights, sample_orders, user_id)
     insights["ai"] = ai_summary
 
     return insights
 
 
 def generate_platform_insights(timeframe_days: Optional[int] = 180) -> dict:
-    """Aggregate sustainability impact across the entire marketplace."""
-
-    query = Order.query.options(joinedload(Order.product))
+    """Aggregate sustainability impact across the entire marketplace.
+
+    Counts, spend, distinct buyers and circular purchases are computed in a
+    single grouped query; no order rows are loaded into Python.
+    """
+
+    query = (
+        db.session.query(
+            func.count(Order.id),
+            func.coalesce(func.sum(Order.price), 0.0),
+            func.coalesce(func.sum(circular_product_sql(Product)), 0),
+            func.count(distinct(Order.buyer_id)),
+        )
+        .select_from(Order)
+        .outerjoin(Product, Product.id == Order.product_id)
+    )
     if timeframe_days and timeframe_days > 0:
         start_date = datetime.utcnow() - timedelta(days=timeframe_days)
         query = query.filter(Order.purchased_at >= start_date)
 
-    orders = query.all()
-    if not orders:
+    total_orders, total_spent, circular_orders, unique_buyers = query.one()
+    if not total_orders:
         return _empty_platform_insights()
 
-    total_orders = len(orders)
-    total_spent = sum(order.price or 0 for order in orders)
-    circular_orders = sum(1 for order in orders if _is_circular_purchase(order))
+    total_spent = float(total_spent or 0)
+    circular_orders = int(circular_orders or 0)
     reuse_rate = (circular_orders / total_orders) * 100 if total_orders else 0
 
-    buyers: Set[int] = {order.buyer_id for order in orders if order.buyer_id}
-
-    co2_saved = circular_orders * IMPACT_CO2_PER_CIRCULAR_ORDER
-    waste_reduced = total_orders * IMPACT_WASTE_PER_ORDER
-    trees_saved = circular_orders * IMPACT_TREES_PER_CIRCULAR_ORDER
+    factors = get_factors()
+    co2_saved = circular_orders * factors.co2_per_circular_order
+    waste_reduced = total_orders * factors.waste_per_order
+    trees_saved = circular_orders * factors.trees_per_circular_order
 
     timeframe_label = f"the last {timeframe_days} days" if timeframe_days else "all-time"
 
@@ -170,7 +190,7 @@ def generate_platform_insights(timeframe_days: Optional[int] = 180) -> dict:
             "orders_analyzed": total_orders,
             "circular_purchases": circular_orders,
             "reuse_rate_pct": round(reuse_rate, 1),
-            "unique_buyers": len(buyers),
+            "unique_buyers": unique_buyers,
             "total_spent": round(total_spent, 2),
             "timeframe_days": timeframe_days or None,
         },
@@ -178,6 +198,7 @@ def generate_platform_insights(timeframe_days: Optional[int] = 180) -> dict:
             "co2_saved": _format_kg(co2_saved),
             "waste_reduced": _format_kg(waste_reduced),
             "trees_saved": round(trees_saved, 2),
+            "factor_version": factors.version,
         },
     }
 
@@ -211,6 +232,7 @@ def _empty_insights() -> dict:
             "co2_saved": "0.0 kg",
             "waste_reduced": "0.0 kg",
             "trees_saved": 0,
+            "factor_version": get_factors().version,
         },
         "recommendations": [
             "Make your first circular purchase to start building an impact profile.",
@@ -236,15 +258,19 @@ def _empty_platform_insights() -> dict:
     return base
 
 
-def _generate_ai_summary(insights: dict, orders: Iterable[Order]) -> dict:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return {
-            "environmental_impact": None,
-            "recommended_actions": [],
-        }
+def _empty_ai_summary() -> dict:
+    return {
+        "environmental_impact": None,
+        "recommended_actions": [],
+    }
 
-    model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+
+def _build_summary_payload(insights: dict, orders: Iterable[Order]) -> dict:
+    """Snapshot everything the summary prompt needs as plain data.
+
+    Runs in the request thread so the background job never touches ORM
+    objects or the session.
+    """
 
     sample_orders = []
     for order in list(orders)[:5]:
@@ -259,13 +285,111 @@ def _generate_ai_summary(insights: dict, orders: Iterable[Order]) -> dict:
             }
         )
 
-    payload = {
+    return {
         "metrics": insights.get("metrics", {}),
         "impact": insights.get("impact", {}),
         "sample_orders": sample_orders,
         "recommendations": insights.get("recommendations", []),
     }
 
+
+def _summary_key(payload: dict, model: str) -> str:
+    """Stable content hash identifying a summary request."""
+
+    canonical = json.dumps({"model": model, "payload": payload}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _owned_job_id(job_id: str, user_id: int) -> str:
+    """Public id for ``user_id``'s view of a summary job.
+
+    Jobs are keyed by content, so two users with the same payload share
+    one; the public id appends an HMAC of the owner so a poll can be
+    checked without any per-job state (and in any worker process).
+    """
+
+    secret = current_app.config["JWT_SECRET_KEY"].encode("utf-8")
+    tag = hmac.new(secret, f"{user_id}:{job_id}".encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+    return f"{job_id}.{tag}"
+
+
+def _generate_ai_summary(insights: dict, orders: Iterable[Order], user_id: int) -> dict:
+    """Return the ``ai`` section for user insights.
+
+    Summaries are memoized by ``_summary_key``: a finished job in this
+    process or a row in ``ai_summary_cache`` answers without calling
+    OpenAI. Otherwise, with ``AI_SUMMARY_ASYNC`` enabled (the default), the
+    call runs on a background worker and this returns ``status: "pending"``
+    plus a ``job_id`` that ``user_id`` can poll via ``get_summary_job``
+    (exposed at ``GET /api/insights/summary/<job_id>``).
+    """
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return _empty_ai_summary()
+
+    model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+    payload = _build_summary_payload(insights, orders)
+    job_id = _summary_key(payload, model)
+
+    job = _ready_summary(job_id)
+    if job is not None:
+        return _job_response(_owned_job_id(job_id, user_id), job)
+
+    run_async = True
+    if has_app_context():
+        run_async = current_app.config.get("AI_SUMMARY_ASYNC", True)
+    if not run_async:
+        summary_cache.record_miss()
+        result = _request_ai_summary(payload, api_key, model)
+        if result is None:
+            return _empty_ai_summary()
+        summary, tokens = result
+        summary_cache.store(job_id, model, summary, tokens)
+        return summary
+
+    job = _submit_summary_job(job_id, payload, api_key, model)
+    return _job_response(_owned_job_id(job_id, user_id), job)
+
+
+def summary_pending(insights: dict) -> bool:
+    """Whether ``insights`` still waits on a background AI summary.
+
+    Such payloads must not be cached: the summary would stay ``pending``
+    for the whole cache TTL.
+    """
+
+    return (insights.get("ai") or {}).get("status") == "pending"
+
+
+def _ready_summary(job_id: str) -> Optional[dict]:
+    """Finished summary from this process or the persistent cache."""
+
+    with _summary_lock:
+        job = _summary_jobs.get(job_id)
+        if job is not None and job["status"] == "ready":
+            _summary_jobs.move_to_end(job_id)
+            job = dict(job)
+        else:
+            job = None
+    if job is not None:
+        summary_cache.record_hit(job["tokens"])
+        return job
+
+    cached = summary_cache.lookup(job_id)
+    if cached is None:
+        return None
+    summary, tokens = cached
+    summary_cache.record_hit(tokens)
+    return _remember_job(job_id, {"status": "ready", "result": summary, "tokens": tokens})
+
+
+def _request_ai_summary(payload: dict, api_key: str, model: str) -> Optional[Tuple[dict, int]]:
+    """Call OpenAI for a summary.
+
+    Returns ``(summary, total_tokens)`` or ``None`` on any failure.
+    """
+
     user_prompt = (
         "Using the sustainability data provided, craft a concise summary (max 2 sentences) "
         "highlighting the user's positive environmental impact. Then list three actionable, "
@@ -276,13 +400,10 @@ def _generate_ai_summary(insights: dict, orders: Iterable[Order]) -> dict:
     )
 
     try:
-        response = requests.post(
+        data = get_llm_client().chat_completion(
             OPENAI_URL,
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
+            api_key,
+            {
                 "model": model,
                 "messages": [
                     {
@@ -299,22 +420,118 @@ def _generate_ai_summary(insights: dict, orders: Iterable[Order]) -> dict:
             },
             timeout=30,
         )
-        response.raise_for_status()
-        data = response.json()
         message = data["choices"][0]["message"]["content"].strip()
         summary = _parse_json_block(message)
         if not isinstance(summary, dict):
             raise ValueError("OpenAI summary response was not a JSON object")
+        tokens = (data.get("usage") or {}).get("total_tokens") or 0
         return {
             "environmental_impact": summary.get("environmentalImpact"),
             "recommended_actions": summary.get("recommendedActions") or [],
-        }
+        }, int(tokens)
     except Exception as exc:  # pragma: no cover - defensive
         _logger.exception("Failed to build AI sustainability summary: %s", exc)
-        return {
-            "environmental_impact": None,
-            "recommended_actions": [],
-        }
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Background summary jobs
+# ---------------------------------------------------------------------------
+
+_SUMMARY_JOBS_MAX = 512
+
+_summary_lock = threading.Lock()
+_summary_jobs: "OrderedDict[str, dict]" = OrderedDict()
+_summary_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_summary_executor() -> ThreadPoolExecutor:
+    global _summary_executor
+    with _summary_lock:
+        if _summary_executor is None:
+            workers = 2
+            if has_app_context():
+                workers = current_app.config.get("AI_SUMMARY_WORKERS", workers)
+            _summary_executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="ai-summary"
+            )
+        return _summary_executor
+
+
+def _remember_job(job_id: str, job: dict) -> dict:
+    with _summary_lock:
+        _summary_jobs[job_id] = job
+        _summary_jobs.move_to_end(job_id)
+        while len(_summary_jobs) > _SUMMARY_JOBS_MAX:
+            _summary_jobs.popitem(last=False)
+        return dict(job)
+
+
+def _submit_summary_job(job_id: str, payload: dict, api_key: str, model: str) -> dict:
+    """Start a summary job unless one is already pending or finished."""
+
+    with _summary_lock:
+        job = _summary_jobs.get(job_id)
+        if job is not None and job["status"] != "failed":
+            _summary_jobs.move_to_end(job_id)
+            return dict(job)
+
+    job = _remember_job(job_id, {"status": "pending", "result": None, "tokens": 0})
+    summary_cache.record_miss()
+    app = current_app._get_current_object() if has_app_context() else None
+    _get_summary_executor().submit(_run_summary_job, app, job_id, payload, api_key, model)
+    return job
+
+
+def _run_summary_job(app, job_id: str, payload: dict, api_key: str, model: str) -> None:
+    if app is None:
+        result = _request_ai_summary(payload, api_key, model)
+    else:
+        with app.app_context():
+            result = _request_ai_summary(payload, api_key, model)
+            if result is not None:
+                try:
+                    summary_cache.store(job_id, model, result[0], result[1])
+                except Exception:  # pragma: no cover - defensive
+                    _logger.exception("Failed to persist AI summary %s", job_id)
+
+    with _summary_lock:
+        job = _summary_jobs.get(job_id)
+        if job is None:
+            return
+        if result is None:
+            job["status"] = "failed"
+        else:
+            job.update({"status": "ready", "result": result[0], "tokens": result[1]})
+
+
+def _job_response(job_id: str, job: dict) -> dict:
+    response = dict(job["result"] or _empty_ai_summary())
+    response.update({"status": job["status"], "job_id": job_id})
+    return response
+
+
+def get_summary_job(public_id: str, user_id: int) -> Optional[dict]:
+    """Current state of a summary job, or ``None`` if unknown to ``user_id``.
+
+    ``public_id`` is the ``job_id`` handed out by ``_generate_ai_summary``;
+    ids issued to another user are treated as unknown. Falls back to the
+    persistent cache so a job finished by another worker process can still
+    be polled.
+    """
+
+    job_id = public_id.split(".", 1)[0]
+    if not hmac.compare_digest(public_id, _owned_job_id(job_id, user_id)):
+        return None
+    with _summary_lock:
+        job = _summary_jobs.get(job_id)
+        job = dict(job) if job is not None else None
+    if job is None:
+        cached = summary_cache.lookup(job_id)
+        if cached is None:
+            return None
+        job = _remember_job(job_id, {"status": "ready", "result": cached[0], "tokens": cached[1]})
+    return _job_response(public_id, job)
 
 
 def _parse_json_block(raw_text: str) -> Optional[dict]:
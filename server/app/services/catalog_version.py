@@ -0,0 +1,53 @@
+"""Catalog version counter behind the listing ETags.
+
+The counter lives in the database (one ``catalog_state`` row) so every
+worker sees the same value; ``bump_catalog_version`` runs inside the
+writer's transaction, so a listing ETag changes exactly when the data it
+was computed from does.
+"""
+from sqlalchemy import update
+
+from .. import db
+from ..models import CatalogState
+
+_ROW_ID = 1
+
+
+def get_catalog_version() -> int:
+    state = db.session.get(CatalogState, _ROW_ID)
+    return state.version if state else 0
+
+
+def bump_catalog_version() -> None:
+    """Increment the counter in the caller's transaction."""
+
+    result = db.session.execute(
+        update(CatalogState).where(CatalogState.id == _ROW_ID).values(version=CatalogState.version + 1)
+    )
+    if not result.rowcount:
+        _create_or_bump()
+
+
+def _create_or_bump() -> None:
+    """First bump: insert the row, or bump it if a concurrent writer just did."""
+
+    table = CatalogState.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in {"sqlite", "postgresql"}:
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+        stmt = dialect_insert(table).values(id=_ROW_ID, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.id],
+            set_={"version": table.c.version + 1},
+        )
+        db.session.execute(stmt)
+        return
+
+    # Other backends keep the plain insert; two racing first writers can
+    # still collide there.
+    db.session.add(CatalogState(id=_ROW_ID, version=1))
@@ -0,0 +1,142 @@
+"""Bounded chat context for the assistant.
+
+Only the newest ``CHAT_HISTORY_WINDOW`` messages are read (one indexed,
+limited query) and they are trimmed, oldest first, to fit
+``CHAT_HISTORY_TOKEN_BUDGET``. Older turns live on in a per-user
+``ChatSummary`` that ``maybe_condense`` rolls forward once
+``CHAT_SUMMARY_BATCH`` messages have fallen out of the window, so the
+per-request cost stays flat however long the conversation gets. The chat
+routes call ``schedule_condense``, which runs that summarisation on the
+AI summary executor so a reply never waits on a second LLM call.
+"""
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app
+
+from .. import db
+from ..models import ChatMessage, ChatSummary
+from .ai_service import _get_summary_executor
+from .chat_service import summarize_conversation
+
+_logger = logging.getLogger(__name__)
+
+# Per-message framing overhead in the chat completion format
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+
+    if not text:
+        return 0
+    return len(text) // 4 + _MESSAGE_OVERHEAD_TOKENS
+
+
+def load_context(user_id: int) -> Tuple[List[Dict[str, str]], Optional[str]]:
+    """Return ``(recent_messages, summary)`` to send along with a new message."""
+
+    config = current_app.config
+    window = config.get("CHAT_HISTORY_WINDOW", 20)
+    budget = config.get("CHAT_HISTORY_TOKEN_BUDGET", 1500)
+
+    summary_row = db.session.get(ChatSummary, user_id)
+    summary = summary_row.content if summary_row else None
+
+    rows = (
+        ChatMessage.query.filter_by(user_id=user_id)
+        .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+        .limit(window)
+        .all()
+    )
+
+    remaining = budget - estimate_tokens(summary)
+    recent: List[Dict[str, str]] = []
+    for row in rows:  # newest first
+        cost = estimate_tokens(row.content)
+        if cost > remaining:
+            break
+        remaining -= cost
+        recent.append({"role": row.role, "content": row.content})
+    recent.reverse()
+    return recent, summary
+
+
+def maybe_condense(user_id: int) -> bool:
+    """Fold messages that left the window into the user's summary.
+
+    Runs only once at least ``CHAT_SUMMARY_BATCH`` unsummarised messages sit
+    outside the window, so the summarisation call is amortised. Returns
+    whether the summary was updated.
+    """
+
+    config = current_app.config
+    window = config.get("CHAT_HISTORY_WINDOW", 20)
+    batch = config.get("CHAT_SUMMARY_BATCH", 10)
+
+    summary_row = db.session.get(ChatSummary, user_id)
+    through_id = summary_row.through_message_id if summary_row else 0
+
+    pending = ChatMessage.query.filter(
+        ChatMessage.user_id == user_id, ChatMessage.id > through_id
+    ).count()
+    if pending < window + batch:
+        return False
+
+    # everything unsummarised except the newest ``window`` messages
+    fold = (
+        ChatMessage.query.filter(ChatMessage.user_id == user_id, ChatMessage.id > through_id)
+        .order_by(ChatMessage.id.asc())
+        .limit(pending - window)
+        .all()
+    )
+
+    content = summarize_conversation(
+        summary_row.content if summary_row else None,
+        [{"role": m.role, "content": m.content} for m in fold],
+    )
+    if summary_row is None:
+        summary_row = ChatSummary(user_id=user_id, content=content)
+        db.session.add(summary_row)
+    summary_row.content = content
+    summary_row.through_message_id = fold[-1].id
+    db.session.commit()
+    return True
+
+
+_condensing: Dict[int, Future] = {}
+_condensing_lock = threading.Lock()
+
+
+def schedule_condense(user_id: int) -> Optional[Future]:
+    """Run ``maybe_condense`` for ``user_id`` in the background.
+
+    At most one condensation per user is in flight; returns its future, or
+    ``None`` when one was already running.
+    """
+
+    app = current_app._get_current_object()
+    with _condensing_lock:
+        if user_id in _condensing:
+            return None
+        future = _get_summary_executor().submit(_condense_in_background, app, user_id)
+        _condensing[user_id] = future
+    future.add_done_callback(lambda _: _forget_condense(user_id))
+    return future
+
+
+def _forget_condense(user_id: int) -> None:
+    with _condensing_lock:
+        _condensing.pop(user_id, None)
+
+
+def _condense_in_background(app, user_id: int) -> bool:
+    with app.app_context():
+        try:
+            return maybe_condense(user_id)
+        except Exception:
+            db.session.rollback()
+            _logger.exception("Failed to condense chat history for user %s", user_id)
+            return False
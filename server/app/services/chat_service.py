@@ -1,8 +1,8 @@
 import logging
 import os
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, Iterator, List, Optional
 
-import requests
+from .llm_client import get_llm_client
 
 SYSTEM_PROMPT = (
     "You are Eco AI, a friendly sustainability assistant for CirqleX. "
@@ -10,12 +10,27 @@ SYSTEM_PROMPT = (
     "recycling, and eco-friendly living. Keep answers concise, practical, and positive."
 )
 
+DEMO_MODE_MESSAGE = (
+    "I'm running in demo mode right now. Once an OpenAI API key is configured, "
+    "I'll be able to provide richer sustainability guidance."
+)
+UNAVAILABLE_MESSAGE = (
+    "I couldn't reach the AI service at the moment. Please verify your OpenAI credentials "
+    "and try again shortly."
+)
+
 _logger = logging.getLogger(__name__)
 OPENAI_URL = "https://api.openai.com/v1/chat/completions"
 
 
-def build_conversation(history: Iterable[Dict[str, str]], user_message: str) -> List[Dict[str, str]]:
+def build_conversation(
+    history: Iterable[Dict[str, str]],
+    user_message: str,
+    summary: Optional[str] = None,
+) -> List[Dict[str, str]]:
     messages: List[Dict[str, str]] = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if summary:
+        messages.append({"role": "system", "content": f"Summary of the earlier conversation: {summary}"})
     for message in history:
         role = message.get("role")
         content = (message.get("content") or "").strip()
@@ -25,26 +40,24 @@ def build_conversation(history: Iterable[Dict[str, str]], user_message: str) ->
     return messages
 
 
-def generate_ai_response(user_message: str, history: Iterable[Dict[str, str]]) -> str:
+def generate_ai_response(
+    user_message: str,
+    history: Iterable[Dict[str, str]],
+    summary: Optional[str] = None,
+) -> str:
     api_key = os.getenv("OPENAI_API_KEY")
-    conversation = build_conversation(history, user_message)
+    conversation = build_conversation(history, user_message, summary)
 
     if not api_key:
-        return (
-            "I'm running in demo mode right now. Once an OpenAI API key is configured, "
-            "I'll be able to provide richer sustainability guidance."
-        )
+        return DEMO_MODE_MESSAGE
 
     model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
 
     try:
-        resp = requests.post(
+        data = get_llm_client().chat_completion(
             OPENAI_URL,
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
+            api_key,
+            {
                 "model": model,
                 "messages": conversation,
                 "temperature": 0.5,
@@ -52,14 +65,97 @@ def generate_ai_response(user_message: str, history: Iterable[Dict[str, str]]) -
             },
             timeout=30,
         )
-        resp.raise_for_status()
-        data = resp.json()
         choice = data["choices"][0]
         message = choice.get("message", {})
         return (message.get("content") or "").strip()
     except Exception as exc:  # pragma: no cover - defensive
         _logger.exception("Failed to generate AI response: %s", exc)
-        return (
-            "I couldn't reach the AI service at the moment. Please verify your OpenAI credentials "
-            "and try again shortly."
-        )
\ No newline at end of file
+        return UNAVAILABLE_MESSAGE
+
+
+def stream_ai_response(
+    user_message: str,
+    history: Iterable[Dict[str, str]],
+    summary: Optional[str] = None,
+) -> Iterator[str]:
+    """Yield the assistant reply in chunks as the upstream model produces them.
+
+    Falls back to the same canned messages as ``generate_ai_response``; if the
+    upstream fails mid-stream the partial reply is kept as is.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    conversation = build_conversation(history, user_message, summary)
+
+    if not api_key:
+        yield DEMO_MODE_MESSAGE
+        return
+
+    model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+
+    produced = False
+    try:
+        for chunk in get_llm_client().stream_chat_completion(
+            OPENAI_URL,
+            api_key,
+            {
+                "model": model,
+                "messages": conversation,
+                "temperature": 0.5,
+                "max_tokens": 400,
+            },
+            timeout=30,
+        ):
+            produced = True
+            yield chunk
+    except Exception as exc:  # pragma: no cover - defensive
+        _logger.exception("Failed to stream AI response: %s", exc)
+        if not produced:
+            yield UNAVAILABLE_MESSAGE
+
+
+def summarize_conversation(
+    previous_summary: Optional[str],
+    messages: Iterable[Dict[str, str]],
+    max_chars: int = 1200,
+) -> str:
+    """Fold older chat turns into a short running summary.
+
+    Uses the model when configured; otherwise (or on failure) keeps a plain
+    digest of the user's questions so the context still carries the topics.
+    """
+    turns = [
+        (message.get("role"), (message.get("content") or "").strip()[:500])
+        for message in messages
+        if message.get("role") in {"user", "assistant"}
+    ]
+    api_key = os.getenv("OPENAI_API_KEY")
+
+    if api_key and turns:
+        transcript = "\n".join(f"{role}: {content}" for role, content in turns)
+        prompt = (
+            "Update the running summary of this sustainability chat. Keep the user's goals, "
+            f"preferences and open questions in under {max_chars // 5} words.\n"
+            f"Current summary: {previous_summary or '(none)'}\n"
+            f"New turns:\n{transcript}"
+        )
+        try:
+            data = get_llm_client().chat_completion(
+                OPENAI_URL,
+                api_key,
+                {
+                    "model": os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.2,
+                    "max_tokens": 250,
+                },
+                timeout=30,
+            )
+            content = (data["choices"][0].get("message", {}).get("content") or "").strip()
+            if content:
+                return content[:max_chars]
+        except Exception as exc:  # pragma: no cover - defensive
+            _logger.warning("Falling back to a plain chat summary: %s", exc)
+
+    questions = "; ".join(content[:120] for role, content in turns if role == "user" and content)
+    digest = " ".join(part for part in (previous_summary, f"Earlier the user asked about: {questions}.") if part)
+    return digest[-max_chars:]
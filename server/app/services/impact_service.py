@@ -0,0 +1,266 @@
+"""Incrementally maintained per-buyer impact aggregates.
+
+Every order contributes to exactly one ``UserImpactBucket`` keyed by
+``(buyer, purchase day, category)``. Buckets are updated in the caller's
+transaction when orders are created and can be rebuilt from the ``orders``
+table at any time with ``flask rebuild-impact``.
+
+Each product's per-purchase CO2 estimate is stored on ``products.co2_savings``
+together with the factor table version it used; ``flask refresh-co2``
+recomputes only the rows stamped with an older version.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.orm import joinedload
+
+from .. import db
+from ..models import Order, Product, UserImpactBucket
+from ..utils.sustainability import (
+    circular_product_sql,
+    estimate_co2_batch,
+    factors_version,
+    impact_category,
+    impact_category_sql,
+    is_circular_product,
+)
+
+BucketKey = Tuple[int, date, str]
+
+
+def record_orders(orders: Iterable[Order]) -> None:
+    """Fold freshly created orders into their buckets without committing.
+
+    Each order must have ``buyer_id`` set and its ``product`` relationship
+    populated (or resolvable) so the circular flag and category are known.
+    An order without ``purchased_at`` (not yet flushed) is stamped now, so
+    the stored row lands in the same bucket on a rebuild.
+    """
+
+    deltas: Dict[BucketKey, list] = defaultdict(lambda: [0, 0, 0.0])
+    for order in orders:
+        product = order.product
+        if order.purchased_at is None:
+            order.purchased_at = datetime.utcnow()
+        day = order.purchased_at.date()
+        delta = deltas[(order.buyer_id, day, impact_category(product))]
+        delta[0] += 1
+        delta[1] += 1 if is_circular_product(product) else 0
+        delta[2] += float(order.price or 0)
+
+    if not deltas:
+        return
+
+    rows = [
+        {
+            "user_id": user_id,
+            "day": day,
+            "category": category,
+            "orders_count": count,
+            "circular_orders": circular,
+            "total_spent": spent,
+        }
+        for (user_id, day, category), (count, circular, spent) in deltas.items()
+    ]
+    _upsert_buckets(rows)
+
+
+def _upsert_buckets(rows: Sequence[dict]) -> None:
+    table = UserImpactBucket.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in {"sqlite", "postgresql"}:
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+        stmt = dialect_insert(table).values(list(rows))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.day, table.c.category],
+            set_={
+                "orders_count": table.c.orders_count + stmt.excluded.orders_count,
+                "circular_orders": table.c.circular_orders + stmt.excluded.circular_orders,
+                "total_spent": table.c.total_spent + stmt.excluded.total_spent,
+            },
+        )
+        db.session.execute(stmt)
+        return
+
+    # Portable read-modify-write fallback for other backends.
+    for row in rows:
+        bucket = UserImpactBucket.query.filter_by(
+            user_id=row["user_id"], day=row["day"], category=row["category"]
+        ).with_for_update().first()
+        if bucket is None:
+            db.session.add(UserImpactBucket(**row))
+        else:
+            bucket.orders_count += row["orders_count"]
+            bucket.circular_orders += row["circular_orders"]
+            bucket.total_spent += row["total_spent"]
+
+
+def rebuild_user_impact(user_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute buckets from ``orders`` for the given buyers (or everyone).
+
+    Rows without ``purchased_at`` are skipped; :func:`record_orders` stamps
+    every order it buckets, so only rows written around it are left out.
+    Runs in the caller's transaction; returns the number of buckets written.
+    """
+
+    ids = None if user_ids is None else sorted({int(uid) for uid in user_ids if uid})
+    if ids is not None and not ids:
+        return 0
+
+    delete_q = UserImpactBucket.query
+    if ids is not None:
+        delete_q = delete_q.filter(UserImpactBucket.user_id.in_(ids))
+    delete_q.delete(synchronize_session=False)
+
+    day = func.date(Order.purchased_at)
+    category = impact_category_sql(Product)
+    source = (
+        select(
+            Order.buyer_id,
+            day,
+            category,
+            func.count(Order.id),
+            func.sum(circular_product_sql(Product)),
+            func.coalesce(func.sum(Order.price), 0.0),
+        )
+        .select_from(Order)
+        .outerjoin(Product, Product.id == Order.product_id)
+        .where(Order.purchased_at.isnot(None))
+        .group_by(Order.buyer_id, day, category)
+    )
+    if ids is not None:
+        source = source.where(Order.buyer_id.in_(ids))
+
+    result = db.session.execute(
+        insert(UserImpactBucket).from_select(
+            ["user_id", "day", "category", "orders_count", "circular_orders", "total_spent"],
+            source,
+        )
+    )
+    return result.rowcount or 0
+
+
+def refresh_product_buyers(product_id: int) -> None:
+    """Rebuild buckets for everyone who bought ``product_id``.
+
+    Needed when a product's category/condition changes, since those
+    attributes were folded into the buyers' buckets. Deletion does not
+    need it: a product with orders cannot be deleted.
+    """
+
+    buyer_ids = [
+        buyer_id
+        for (buyer_id,) in db.session.query(Order.buyer_id)
+        .filter(Order.product_id == product_id)
+        .distinct()
+    ]
+    if buyer_ids:
+        rebuild_user_impact(buyer_ids)
+
+
+def load_user_totals(user_id: int, start: Optional[datetime]) -> dict:
+    """Sum a buyer's buckets (plus the partial first day) since ``start``.
+
+    Whole days after ``start`` come from buckets; orders on the day of
+    ``start`` itself are read directly so the window boundary is exact.
+    """
+
+    totals = {"orders": 0, "circular": 0, "spent": 0.0, "categories": defaultdict(int)}
+
+    bucket_q = db.session.query(
+        UserImpactBucket.category,
+        func.sum(UserImpactBucket.orders_count),
+        func.sum(UserImpactBucket.circular_orders),
+        func.sum(UserImpactBucket.total_spent),
+    ).filter(UserImpactBucket.user_id == user_id)
+    if start is not None:
+        bucket_q = bucket_q.filter(UserImpactBucket.day > start.date())
+
+    for category, count, circular, spent in bucket_q.group_by(UserImpactBucket.category):
+        totals["orders"] += int(count or 0)
+        totals["circular"] += int(circular or 0)
+        totals["spent"] += float(spent or 0)
+        totals["categories"][category] += int(count or 0)
+
+    if start is not None:
+        next_day = datetime.combine(start.date() + timedelta(days=1), datetime.min.time())
+        edge_orders = (
+            Order.query.filter(
+                Order.buyer_id == user_id,
+                Order.purchased_at >= start,
+                Order.purchased_at < next_day,
+            )
+            .options(joinedload(Order.product))
+            .all()
+        )
+        for order in edge_orders:
+            circular = is_circular_product(order.product)
+            totals["orders"] += 1
+            totals["circular"] += 1 if circular else 0
+            totals["spent"] += float(order.price or 0)
+            totals["categories"][impact_category(order.product)] += 1
+
+    return totals
+
+
+def refresh_product_co2(batch_size: int = 5000) -> int:
+    """Recompute ``co2_savings`` for products whose stored estimate predates
+    the active factor table, ``batch_size`` rows at a time. Runs in the
+    caller's transaction; returns the number of rows updated.
+    """
+
+    version = factors_version()
+    stale = or_(Product.co2_factors_version.is_(None), Product.co2_factors_version != version)
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Product.id, Product.category, Product.condition, Product.is_donation)
+            .where(Product.id > last_id, stale)
+            .order_by(Product.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return updated
+        last_id = rows[-1].id
+
+        ids, categories, conditions, donations = zip(*rows)
+        estimates = estimate_co2_batch(categories, conditions, donations)
+        db.session.execute(
+            update(Product),
+            [
+                {"id": product_id, "co2_savings": estimate, "co2_factors_version": version}
+                for product_id, estimate in zip(ids, estimates)
+            ],
+        )
+        updated += len(rows)
+
+
+@click.command("rebuild-impact")
+@click.option("--user-id", "user_ids", type=int, multiple=True, help="Only rebuild these buyers.")
+@with_appcontext
+def rebuild_impact_command(user_ids):
+    """Backfill user_impact_buckets from the orders table."""
+
+    written = rebuild_user_impact(user_ids or None)
+    db.session.commit()
+    click.echo(f"Rebuilt {written} impact buckets.")
+
+
+@click.command("refresh-co2")
+@with_appcontext
+def refresh_co2_command():
+    """Recompute stored per-product CO2 estimates that are out of date."""
+
+    updated = refresh_product_co2()
+    db.session.commit()
+    click.echo(f"Updated CO2 estimates for {updated} products (factors {factors_version()}).")
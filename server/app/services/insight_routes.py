@@ -1,12 +1,16 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
-from .ai_service import generate_user_insights
+from .. import cache
+from ..utils.query_budget import query_budget
+from ..utils.sustainability import factors_version
+from .ai_service import generate_user_insights, get_summary_job, summary_pending
 
 insight_bp = Blueprint('insights', __name__)
 
 
 @insight_bp.post('/')
+@query_budget(3)
 @jwt_required()
 def analyze():
     """Generate sustainability insights for the authenticated user."""
@@ -18,5 +22,25 @@ def analyze():
     except (TypeError, ValueError):
         return jsonify({'error': 'Invalid user identity'}), 400
 
-    insights = generate_user_insights(user_id=user_id, timeframe_days=timeframe_days)
+    insights = cache.get_or_set(
+        f"insights:{user_id}:{timeframe_days}:{factors_version()}",
+        lambda: generate_user_insights(user_id=user_id, timeframe_days=timeframe_days),
+        scopes=(f"user:{user_id}", "catalog"),
+        cache_if=lambda insights: not summary_pending(insights),
+    )
     return jsonify({'insights': insights})
+
+
+@insight_bp.get('/summary/<job_id>')
+@jwt_required()
+def summary_status(job_id):
+    """Poll a background AI summary started by an insights request."""
+    try:
+        user_id = int(get_jwt_identity())
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid user identity'}), 400
+
+    job = get_summary_job(job_id, user_id)
+    if job is None:
+        return jsonify({'error': 'summary job not found'}), 404
+    return jsonify({'ai': job})
@@ -0,0 +1,277 @@
+"""Shared HTTP client for OpenAI chat completion calls.
+
+Both the chat assistant and the insight summaries go through one
+``LLMClient`` so they share a pooled keep-alive session, a concurrency
+limit, retry with jittered exponential backoff on 429/5xx, a latency
+histogram and a circuit breaker. While the breaker is open (or every
+concurrency slot stays busy) calls fail fast with ``LLMUnavailableError``;
+calls that still fail after their retries re-raise the ``requests`` error.
+Callers treat either as "upstream unavailable" and use their fallbacks.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from typing import Any, Optional
+
+import requests
+from flask import current_app, has_app_context
+from requests.adapters import HTTPAdapter
+
+from ..utils.metrics import LatencyHistogram
+from ..utils.profiling import record_span
+
+_logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class LLMUnavailableError(RuntimeError):
+    """Upstream is failing, saturated, or short-circuited by the breaker."""
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures.
+
+    While open every call is rejected; after ``reset_timeout`` seconds one
+    trial call is let through (half-open) and its outcome closes or re-opens
+    the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class LLMClient:
+    def __init__(
+        self,
+        pool_size: int = 10,
+        max_concurrency: int = 8,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        acquire_timeout: float = 5.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.acquire_timeout = acquire_timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = LatencyHistogram(LATENCY_BUCKETS)
+        self.time_to_first_token = LatencyHistogram(LATENCY_BUCKETS)
+        self._counter_lock = threading.Lock()
+        self.counters = {"calls": 0, "retries": 0, "failures": 0, "short_circuited": 0, "rejected": 0}
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._counter_lock:
+            self.counters[name] += amount
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # "full jitter": uniform over [0, base * 2^attempt]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def chat_completion(self, url: str, api_key: str, body: dict, timeout: float = 30) -> dict:
+        """POST ``body`` to ``url`` and return the decoded JSON response."""
+
+        response = self._post(url, api_key, body, timeout)
+        try:
+            return response.json()
+        finally:
+            response.close()
+
+    def stream_chat_completion(self, url: str, api_key: str, body: dict, timeout: float = 30):
+        """POST a ``stream: true`` request and yield content deltas as they arrive.
+
+        Retries and the breaker apply until the response headers arrive; the
+        concurrency slot is held until the stream is exhausted or closed.
+        """
+
+        started = time.perf_counter()
+        response = self._post(url, api_key, dict(body, stream=True), timeout, stream=True)
+        first = True
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                delta = (json.loads(data).get("choices") or [{}])[0].get("delta") or {}
+                content = delta.get("content")
+                if content:
+                    if first:
+                        self.time_to_first_token.observe(time.perf_counter() - started)
+                        first = False
+                    yield content
+        finally:
+            response.close()
+            self._slots.release()
+
+    def _post(self, url: str, api_key: str, body: dict, timeout: float, stream: bool = False):
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            self._count("rejected")
+            raise LLMUnavailableError("too many concurrent LLM calls")
+
+        if not self.breaker.allow():
+            self._slots.release()
+            self._count("short_circuited")
+            raise LLMUnavailableError("LLM circuit breaker is open")
+
+        self._count("calls")
+        started = time.perf_counter()
+        succeeded = False
+        try:
+            attempt = 0
+            while True:
+                sent = time.perf_counter()
+                try:
+                    response = self.session.post(
+                        url,
+                        headers={
+                            "Authorization": f"Bearer {api_key}",
+                            "Content-Type": "application/json",
+                        },
+                        json=body,
+                        timeout=timeout,
+                        stream=stream,
+                    )
+                except (requests.ConnectionError, requests.Timeout) as exc:
+                    record_span("http", f"POST {url} ({type(exc).__name__})", sent, time.perf_counter() - sent)
+                    retry_after, error = None, exc
+                else:
+                    record_span("http", f"POST {url} {response.status_code}", sent, time.perf_counter() - sent)
+                    if response.status_code not in RETRY_STATUSES:
+                        break
+                    retry_after = response.headers.get("Retry-After")
+                    error = requests.HTTPError(f"{response.status_code} from LLM upstream", response=response)
+                    response.close()
+
+                if attempt >= self.max_retries:
+                    raise error
+                delay = self._backoff(attempt, retry_after)
+                _logger.warning("LLM call failed (%s); retrying in %.2fs", error, delay)
+                self._count("retries")
+                time.sleep(delay)
+                attempt += 1
+
+            response.raise_for_status()
+            succeeded = True
+        except requests.HTTPError as exc:
+            self._count("failures")
+            status = exc.response.status_code if exc.response is not None else None
+            if status is not None and 400 <= status < 500 and status != 429:
+                # upstream answered; a rejected request says nothing about its health
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            raise
+        except Exception:
+            self._count("failures")
+            self.breaker.record_failure()
+            raise
+        finally:
+            self.latency.observe(time.perf_counter() - started)
+            # a successful stream keeps its slot until the body is consumed
+            if not (succeeded and stream):
+                self._slots.release()
+
+        self.breaker.record_success()
+        return response
+
+    def stats(self) -> dict:
+        with self._counter_lock:
+            counters = dict(self.counters)
+        return {
+            **counters,
+            "circuit": self.breaker.state,
+            "latency_seconds": self.latency.snapshot(),
+            "time_to_first_token_seconds": self.time_to_first_token.snapshot(),
+        }
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Process-wide client, configured from the app config on first use."""
+
+    global _client
+    with _client_lock:
+        if _client is None:
+            config: Any = current_app.config if has_app_context() else {}
+            _client = LLMClient(
+                pool_size=config.get("LLM_POOL_SIZE", 10),
+                max_concurrency=config.get("LLM_MAX_CONCURRENCY", 8),
+                max_retries=config.get("LLM_MAX_RETRIES", 2),
+                backoff_base=config.get("LLM_BACKOFF_BASE", 0.5),
+                failure_threshold=config.get("LLM_CIRCUIT_FAILURES", 5),
+                reset_timeout=config.get("LLM_CIRCUIT_RESET_SECONDS", 30.0),
+            )
+        return _client
+
+
+def reset_llm_client(client: Optional[LLMClient] = None) -> None:
+    """Replace (or drop) the shared client, e.g. after changing settings."""
+
+    global _client
+    with _client_lock:
+        _client = client
@@ -0,0 +1,266 @@
+"""Password hashing off the request threads.
+
+bcrypt is deliberately slow (~250 ms at cost 12), so hashes are computed
+in a small process pool instead of on the worker serving the request. At
+most ``PASSWORD_HASH_WORKERS * PASSWORD_HASH_QUEUE_DEPTH`` jobs are in
+flight per web worker; beyond that callers wait up to
+``PASSWORD_HASH_WAIT_SECONDS`` and then get ``PasswordHasherBusyError``,
+which ``create_app`` turns into a 503 instead of letting a login burst
+queue up behind every other route. ``PASSWORD_HASH_WORKERS = 0`` hashes
+inline (tests, scripts).
+
+Pool processes are forked, not spawned: a spawned helper re-imports the
+entry script (``app.py`` builds the app at import time). Forking a process
+that already runs request threads can copy a lock some thread holds, so
+:meth:`PasswordHasher.start` forks the whole pool up front; gunicorn calls
+it from ``post_worker_init``, before the worker starts its threads.
+
+The cost is ``BCRYPT_LOG_ROUNDS``. Hashes made at another cost keep
+verifying; :func:`upgrade_hash` lets the login route re-hash them with the
+password it just checked, so a cost change rolls out as users sign in.
+Hashes are compatible with those Flask-Bcrypt produced before.
+"""
+import hashlib
+import hmac
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, List, Optional
+
+import bcrypt
+from flask import current_app, has_app_context
+
+# bcrypt only reads the first 72 bytes; bcrypt>=5 raises instead of
+# truncating, so truncate explicitly to keep verifying existing hashes
+_BCRYPT_MAX_BYTES = 72
+
+_DEFAULT_ROUNDS = 12
+
+
+class PasswordHasherBusyError(RuntimeError):
+    """Every hashing slot stayed busy for ``PASSWORD_HASH_WAIT_SECONDS``."""
+
+
+def _prepare(password: str, handle_long: bool) -> bytes:
+    raw = password.encode("utf-8")
+    if handle_long:
+        # Flask-Bcrypt's BCRYPT_HANDLE_LONG_PASSWORDS scheme
+        return hashlib.sha256(raw).hexdigest().encode("ascii")
+    return raw[:_BCRYPT_MAX_BYTES]
+
+
+def _hash(password: str, rounds: int, prefix: bytes, handle_long: bool) -> str:
+    salt = bcrypt.gensalt(rounds=rounds, prefix=prefix)
+    return bcrypt.hashpw(_prepare(password, handle_long), salt).decode("utf-8")
+
+
+def _check(stored_hash: str, password: str, handle_long: bool) -> bool:
+    expected = stored_hash.encode("utf-8")
+    try:
+        candidate = bcrypt.hashpw(_prepare(password, handle_long), expected)
+    except ValueError:  # not a bcrypt hash
+        return False
+    return hmac.compare_digest(candidate, expected)
+
+
+def _setting(name: str, default):
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+def hash_cost(stored_hash: str) -> Optional[int]:
+    """The work factor encoded in a ``$2b$12$...`` hash, if it parses."""
+
+    parts = stored_hash.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = 2, queue_depth: int = 4, wait_seconds: float = 2.0):
+        self.workers = workers
+        self.wait_seconds = wait_seconds
+        self._slots = threading.BoundedSemaphore(max(1, workers * queue_depth))
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._counter_lock = threading.Lock()
+        self.counters = {"hashed": 0, "verified": 0, "rehashed": 0, "rejected": 0, "seconds": 0.0}
+
+    def _count(self, name: str, amount=1) -> None:
+        with self._counter_lock:
+            self.counters[name] += amount
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # fork starts every pool process on the first submit
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("fork")
+                )
+            return self._executor
+
+    def start(self) -> None:
+        """Fork the pool processes now rather than on the first hash."""
+
+        if self.workers > 0:
+            self._get_executor().submit(int).result()
+
+    def _acquire(self) -> None:
+        if not self._slots.acquire(timeout=self.wait_seconds):
+            self._count("rejected")
+            raise PasswordHasherBusyError("password hashing is saturated")
+
+    def _release(self, future=None) -> None:
+        self._slots.release()
+
+    def _run(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)
+        self._acquire()
+        started = time.perf_counter()
+        try:
+            return self._get_executor().submit(func, *args).result()
+        except BrokenProcessPool:
+            # a pool process died; replace the pool and do this one inline
+            self.shutdown()
+            return func(*args)
+        finally:
+            self._release()
+            self._count("seconds", time.perf_counter() - started)
+
+    def hash(self, password: str, rounds: int, prefix: bytes = b"2b", handle_long: bool = False) -> str:
+        self._count("hashed")
+        return self._run(_hash, password, rounds, prefix, handle_long)
+
+    def rehash(self, password: str, rounds: int, prefix: bytes = b"2b", handle_long: bool = False) -> str:
+        """:meth:`hash`, counted separately: a cost migration on login."""
+
+        self._count("rehashed")
+        return self._run(_hash, password, rounds, prefix, handle_long)
+
+    def check(self, stored_hash: str, password: str, handle_long: bool = False) -> bool:
+        self._count("verified")
+        return self._run(_check, stored_hash, password, handle_long)
+
+    def hash_many(self, passwords: Iterable[str], rounds: int, prefix: bytes = b"2b", handle_long: bool = False) -> List[str]:
+        """Hash several passwords in parallel (bulk seeding, imports).
+
+        Each password takes a slot like a single :meth:`hash`, so a bulk job
+        waits for (and can be refused by) the same limit.
+        """
+
+        passwords = list(passwords)
+        self._count("hashed", len(passwords))
+        if self.workers <= 0:
+            return [_hash(password, rounds, prefix, handle_long) for password in passwords]
+
+        started = time.perf_counter()
+        futures = []
+        try:
+            for password in passwords:
+                self._acquire()
+                try:
+                    future = self._get_executor().submit(_hash, password, rounds, prefix, handle_long)
+                except BaseException:
+                    self._release()
+                    raise
+                future.add_done_callback(self._release)
+                futures.append(future)
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            self.shutdown()
+            return [_hash(password, rounds, prefix, handle_long) for password in passwords]
+        finally:
+            for future in futures:
+                future.cancel()
+            self._count("seconds", time.perf_counter() - started)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._counter_lock:
+            counters = dict(self.counters)
+        counters["seconds"] = round(counters["seconds"], 3)
+        return {**counters, "workers": self.workers}
+
+
+_hasher: Optional[PasswordHasher] = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Process-wide hasher, configured from the app config on first use."""
+
+    global _hasher
+    with _hasher_lock:
+        if _hasher is None:
+            _hasher = PasswordHasher(
+                workers=_setting("PASSWORD_HASH_WORKERS", 2),
+                queue_depth=_setting("PASSWORD_HASH_QUEUE_DEPTH", 4),
+                wait_seconds=_setting("PASSWORD_HASH_WAIT_SECONDS", 2.0),
+            )
+        return _hasher
+
+
+def reset_password_hasher(hasher: Optional[PasswordHasher] = None) -> None:
+    """Replace (or drop) the shared hasher, e.g. after changing settings."""
+
+    global _hasher
+    with _hasher_lock:
+        previous, _hasher = _hasher, hasher
+    if previous is not None and previous is not hasher:
+        previous.shutdown()
+
+
+def _hash_options() -> dict:
+    return {
+        "prefix": str(_setting("BCRYPT_HASH_PREFIX", "2b")).encode("ascii"),
+        "handle_long": bool(_setting("BCRYPT_HANDLE_LONG_PASSWORDS", False)),
+    }
+
+
+def hash_password(password: str) -> str:
+    """bcrypt hash of ``password`` at the configured cost."""
+
+    if not password:
+        raise ValueError("Password must be non-empty.")
+    rounds = _setting("BCRYPT_LOG_ROUNDS", _DEFAULT_ROUNDS)
+    return get_password_hasher().hash(password, rounds, **_hash_options())
+
+
+def hash_passwords(passwords: Iterable[str]) -> List[str]:
+    """:func:`hash_password` for many passwords, spread across the pool."""
+
+    rounds = _setting("BCRYPT_LOG_ROUNDS", _DEFAULT_ROUNDS)
+    return get_password_hasher().hash_many(passwords, rounds, **_hash_options())
+
+
+def verify_password(stored_hash: str, password: str) -> bool:
+    handle_long = bool(_setting("BCRYPT_HANDLE_LONG_PASSWORDS", False))
+    return get_password_hasher().check(stored_hash, password, handle_long)
+
+
+def needs_rehash(stored_hash: str) -> bool:
+    """True when ``stored_hash`` was made at a cost other than the configured one."""
+
+    return hash_cost(stored_hash) != _setting("BCRYPT_LOG_ROUNDS", _DEFAULT_ROUNDS)
+
+
+def upgrade_hash(stored_hash: str, password: str) -> Optional[str]:
+    """A new hash at the configured cost for a just-verified ``password``.
+
+    Returns ``None`` when ``stored_hash`` is already current.
+    """
+
+    if not needs_rehash(stored_hash):
+        return None
+    rounds = _setting("BCRYPT_LOG_ROUNDS", _DEFAULT_ROUNDS)
+    return get_password_hasher().rehash(password, rounds, **_hash_options())
@@ -0,0 +1,177 @@
+"""Ranked full-text search over product listings.
+
+SQLite keeps an FTS5 table (``products_fts``, rowid = product id) that the
+product routes update alongside each write via ``index_product`` /
+``remove_product``. Postgres uses a GIN index on a weighted ``tsvector``
+expression, which the database maintains itself, so the sync helpers are
+no-ops there. Other backends fall back to a substring scan.
+
+Title matches weigh most, then category, location and description.
+"""
+import re
+from typing import List, Tuple
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import DDL, event, func, literal_column, or_, text
+
+from .. import db
+from ..models import Product
+
+FTS_TABLE = "products_fts"
+
+# bm25() column weights, in FTS column order
+_BM25_WEIGHTS = (10.0, 1.0, 4.0, 2.0)
+
+SQLITE_FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+    "USING fts5(title, description, category, location, tokenize='porter unicode61')"
+)
+POSTGRES_TSVECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(category, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(location, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'D')"
+)
+POSTGRES_INDEX_DDL = (
+    f"CREATE INDEX IF NOT EXISTS ix_products_search ON products USING gin (({POSTGRES_TSVECTOR}))"
+)
+
+SEARCH_FIELDS = ("title", "description", "category", "location")
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Keep ``db.create_all()`` (tests, dev bootstrap) in step with the migration
+event.listen(Product.__table__, "after_create", DDL(SQLITE_FTS_DDL).execute_if(dialect="sqlite"))
+event.listen(Product.__table__, "after_create", DDL(POSTGRES_INDEX_DDL).execute_if(dialect="postgresql"))
+event.listen(
+    Product.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite"),
+)
+
+
+def _dialect() -> str:
+    return db.session.get_bind().dialect.name
+
+
+def _fts_query(terms: List[str]) -> str:
+    # Quote every term so FTS syntax in user input is inert; the last one
+    # is a prefix match so results follow the user as they type.
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def index_product(product: Product) -> None:
+    """Write ``product``'s searchable fields to the index (caller commits)."""
+
+    if _dialect() != "sqlite":
+        return
+    remove_product(product.id)
+    db.session.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description, category, location) "
+            "VALUES (:id, :title, :description, :category, :location)"
+        ),
+        {
+            "id": product.id,
+            "title": product.title or "",
+            "description": product.description or "",
+            "category": product.category or "",
+            "location": product.location or "",
+        },
+    )
+
+
+def remove_product(product_id: int) -> None:
+    if _dialect() != "sqlite":
+        return
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": product_id})
+
+
+def rebuild_search_index() -> int:
+    """Repopulate the FTS table from ``products``; returns rows indexed."""
+
+    if _dialect() != "sqlite":
+        return 0
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    result = db.session.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description, category, location) "
+            "SELECT id, coalesce(title, ''), coalesce(description, ''), "
+            "coalesce(category, ''), coalesce(location, '') FROM products"
+        )
+    )
+    return result.rowcount or 0
+
+
+def ensure_search_index() -> None:
+    """Create the index if needed and backfill it when it has drifted from
+    ``products`` (dev bootstrap)."""
+
+    if _dialect() != "sqlite":
+        return
+    db.session.execute(text(SQLITE_FTS_DDL))
+    indexed = db.session.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar()
+    if indexed != Product.query.count():
+        rebuild_search_index()
+        db.session.commit()
+
+
+def search_product_ids(query: str, limit: int, offset: int = 0) -> Tuple[List[int], bool]:
+    """Return up to ``limit`` ids of products matching ``query``, best
+    first, and whether more results follow."""
+
+    terms = _TOKEN.findall(query.lower())
+    if not terms:
+        return [], False
+
+    dialect = _dialect()
+    if dialect == "sqlite":
+        weights = ", ".join(str(weight) for weight in _BM25_WEIGHTS)
+        rows = db.session.execute(
+            text(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+                f"ORDER BY bm25({FTS_TABLE}, {weights}), rowid LIMIT :limit OFFSET :offset"
+            ),
+            {"match": _fts_query(terms), "limit": limit + 1, "offset": offset},
+        ).all()
+        ids = [row_id for (row_id,) in rows]
+    elif dialect == "postgresql":
+        vector = literal_column(POSTGRES_TSVECTOR)
+        tsquery = func.to_tsquery("english", " & ".join(f"{term}:*" for term in terms))
+        ids = list(
+            db.session.scalars(
+                db.select(Product.id)
+                .where(vector.op("@@")(tsquery))
+                .order_by(func.ts_rank_cd(vector, tsquery).desc(), Product.id)
+                .limit(limit + 1)
+                .offset(offset)
+            )
+        )
+    else:
+        clauses = [
+            or_(*(getattr(Product, field).ilike(f"%{term}%") for field in SEARCH_FIELDS))
+            for term in terms
+        ]
+        ids = list(
+            db.session.scalars(
+                db.select(Product.id)
+                .where(*clauses)
+                .order_by(Product.created_at.desc(), Product.id.desc())
+                .limit(limit + 1)
+                .offset(offset)
+            )
+        )
+
+    return ids[:limit], len(ids) > limit
+
+
+@click.command("rebuild-search-index")
+@with_appcontext
+def rebuild_search_index_command():
+    """Backfill the product search index from the products table."""
+
+    indexed = rebuild_search_index()
+    db.session.commit()
+    click.echo(f"Indexed {indexed} products.")
@@ -0,0 +1,171 @@
+"""Persistent memoization of AI insight summaries.
+
+Summaries are stored in ``ai_summary_cache`` under the SHA-256 of the model
+name and prompt payload (see ``ai_service._summary_key``). Entries expire
+after ``AI_SUMMARY_CACHE_TTL_HOURS`` and the table is trimmed to
+``AI_SUMMARY_CACHE_MAX_ENTRIES`` rows, least recently used first.
+"""
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Tuple
+
+from flask import current_app, g, has_app_context, has_request_context
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from .. import db
+from ..models import AISummaryCache
+
+_DEFAULT_TTL_HOURS = 24 * 7
+_DEFAULT_MAX_ENTRIES = 5000
+
+_logger = logging.getLogger(__name__)
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "tokens_saved": 0}
+
+
+def _setting(name: str, default):
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+def record_hit(tokens: int) -> None:
+    with _stats_lock:
+        _stats["hits"] += 1
+        _stats["tokens_saved"] += int(tokens or 0)
+
+
+def record_miss() -> None:
+    with _stats_lock:
+        _stats["misses"] += 1
+
+
+def lookup(key: str) -> Optional[Tuple[dict, int]]:
+    """Return ``(summary, tokens)`` for a fresh entry, bumping its usage.
+
+    Reads through the caller's session without committing it (a commit
+    would expire every object the request has loaded); the usage bump is
+    written on a connection of its own.
+    """
+
+    table = AISummaryCache.__table__
+    row = db.session.execute(
+        select(table.c.summary, table.c.tokens, table.c.created_at).where(table.c.key == key)
+    ).first()
+    if row is None:
+        return None
+
+    ttl = timedelta(hours=_setting("AI_SUMMARY_CACHE_TTL_HOURS", _DEFAULT_TTL_HOURS))
+    now = datetime.utcnow()
+    if row.created_at < now - ttl:
+        return None
+
+    _write(lambda connection: connection.execute(
+        update(table).where(table.c.key == key).values(hits=table.c.hits + 1, last_used_at=now)
+    ))
+    return json.loads(row.summary), row.tokens
+
+
+def store(key: str, model: str, summary: dict, tokens: int) -> None:
+    """Insert or refresh a summary, then evict expired and overflow rows."""
+
+    now = datetime.utcnow()
+    values = {
+        "model": model,
+        "summary": json.dumps(summary, ensure_ascii=False),
+        "tokens": int(tokens or 0),
+        "created_at": now,
+        "last_used_at": now,
+    }
+
+    def upsert(connection):
+        table = AISummaryCache.__table__
+        updated = connection.execute(update(table).where(table.c.key == key).values(**values))
+        if not updated.rowcount:
+            connection.execute(insert(table).values(key=key, hits=0, **values))
+        _evict(connection, now)
+
+    _write(upsert)
+
+
+def _write(work: Callable) -> None:
+    """Run ``work(connection)`` in its own transaction, outside the caller's session.
+
+    During a request the write waits for :func:`flush_pending_writes` at
+    teardown, so it neither delays the response nor counts against the
+    view's SQL budget.
+    """
+
+    if has_request_context():
+        g.setdefault("summary_cache_writes", []).append(work)
+    else:
+        _run_write(work)
+
+
+def _run_write(work: Callable) -> None:
+    # best effort: a failed write (e.g. a locked SQLite file) only costs a later miss
+    try:
+        with db.engine.begin() as connection:
+            work(connection)
+    except SQLAlchemyError:
+        _logger.warning("Could not update the AI summary cache", exc_info=True)
+
+
+def flush_pending_writes(exc=None) -> None:
+    for work in g.pop("summary_cache_writes", ()):
+        _run_write(work)
+
+
+def init_summary_cache(app) -> None:
+    app.teardown_request(flush_pending_writes)
+
+
+def _evict(connection, now: datetime) -> None:
+    table = AISummaryCache.__table__
+    ttl = timedelta(hours=_setting("AI_SUMMARY_CACHE_TTL_HOURS", _DEFAULT_TTL_HOURS))
+    connection.execute(delete(table).where(table.c.created_at < now - ttl))
+
+    max_entries = _setting("AI_SUMMARY_CACHE_MAX_ENTRIES", _DEFAULT_MAX_ENTRIES)
+    overflow = connection.scalar(select(func.count()).select_from(table)) - max_entries
+    if overflow > 0:
+        stale_keys = connection.scalars(
+            select(table.c.key).order_by(table.c.last_used_at.asc()).limit(overflow)
+        ).all()
+        connection.execute(delete(table).where(table.c.key.in_(stale_keys)))
+
+
+def counters() -> dict:
+    """Hits, misses and tokens saved by this process."""
+
+    with _stats_lock:
+        return dict(_stats)
+
+
+def stats() -> dict:
+    """Process-local hit counters plus persistent totals from the table."""
+
+    current = counters()
+    lookups = current["hits"] + current["misses"]
+    current["hit_rate"] = round(current["hits"] / lookups, 4) if lookups else 0.0
+
+    entries, total_hits, tokens_saved = db.session.query(
+        func.count(AISummaryCache.key),
+        func.coalesce(func.sum(AISummaryCache.hits), 0),
+        func.coalesce(func.sum(AISummaryCache.hits * AISummaryCache.tokens), 0),
+    ).one()
+    current["stored"] = {
+        "entries": entries,
+        "hits": int(total_hits),
+        "tokens_saved": int(tokens_saved),
+    }
+    return current
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
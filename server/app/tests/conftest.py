@@ -0,0 +1,168 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from config import TestingConfig
+from app import create_app, db, bcrypt
+from app.models import User
+from app.services import chat_history
+
+
+@pytest.fixture()
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        for future in list(chat_history._condensing.values()):
+            future.result(timeout=5)  # background chat condensation
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture()
+def make_user(app):
+    def _make_user(email="buyer@example.com", role="buyer", name=None, password="password123"):
+        user = User(
+            email=email,
+            name=name,
+            role=role,
+            password_hash=bcrypt.generate_password_hash(password).decode("utf-8"),
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user
+
+    return _make_user
+
+
+@pytest.fixture()
+def auth_headers(app):
+    def _auth_headers(user):
+        token = create_access_token(identity=str(user.id))
+        return {"Authorization": f"Bearer {token}"}
+
+    return _auth_headers
+
+
+@pytest.fixture()
+def count_queries(app):
+    """Context manager collecting every SQL statement issued inside it."""
+
+    @contextmanager
+    def _count_queries():
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _record)
+
+    return _count_queries
+
+
+class OpenAIStub:
+    """Local HTTP server answering like the chat completions endpoint."""
+
+    def __init__(self):
+        self.requests = []
+        self.content = '{"environmentalImpact": "Nice work.", "recommendedActions": ["a", "b", "c"]}'
+        self.delay = 0.0
+        self.status = 200
+        self.statuses = []  # per-request overrides, consumed in order
+        self.stream_chunks = ["Reuse ", "is ", "great."]
+        self.chunk_delay = 0.0
+        self.peers = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                stub.requests.append(payload)
+                stub.peers.append(self.client_address)
+                with stub._lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                if stub.delay:
+                    time.sleep(stub.delay)
+                with stub._lock:
+                    stub.in_flight -= 1
+                status = stub.statuses.pop(0) if stub.statuses else stub.status
+                if payload.get("stream") and status == 200:
+                    return self._stream()
+                body = json.dumps({
+                    "choices": [{"message": {"role": "assistant", "content": stub.content}}],
+                    "usage": {"prompt_tokens": 50, "completion_tokens": 20, "total_tokens": 70},
+                }).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for chunk in stub.stream_chunks:
+                    if stub.chunk_delay:
+                        time.sleep(stub.chunk_delay)
+                    event = {"choices": [{"delta": {"content": chunk}}]}
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/chat/completions"
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture()
+def openai_stub(monkeypatch):
+    from app.services import ai_service, chat_service, summary_cache
+    from app.services.llm_client import reset_llm_client
+
+    stub = OpenAIStub()
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(ai_service, "OPENAI_URL", stub.url)
+    monkeypatch.setattr(chat_service, "OPENAI_URL", stub.url)
+    with ai_service._summary_lock:
+        ai_service._summary_jobs.clear()
+    summary_cache.reset_stats()
+    reset_llm_client()
+    yield stub
+    stub.close()
+    reset_llm_client()
@@ -0,0 +1,222 @@
+import time
+
+from app import db
+from app.models import AISummaryCache, Order, Product
+from app.services.impact_service import record_orders
+
+
+def _buyer_with_orders(make_user):
+    seller = make_user(email="vendor@example.com", role="vendor")
+    buyer = make_user(email="buyer@example.com")
+    product = Product(title="Chair", price=100.0, condition="Used", category="Furniture", owner_id=seller.id)
+    db.session.add(product)
+    db.session.flush()
+    order = Order(buyer_id=buyer.id, product=product, price=100.0)
+    db.session.add(order)
+    record_orders([order])
+    db.session.commit()
+    return buyer
+
+
+def _poll(client, headers, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        ai = client.get(f"/api/insights/summary/{job_id}", headers=headers).get_json()["ai"]
+        if ai["status"] != "pending":
+            return ai
+        time.sleep(0.02)
+    raise AssertionError("summary job did not finish")
+
+
+def test_insights_return_before_slow_summary_finishes(client, make_user, auth_headers, openai_stub):
+    openai_stub.delay = 0.5
+    headers = auth_headers(_buyer_with_orders(make_user))
+
+    started = time.monotonic()
+    body = client.post("/api/insights/", json={}, headers=headers).get_json()
+    elapsed = time.monotonic() - started
+
+    assert elapsed < openai_stub.delay
+    assert body["insights"]["metrics"]["orders_analyzed"] == 1
+    ai = body["insights"]["ai"]
+    assert ai["status"] == "pending"
+    assert ai["environmental_impact"] is None
+
+    ready = _poll(client, headers, ai["job_id"])
+    assert ready["status"] == "ready"
+    assert ready["environmental_impact"] == "Nice work."
+    assert ready["recommended_actions"] == ["a", "b", "c"]
+
+
+def test_identical_payload_reuses_finished_summary(app, make_user, openai_stub):
+    from app.services.ai_service import generate_user_insights
+
+    buyer = _buyer_with_orders(make_user)
+    first = generate_user_insights(buyer.id)["ai"]
+    deadline = time.monotonic() + 5
+    while generate_user_insights(buyer.id)["ai"]["status"] == "pending":
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+
+    again = generate_user_insights(buyer.id)["ai"]
+    assert again["status"] == "ready"
+    assert again["job_id"] == first["job_id"]
+    assert len(openai_stub.requests) == 1
+
+
+def test_failed_upstream_marks_job_failed(client, make_user, auth_headers, openai_stub):
+    openai_stub.status = 500
+    headers = auth_headers(_buyer_with_orders(make_user))
+
+    ai = client.post("/api/insights/", json={}, headers=headers).get_json()["insights"]["ai"]
+    failed = _poll(client, headers, ai["job_id"])
+    assert failed["status"] == "failed"
+    assert failed["recommended_actions"] == []
+
+
+def test_unknown_summary_job_is_404(client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    assert client.get("/api/insights/summary/nope", headers=headers).status_code == 404
+
+
+def test_summary_job_is_only_visible_to_its_owner(client, make_user, auth_headers, openai_stub):
+    headers = auth_headers(_buyer_with_orders(make_user))
+    job_id = client.post("/api/insights/", json={}, headers=headers).get_json()["insights"]["ai"]["job_id"]
+    assert _poll(client, headers, job_id)["status"] == "ready"
+
+    stranger = auth_headers(make_user(email="stranger@example.com"))
+    assert client.get(f"/api/insights/summary/{job_id}", headers=stranger).status_code == 404
+    bare = job_id.split(".", 1)[0]
+    assert client.get(f"/api/insights/summary/{bare}", headers=stranger).status_code == 404
+
+
+def test_pending_summaries_are_not_cached(client, make_user, auth_headers, openai_stub):
+    headers = auth_headers(_buyer_with_orders(make_user))
+    ai = client.post("/api/insights/", json={}, headers=headers).get_json()["insights"]["ai"]
+    assert ai["status"] == "pending"
+    assert client.get("/api/products/stats", headers=headers).get_json()["insights"]["ai"]["status"] == "pending"
+    _poll(client, headers, ai["job_id"])
+
+    again = client.post("/api/insights/", json={}, headers=headers).get_json()["insights"]["ai"]
+    assert again["status"] == "ready"
+    assert again["environmental_impact"] == "Nice work."
+    # /stats summarises a 180-day window, a separate job
+    stats = client.get("/api/products/stats", headers=headers).get_json()["insights"]["ai"]
+    _poll(client, headers, stats["job_id"])
+    assert client.get("/api/products/stats", headers=headers).get_json()["insights"]["ai"]["status"] == "ready"
+
+
+def test_summary_is_served_from_persistent_cache_after_restart(app, make_user, openai_stub):
+    from app.services import ai_service, summary_cache
+    from app.services.ai_service import generate_user_insights
+
+    app.config["AI_SUMMARY_ASYNC"] = False
+    buyer = _buyer_with_orders(make_user)
+
+    first = generate_user_insights(buyer.id)["ai"]
+    assert first["environmental_impact"] == "Nice work."
+    # simulate a fresh worker process: nothing in memory, only the table
+    with ai_service._summary_lock:
+        ai_service._summary_jobs.clear()
+
+    for _ in range(3):
+        again = generate_user_insights(buyer.id)["ai"]
+        assert again["status"] == "ready"
+        assert again["environmental_impact"] == "Nice work."
+
+    assert len(openai_stub.requests) == 1
+    stats = summary_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (3, 1)
+    assert stats["tokens_saved"] == 3 * 70
+    # only the first hit after the restart touched the table
+    assert stats["stored"] == {"entries": 1, "hits": 1, "tokens_saved": 70}
+
+
+def test_poll_falls_back_to_persistent_cache(client, make_user, auth_headers, openai_stub):
+    from app.services import ai_service
+
+    headers = auth_headers(_buyer_with_orders(make_user))
+    job_id = client.post("/api/insights/", json={}, headers=headers).get_json()["insights"]["ai"]["job_id"]
+    assert _poll(client, headers, job_id)["status"] == "ready"
+
+    with ai_service._summary_lock:
+        ai_service._summary_jobs.clear()
+    ai = client.get(f"/api/insights/summary/{job_id}", headers=headers).get_json()["ai"]
+    assert ai["status"] == "ready"
+    assert ai["environmental_impact"] == "Nice work."
+
+
+def test_summary_cache_evicts_expired_and_least_recently_used(app):
+    from datetime import datetime, timedelta
+
+    from app.models import AISummaryCache
+    from app.services import summary_cache
+
+    app.config["AI_SUMMARY_CACHE_MAX_ENTRIES"] = 2
+    app.config["AI_SUMMARY_CACHE_TTL_HOURS"] = 1
+
+    summary_cache.store("old", "m", {"x": 0}, 10)
+    AISummaryCache.query.filter_by(key="old").update(
+        {"created_at": datetime.utcnow() - timedelta(hours=2)}
+    )
+    db.session.commit()
+    assert summary_cache.lookup("old") is None
+
+    summary_cache.store("a", "m", {"x": 1}, 10)
+    summary_cache.store("b", "m", {"x": 2}, 10)
+    assert summary_cache.lookup("a") == ({"x": 1}, 10)  # a is now most recent
+    summary_cache.store("c", "m", {"x": 3}, 10)
+
+    assert sorted(key for (key,) in db.session.query(AISummaryCache.key)) == ["a", "c"]
+
+
+def _buyer_with_many_orders(make_user, count=6):
+    seller = make_user(email="vendor@example.com", role="vendor")
+    buyer = make_user(email="buyer@example.com")
+    orders = []
+    for index in range(count):
+        product = Product(title=f"Chair {index}", price=10.0, condition="Used", category="Furniture", owner_id=seller.id)
+        orders.append(Order(buyer_id=buyer.id, product=product, price=10.0))
+    db.session.add_all(orders)
+    db.session.flush()
+    record_orders(orders)
+    db.session.commit()
+    return buyer
+
+
+def test_cold_dashboard_with_ai_summary_fits_its_budget(client, make_user, auth_headers, count_queries, openai_stub):
+    headers = auth_headers(_buyer_with_many_orders(make_user))
+
+    # TestingConfig raises QueryBudgetExceeded on overrun
+    with count_queries() as statements:
+        response = client.get("/api/products/stats", headers=headers)
+    assert response.status_code == 200
+    assert len(statements) == 8  # 4 dashboard + 2 bucket totals + sample orders + summary cache
+    assert _poll(client, headers, response.get_json()["insights"]["ai"]["job_id"])["status"] == "ready"
+
+
+def test_summary_cache_does_not_expire_the_dashboard_orders(client, app, make_user, auth_headers, count_queries, openai_stub):
+    from app import cache
+    from app.services import ai_service
+
+    app.config["AI_SUMMARY_ASYNC"] = False
+    buyer = _buyer_with_many_orders(make_user)
+    headers = auth_headers(buyer)
+
+    # a miss that stores the summary, then a hit read back from the table
+    for _ in range(2):
+        with ai_service._summary_lock:
+            ai_service._summary_jobs.clear()
+        cache.invalidate(f"user:{buyer.id}")
+        with count_queries() as statements:
+            response = client.get("/api/products/stats", headers=headers)
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body["insights"]["ai"]["environmental_impact"] == "Nice work."
+        assert {order["product"]["title"] for order in body["recent_orders"]} == {f"Chair {i}" for i in range(6)}
+        # no per-order reloads; the cache writes happen after the response
+        assert not [s for s in statements if "WHERE orders.id = ?" in s]
+
+    assert len(openai_stub.requests) == 1
+    stored = db.session.execute(db.select(AISummaryCache.hits)).scalars().all()
+    assert stored == [1]
@@ -0,0 +1,94 @@
+import pytest
+
+from app import bcrypt, db
+from app.models import User
+from app.services.password_service import PasswordHasher, hash_cost, reset_password_hasher
+
+
+def _login(client, password="password123"):
+    return client.post("/api/auth/login", json={"email": "buyer@example.com", "password": password})
+
+
+def test_login_rehashes_when_cost_changes(app, client, make_user):
+    user = make_user()
+    original = user.password_hash
+    assert hash_cost(original) == 4
+
+    app.config["BCRYPT_LOG_ROUNDS"] = 5
+    assert _login(client, "wrong").status_code == 401
+    assert db.session.get(User, user.id).password_hash == original
+
+    assert _login(client).status_code == 200
+    db.session.expire_all()
+    upgraded = db.session.get(User, user.id).password_hash
+    assert hash_cost(upgraded) == 5
+    assert bcrypt.check_password_hash(upgraded, "password123")
+
+    # already current: left alone
+    assert _login(client).status_code == 200
+    db.session.expire_all()
+    assert db.session.get(User, user.id).password_hash == upgraded
+
+
+def test_signup_hash_verifies_and_login_works(client):
+    response = client.post("/api/auth/signup", json={"email": "new@example.com", "password": "s3cret!"})
+    assert response.status_code == 201
+    stored = User.query.filter_by(email="new@example.com").one().password_hash
+    assert hash_cost(stored) == 4
+    assert client.post("/api/auth/login", json={"email": "new@example.com", "password": "s3cret!"}).status_code == 200
+
+
+def test_saturated_hasher_answers_503(client, make_user):
+    make_user()
+    hasher = PasswordHasher(workers=1, queue_depth=1, wait_seconds=0.01)
+    reset_password_hasher(hasher)
+    try:
+        hasher._slots.acquire()  # a hash already in flight
+        response = _login(client)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert hasher.stats()["rejected"] == 1
+    finally:
+        reset_password_hasher()
+
+
+def test_saturated_hasher_answers_503_on_product_routes(client):
+    # an anonymous listing creates the demo seller, which hashes a password
+    hasher = PasswordHasher(workers=1, queue_depth=1, wait_seconds=0.01)
+    reset_password_hasher(hasher)
+    try:
+        hasher._slots.acquire()
+        response = client.post("/api/products/", json={"title": "Chair"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert User.query.filter_by(email="demo@cirqlex.com").first() is None
+    finally:
+        reset_password_hasher()
+
+
+def test_process_pool_hashes_match_flask_bcrypt():
+    hasher = PasswordHasher(workers=1)
+    try:
+        stored = hasher.hash("password123", rounds=4)
+        assert bcrypt.check_password_hash(stored, "password123")
+        assert hasher.check(bcrypt.generate_password_hash("other", 4).decode(), "other")
+        assert not hasher.check(stored, "nope")
+        assert len(set(hasher.hash_many(["a", "b", "a"], rounds=4))) == 3
+    finally:
+        hasher.shutdown()
+
+
+def test_bulk_hashing_shares_the_slot_limit():
+    from app.services.password_service import PasswordHasherBusyError
+
+    hasher = PasswordHasher(workers=1, queue_depth=1, wait_seconds=0.01)
+    try:
+        hashes = hasher.hash_many(["a", "b", "c"], rounds=4)  # one slot, reused
+        assert all(bcrypt.check_password_hash(h, p) for h, p in zip(hashes, "abc"))
+
+        hasher._slots.acquire()  # a login hash in flight
+        with pytest.raises(PasswordHasherBusyError):
+            hasher.hash_many(["d"], rounds=4)
+        assert hasher.stats()["rejected"] == 1
+    finally:
+        hasher.shutdown()
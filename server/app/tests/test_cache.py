@@ -0,0 +1,127 @@
+import fnmatch
+import time
+
+from app import cache, db
+from app.models import Product
+from app.utils.cache import MemoryCacheBackend, RedisCacheBackend, ResultCache
+from config import TestingConfig
+
+
+class FakeRedis:
+    """In-memory stand-in implementing the subset of redis-py we use."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at < time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def set(self, key, value, ex=None):
+        expires_at = time.monotonic() + ex if ex else None
+        self.data[key] = (value.encode("utf-8") if isinstance(value, str) else value, expires_at)
+
+    def incr(self, key):
+        value = int(self.get(key) or 0) + 1
+        self.data[key] = (str(value).encode("utf-8"), None)
+        return value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def scan_iter(self, match="*"):
+        return [key for key in list(self.data) if fnmatch.fnmatch(key, match)]
+
+
+def test_memory_backend_evicts_least_recently_used():
+    result_cache = ResultCache()
+    result_cache.backend = MemoryCacheBackend(max_entries=2)
+    calls = []
+
+    def producer(name):
+        return lambda: calls.append(name) or name
+
+    result_cache.get_or_set("a", producer("a"))
+    result_cache.get_or_set("b", producer("b"))
+    result_cache.get_or_set("a", producer("a"))  # refresh a
+    result_cache.get_or_set("c", producer("c"))  # evicts b
+    result_cache.get_or_set("a", producer("a"))
+    result_cache.get_or_set("b", producer("b"))
+
+    assert calls == ["a", "b", "c", "b"]
+
+
+def test_entries_expire_after_ttl():
+    result_cache = ResultCache()
+    result_cache.get_or_set("k", lambda: 1, ttl=0.01)
+    time.sleep(0.02)
+    assert result_cache.get_or_set("k", lambda: 2) == 2
+
+
+def test_invalidating_a_scope_only_drops_its_entries():
+    for backend in (MemoryCacheBackend(), RedisCacheBackend(FakeRedis())):
+        result_cache = ResultCache()
+        result_cache.backend = backend
+
+        result_cache.get_or_set("one", lambda: {"v": 1}, scopes=("user:1",))
+        result_cache.get_or_set("two", lambda: {"v": 2}, scopes=("user:2",))
+        result_cache.invalidate("user:1")
+
+        assert result_cache.get_or_set("one", lambda: {"v": 10}, scopes=("user:1",)) == {"v": 10}
+        assert result_cache.get_or_set("two", lambda: {"v": 20}, scopes=("user:2",)) == {"v": 2}
+        stats = result_cache.stats()
+        assert (stats["hits"], stats["misses"], stats["invalidations"]) == (1, 3, 1)
+
+
+def test_stats_are_cached_until_an_order_invalidates_them(client, make_user, auth_headers):
+    seller = make_user(email="vendor@example.com", role="vendor")
+    buyer = make_user(email="buyer@example.com")
+    product = Product(title="Chair", price=100.0, condition="Used", owner_id=seller.id)
+    db.session.add(product)
+    db.session.commit()
+
+    seller_headers = auth_headers(seller)
+    assert client.get("/api/products/stats", headers=seller_headers).get_json()["sales"] == 0
+    client.get("/api/products/stats", headers=seller_headers)
+    assert cache.stats()["hits"] == 1
+
+    response = client.post(
+        "/api/products/orders",
+        json={"items": [{"product_id": product.id}]},
+        headers=auth_headers(buyer),
+    )
+    assert response.status_code == 201
+
+    assert client.get("/api/products/stats", headers=seller_headers).get_json()["sales"] == 1
+
+
+def test_product_update_invalidates_cached_insights(client, make_user, auth_headers):
+    seller = make_user(email="vendor@example.com", role="vendor")
+    buyer = make_user(email="buyer@example.com")
+    product = Product(title="Chair", price=100.0, condition="New", category="Furniture", owner_id=seller.id)
+    db.session.add(product)
+    db.session.commit()
+    client.post(
+        "/api/products/orders",
+        json={"items": [{"product_id": product.id}]},
+        headers=auth_headers(buyer),
+    )
+
+    def circular():
+        body = client.post("/api/insights/", json={}, headers=auth_headers(buyer)).get_json()
+        return body["insights"]["metrics"]["circular_purchases"]
+
+    assert circular() == 0
+    client.put(f"/api/products/{product.id}", json={"condition": "Used"}, headers=auth_headers(seller))
+    assert circular() == 1
+
+
+def test_cache_counters_are_exported_as_metrics(client):
+    cache.get_or_set("k", lambda: 1)
+    cache.get_or_set("k", lambda: 1)
+    text = client.get("/api/metrics", headers={"Authorization": f"Bearer {TestingConfig.METRICS_TOKEN}"}).get_data(as_text=True)
+    assert 'result_cache_events_total{event="hits"} 1' in text
+    assert 'result_cache_events_total{event="misses"} 1' in text
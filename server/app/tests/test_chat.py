@@ -0,0 +1,202 @@
+import json
+from datetime import datetime
+
+from app.models import ChatMessage
+
+
+def _events(response):
+    events = []
+    for block in response.get_data(as_text=True).strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def _wait_for_condense(user_id):
+    from app.services import chat_history
+
+    future = chat_history._condensing.get(user_id)
+    if future is not None:
+        future.result(timeout=5)
+
+
+def test_stream_relays_tokens_and_persists_reply(client, make_user, auth_headers, openai_stub):
+    user = make_user()
+    response = client.post("/api/chat/stream", json={"message": "tips?"}, headers=auth_headers(user))
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    events = _events(response)
+    assert [data["content"] for name, data in events if name == "token"] == ["Reuse ", "is ", "great."]
+    name, done = events[-1]
+    assert name == "done"
+    assert done["ai_message"]["content"] == "Reuse is great."
+    assert openai_stub.requests[0]["stream"] is True
+
+    stored = ChatMessage.query.filter_by(user_id=user.id).order_by(ChatMessage.id).all()
+    assert [(m.role, m.content) for m in stored] == [("user", "tips?"), ("assistant", "Reuse is great.")]
+
+
+def test_stream_records_time_to_first_token(client, make_user, auth_headers, openai_stub):
+    from app.services.llm_client import get_llm_client
+
+    openai_stub.chunk_delay = 0.05
+    client.post("/api/chat/stream", json={"message": "hi"}, headers=auth_headers(make_user()))
+
+    ttft = get_llm_client().stats()["time_to_first_token_seconds"]
+    assert ttft["count"] == 1
+    assert ttft["sum"] >= 0.05
+
+
+def test_stream_falls_back_when_upstream_fails(client, make_user, auth_headers, openai_stub):
+    openai_stub.status = 401
+    response = client.post("/api/chat/stream", json={"message": "hi"}, headers=auth_headers(make_user()))
+
+    tokens = [data["content"] for name, data in _events(response) if name == "token"]
+    assert len(tokens) == 1 and "couldn't reach the AI service" in tokens[0]
+
+
+def test_stream_requires_message(client, make_user, auth_headers):
+    response = client.post("/api/chat/stream", json={}, headers=auth_headers(make_user()))
+    assert response.status_code == 400
+
+
+def _add_history(user, count, content="Tell me more about repairing old furniture, please.", start=None):
+    from datetime import datetime, timedelta
+
+    from app import db
+
+    start = start or datetime(2024, 1, 1)
+    db.session.execute(
+        ChatMessage.__table__.insert(),
+        [
+            {
+                "user_id": user.id,
+                "role": "user" if index % 2 == 0 else "assistant",
+                "content": content,
+                "created_at": start + timedelta(seconds=index),
+            }
+            for index in range(count)
+        ],
+    )
+    db.session.commit()
+
+
+def test_send_cost_is_flat_as_history_grows(client, make_user, auth_headers, count_queries, openai_stub):
+    prompts = []
+    query_counts = []
+    for index, size in enumerate((100, 10_000)):
+        user = make_user(email=f"chatty{index}@example.com")
+        _add_history(user, size)
+        headers = auth_headers(user)
+        sent = len(openai_stub.requests)
+        with count_queries() as statements:
+            response = client.post("/api/chat/send", json={"message": "and chairs?"}, headers=headers)
+            _wait_for_condense(user.id)
+        assert response.status_code == 201
+        prompts.append(openai_stub.requests[sent]["messages"])
+        query_counts.append(len([s for s in statements if s.lstrip().upper().startswith("SELECT")]))
+
+    assert len(prompts[0]) == len(prompts[1])
+    assert query_counts[0] == query_counts[1]
+
+
+def test_history_respects_token_budget(app, make_user):
+    from app.services.chat_history import estimate_tokens, load_context
+
+    app.config["CHAT_HISTORY_TOKEN_BUDGET"] = 100
+    user = make_user()
+    _add_history(user, 10, content="x" * 120)
+
+    history, summary = load_context(user.id)
+    assert summary is None
+    assert 0 < len(history) < 10
+    assert sum(estimate_tokens(m["content"]) for m in history) <= 100
+
+
+def test_old_turns_are_condensed_into_summary(client, make_user, auth_headers):
+    from app.models import ChatSummary
+    from app.services.chat_history import load_context
+
+    client.application.config.update(CHAT_HISTORY_WINDOW=4, CHAT_SUMMARY_BATCH=2)
+    user = make_user()
+    _add_history(user, 4)
+    headers = auth_headers(user)
+
+    client.post("/api/chat/send", json={"message": "what about lamps?"}, headers=headers)
+    _wait_for_condense(user.id)
+    summary = ChatSummary.query.get(user.id)
+    assert summary is not None
+    assert "repairing old furniture" in summary.content
+    newest_ids = [m.id for m in ChatMessage.query.order_by(ChatMessage.id.desc()).limit(4)]
+    assert summary.through_message_id == min(newest_ids) - 1
+
+    history, text = load_context(user.id)
+    assert text == summary.content
+    assert len(history) == 4
+
+    client.delete("/api/chat/clear", headers=headers)
+    assert ChatSummary.query.get(user.id) is None
+
+
+def test_messages_page_through_scrollback(client, make_user, auth_headers):
+    user = make_user()
+    _add_history(user, 25)
+    headers = auth_headers(user)
+
+    latest = client.get("/api/chat/messages?limit=10", headers=headers).get_json()
+    assert [m["id"] for m in latest["messages"]] == list(range(16, 26))
+
+    seen = [m["id"] for m in latest["messages"]]
+    cursor = latest["before"]
+    while cursor:
+        page = client.get(f"/api/chat/messages?limit=10&before={cursor}", headers=headers).get_json()
+        seen = [m["id"] for m in page["messages"]] + seen
+        cursor = page["before"]
+    assert seen == list(range(1, 26))
+
+
+def test_messages_after_cursor_returns_newer(client, make_user, auth_headers):
+    user = make_user()
+    _add_history(user, 5)
+    headers = auth_headers(user)
+
+    page = client.get("/api/chat/messages", headers=headers).get_json()
+    assert page["before"] is None
+    empty = client.get(f"/api/chat/messages?after={page['after']}", headers=headers).get_json()
+    assert empty["messages"] == [] and empty["after"] == page["after"]
+
+    _add_history(user, 2, start=datetime(2024, 2, 1))
+    newer = client.get(f"/api/chat/messages?after={page['after']}", headers=headers).get_json()
+    assert [m["id"] for m in newer["messages"]] == [6, 7]
+
+
+def test_messages_reject_bad_cursors(client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    assert client.get("/api/chat/messages?before=nope", headers=headers).status_code == 400
+    assert client.get("/api/chat/messages?before=a&after=b", headers=headers).status_code == 400
+
+
+def test_send_does_not_wait_for_condensation(client, make_user, auth_headers, monkeypatch):
+    import threading
+
+    from app.models import ChatSummary
+    from app.services import chat_history
+
+    client.application.config.update(CHAT_HISTORY_WINDOW=4, CHAT_SUMMARY_BATCH=2)
+    user = make_user()
+    _add_history(user, 4)
+    release = threading.Event()
+
+    def slow_summary(previous, messages):
+        release.wait(5)
+        return "condensed"
+
+    monkeypatch.setattr(chat_history, "summarize_conversation", slow_summary)
+    response = client.post("/api/chat/send", json={"message": "lamps?"}, headers=auth_headers(user))
+    assert response.status_code == 201
+    assert not release.is_set()
+
+    release.set()
+    _wait_for_condense(user.id)
+    assert ChatSummary.query.get(user.id).content == "condensed"
@@ -0,0 +1,23 @@
+from sqlalchemy import text
+
+from app import create_app, db
+from app.utils.database import engine_options
+from config import TestingConfig
+
+
+def test_server_databases_get_a_bounded_pool():
+    options = engine_options({"SQLALCHEMY_DATABASE_URI": "postgresql+psycopg://u:p@db/app", "DB_POOL_SIZE": 3})
+    assert options["pool_size"] == 3
+    assert options["pool_pre_ping"] is True
+    assert options["pool_recycle"] == 1800
+    assert engine_options({"SQLALCHEMY_DATABASE_URI": "sqlite://"}) == {}
+
+
+def test_sqlite_files_use_wal_and_busy_timeout(tmp_path):
+    config = type("FileConfig", (TestingConfig,), {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'app.db'}"})
+    app = create_app(config)
+    with app.app_context():
+        with db.engine.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        db.engine.dispose()
@@ -0,0 +1,133 @@
+import gzip
+
+from app import db
+
+
+def _create(client, headers, **fields):
+    fields.setdefault("title", "Chair")
+    return client.post("/api/products/", json=fields, headers=headers).get_json()["id"]
+
+
+def test_catalog_etag_answers_304_until_catalog_changes(client, make_user, auth_headers, count_queries):
+    headers = auth_headers(make_user(email="vendor@example.com", role="vendor"))
+    product_id = _create(client, headers)
+
+    first = client.get("/api/products/?limit=10")
+    etag = first.headers["ETag"]
+    assert "s-maxage=" in first.headers["Cache-Control"]
+
+    with count_queries() as statements:
+        again = client.get("/api/products/?limit=10", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.data == b""
+    assert len(statements) == 1  # only the version lookup
+
+    # different query -> different representation
+    assert client.get("/api/products/?limit=5").headers["ETag"] != etag
+
+    client.put(f"/api/products/{product_id}", json={"price": 99}, headers=headers)
+    changed = client.get("/api/products/?limit=10", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_catalog_etag_changes_on_create_and_delete(client, make_user, auth_headers):
+    headers = auth_headers(make_user(email="vendor@example.com", role="vendor"))
+    etags = [client.get("/api/products/").headers["ETag"]]
+    product_id = _create(client, headers)
+    etags.append(client.get("/api/products/").headers["ETag"])
+    client.delete(f"/api/products/{product_id}", headers=headers)
+    etags.append(client.get("/api/products/").headers["ETag"])
+    assert len(set(etags)) == 3
+
+
+def test_product_detail_conditional_requests(client, make_user, auth_headers):
+    headers = auth_headers(make_user(email="vendor@example.com", role="vendor"))
+    product_id = _create(client, headers)
+
+    first = client.get(f"/api/products/{product_id}")
+    etag, last_modified = first.headers["ETag"], first.headers["Last-Modified"]
+    assert first.get_json()["updated_at"]
+
+    assert client.get(f"/api/products/{product_id}", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(
+        f"/api/products/{product_id}", headers={"If-Modified-Since": last_modified}
+    ).status_code == 304
+    # If-None-Match wins over If-Modified-Since
+    assert client.get(
+        f"/api/products/{product_id}",
+        headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified},
+    ).status_code == 200
+
+    client.put(f"/api/products/{product_id}", json={"title": "Armchair"}, headers=headers)
+    updated = client.get(f"/api/products/{product_id}", headers={"If-None-Match": etag})
+    assert updated.status_code == 200
+    assert updated.get_json()["title"] == "Armchair"
+
+
+def test_product_detail_missing_is_404(client):
+    assert client.get("/api/products/999").status_code == 404
+
+
+def test_sparse_fieldsets(client, make_user, auth_headers, count_queries):
+    vendor = auth_headers(make_user(email="vendor@example.com", role="vendor"))
+    product_id = _create(client, vendor, price=12)
+
+    listing = client.get("/api/products/?fields=id,title,price").get_json()
+    assert listing["items"] == [{"id": product_id, "title": "Chair", "price": 12}]
+    assert client.get(f"/api/products/{product_id}?fields=title").get_json() == {"title": "Chair"}
+    assert client.get(f"/api/products/{product_id}?fields=title").headers["ETag"] != (
+        client.get(f"/api/products/{product_id}").headers["ETag"]
+    )
+
+    bad = client.get("/api/products/?fields=id,secret")
+    assert bad.status_code == 400 and "secret" in bad.get_json()["error"]
+
+    buyer = auth_headers(make_user())
+    client.post("/api/products/orders", json={"items": [{"product_id": product_id}]}, headers=buyer)
+    with count_queries() as statements:
+        orders = client.get("/api/products/orders?fields=id,price", headers=buyer).get_json()
+    assert orders["items"] == [{"id": orders["items"][0]["id"], "price": 12}]
+    assert not any("JOIN" in statement for statement in statements)
+
+
+def test_json_responses_are_compressed_when_accepted(client, make_user, auth_headers):
+    headers = auth_headers(make_user(email="vendor@example.com", role="vendor"))
+    for index in range(10):
+        _create(client, headers, title=f"Chair {index}", description="Solid oak, barely used.")
+
+    plain = client.get("/api/products/")
+    assert "Content-Encoding" not in plain.headers
+    assert "Accept-Encoding" in plain.headers["Vary"]
+
+    packed = client.get("/api/products/", headers={"Accept-Encoding": "gzip"})
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert int(packed.headers["Content-Length"]) == len(packed.data) < len(plain.data)
+    assert gzip.decompress(packed.data) == plain.data
+    assert packed.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+
+    # the coded validator still revalidates
+    revalidated = client.get(
+        "/api/products/", headers={"Accept-Encoding": "gzip", "If-None-Match": packed.headers["ETag"]}
+    )
+    assert revalidated.status_code == 304
+
+    # small bodies are sent as-is
+    assert "Content-Encoding" not in client.get("/api/health", headers={"Accept-Encoding": "gzip"}).headers
+
+
+def test_first_catalog_bump_tolerates_a_concurrent_insert(app):
+    from app.models import CatalogState
+    from app.services import catalog_version
+
+    # the racing writer's UPDATE matched nothing, then another writer
+    # inserted the row before its own insert ran
+    db.session.add(CatalogState(id=1, version=3))
+    db.session.commit()
+    catalog_version._create_or_bump()
+    db.session.commit()
+    assert catalog_version.get_catalog_version() == 4
+
+    db.session.query(CatalogState).delete()
+    catalog_version.bump_catalog_version()
+    db.session.commit()
+    assert catalog_version.get_catalog_version() == 1
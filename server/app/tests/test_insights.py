@@ -0,0 +1,219 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import Order, Product, UserImpactBucket
+from app.services.ai_service import generate_user_insights
+from app.services.impact_service import rebuild_user_impact, record_orders
+
+CONDITIONS = ["New", "Used", "Pre-loved", "brand new", None]
+CATEGORIES = ["Furniture", "Clothing", None, "", "Electronics"]
+
+
+def _catalog(owner, count=10):
+    products = [
+        Product(
+            title=f"Product {index}",
+            price=100.0 + index,
+            condition=CONDITIONS[index % len(CONDITIONS)],
+            category=CATEGORIES[index % len(CATEGORIES)],
+            is_donation=index % 7 == 3,
+            owner_id=owner.id,
+        )
+        for index in range(count)
+    ]
+    db.session.add_all(products)
+    db.session.commit()
+    return products
+
+
+def _place_orders(buyer, products, days_ago):
+    now = datetime.utcnow()
+    orders = [
+        Order(
+            buyer_id=buyer.id,
+            product=products[index % len(products)],
+            price=50.0 * (index + 1),
+            purchased_at=now - timedelta(days=offset, minutes=index),
+        )
+        for index, offset in enumerate(days_ago)
+    ]
+    db.session.add_all(orders)
+    record_orders(orders)
+    db.session.commit()
+    return orders
+
+
+def _bucket_rows():
+    return sorted(
+        (b.user_id, b.day, b.category, b.orders_count, b.circular_orders, round(b.total_spent, 2))
+        for b in UserImpactBucket.query.all()
+    )
+
+
+def test_bucket_insights_match_full_order_scan(app, make_user):
+    owner = make_user(email="vendor@example.com", role="vendor")
+    buyer = make_user(email="buyer@example.com")
+    products = _catalog(owner)
+    # spread across the window, including the boundary day and older orders
+    _place_orders(buyer, products, [0, 0, 1, 3, 30, 90, 179, 180, 181, 400] * 2)
+
+    all_orders = Order.query.filter_by(buyer_id=buyer.id).all()
+    for timeframe in (30, 180, None):
+        from_buckets = generate_user_insights(buyer.id, timeframe_days=timeframe)
+        from_orders = generate_user_insights(buyer.id, timeframe_days=timeframe, orders=all_orders)
+        assert from_buckets == from_orders
+
+
+def test_rebuild_matches_incremental_buckets(app, make_user):
+    owner = make_user(email="vendor@example.com", role="vendor")
+    buyers = [make_user(email=f"buyer{i}@example.com") for i in range(3)]
+    products = _catalog(owner)
+    for index, buyer in enumerate(buyers):
+        _place_orders(buyer, products, [index, index, 5, 5, 60])
+
+    incremental = _bucket_rows()
+    assert incremental
+
+    UserImpactBucket.query.delete()
+    rebuild_user_impact()
+    db.session.commit()
+    assert _bucket_rows() == incremental
+
+    rebuild_user_impact([buyers[0].id])
+    db.session.commit()
+    assert _bucket_rows() == incremental
+
+
+def test_checkout_updates_buckets(client, make_user, auth_headers):
+    owner = make_user(email="vendor@example.com", role="vendor")
+    buyer = make_user(email="buyer@example.com")
+    products = _catalog(owner, count=3)
+
+    response = client.post(
+        "/api/products/orders",
+        json={"items": [{"product_id": p.id, "quantity": 2} for p in products]},
+        headers=auth_headers(buyer),
+    )
+    assert response.status_code == 201
+
+    buckets = UserImpactBucket.query.filter_by(user_id=buyer.id).all()
+    assert sum(b.orders_count for b in buckets) == 3
+    assert sum(b.total_spent for b in buckets) == sum(p.price * 2 for p in products)
+
+
+def test_category_change_refreshes_buyer_buckets(client, make_user, auth_headers):
+    owner = make_user(email="vendor@example.com", role="vendor")
+    buyer = make_user(email="buyer@example.com")
+    products = _catalog(owner, count=1)
+    _place_orders(buyer, products, [1])
+
+    response = client.put(
+        f"/api/products/{products[0].id}",
+        json={"category": "Books", "condition": "Used"},
+        headers=auth_headers(owner),
+    )
+    assert response.status_code == 200
+
+    (bucket,) = UserImpactBucket.query.filter_by(user_id=buyer.id).all()
+    assert bucket.category == "Books"
+    assert bucket.circular_orders == 1
+
+
+def test_unstamped_order_is_bucketed_like_a_rebuild(app, make_user):
+    owner = make_user(email="vendor@example.com", role="vendor")
+    buyer = make_user(email="buyer@example.com")
+    (product,) = _catalog(owner, count=1)
+    # a stored row without a purchase time (the ORM would apply the default)
+    db.session.execute(
+        Order.__table__.insert().values(buyer_id=buyer.id, product_id=product.id, price=10.0, purchased_at=None)
+    )
+    record_orders(Order.query.filter_by(buyer_id=buyer.id).all())
+    db.session.commit()
+
+    incremental = _bucket_rows()
+    assert [row[3] for row in incremental] == [1]
+    rebuild_user_impact()
+    db.session.commit()
+    assert _bucket_rows() == incremental
+
+
+def test_sold_product_cannot_be_deleted(client, make_user, auth_headers):
+    owner = make_user(email="vendor@example.com", role="vendor")
+    buyer = make_user(email="buyer@example.com")
+    sold, unsold = _catalog(owner, count=2)
+    _place_orders(buyer, [sold], [1])
+    before = _bucket_rows()
+
+    response = client.delete(f"/api/products/{sold.id}", headers=auth_headers(owner))
+    assert response.status_code == 409
+    assert db.session.get(Product, sold.id) is not None
+    assert _bucket_rows() == before
+
+    assert client.delete(f"/api/products/{unsold.id}", headers=auth_headers(owner)).status_code == 200
+
+
+def test_rebuild_impact_cli(app, make_user):
+    owner = make_user(email="vendor@example.com", role="vendor")
+    buyer = make_user(email="buyer@example.com")
+    _place_orders(buyer, _catalog(owner, count=2), [1, 2])
+    UserImpactBucket.query.delete()
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["rebuild-impact"])
+    assert result.exit_code == 0, result.output
+    assert "Rebuilt 2 impact buckets" in result.output
+    assert UserImpactBucket.query.count() == 2
+
+
+def _reference_platform_metrics(orders, timeframe_days):
+    """The original in-Python aggregation, kept as the parity oracle."""
+    if timeframe_days:
+        start = datetime.utcnow() - timedelta(days=timeframe_days)
+        orders = [o for o in orders if o.purchased_at and o.purchased_at >= start]
+    total_orders = len(orders)
+    circular = 0
+    for order in orders:
+        product = order.product
+        if product is None:
+            continue
+        if product.is_donation or (product.condition or "").lower() not in {"new", "brand new"}:
+            circular += 1
+    return {
+        "orders_analyzed": total_orders,
+        "circular_purchases": circular,
+        "reuse_rate_pct": round((circular / total_orders) * 100 if total_orders else 0, 1),
+        "unique_buyers": len({o.buyer_id for o in orders if o.buyer_id}),
+        "total_spent": round(sum(o.price or 0 for o in orders), 2),
+        "timeframe_days": timeframe_days or None,
+    }
+
+
+def test_platform_insights_match_python_aggregation(app, make_user, count_queries):
+    import random
+
+    from app.services.ai_service import generate_platform_insights
+
+    rng = random.Random(42)
+    owner = make_user(email="vendor@example.com", role="vendor")
+    products = _catalog(owner, count=40)
+    buyers = [make_user(email=f"buyer{i}@example.com") for i in range(8)]
+    now = datetime.utcnow()
+    db.session.add_all(
+        Order(
+            buyer_id=rng.choice(buyers).id,
+            product_id=rng.choice(products).id,
+            price=round(rng.uniform(0, 5000), 2),
+            purchased_at=now - timedelta(days=rng.randint(0, 400), seconds=rng.randint(0, 86400)),
+        )
+        for _ in range(500)
+    )
+    # an order whose product no longer exists is never circular
+    db.session.add(Order(buyer_id=buyers[0].id, product_id=99999, price=10.0, purchased_at=now))
+    db.session.commit()
+
+    all_orders = Order.query.all()
+    for timeframe in (30, 180, None):
+        with count_queries() as statements:
+            insights = generate_platform_insights(timeframe_days=timeframe)
+        assert len(statements) == 1
+        assert insights["metrics"] == _reference_platform_metrics(all_orders, timeframe)
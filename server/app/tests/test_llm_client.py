@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from app.services.llm_client import LLMClient, LLMUnavailableError, reset_llm_client
+
+BODY = {"model": "test", "messages": []}
+
+
+def _client(**overrides):
+    options = {"backoff_base": 0.001, "failure_threshold": 3, "reset_timeout": 0.2}
+    options.update(overrides)
+    return LLMClient(**options)
+
+
+def test_reuses_pooled_connection(openai_stub):
+    client = _client()
+    for _ in range(3):
+        assert client.chat_completion(openai_stub.url, "key", BODY)["choices"]
+    assert len(set(openai_stub.peers)) == 1
+
+
+def test_retries_transient_errors_then_succeeds(openai_stub):
+    openai_stub.statuses = [503, 429]
+    client = _client()
+
+    data = client.chat_completion(openai_stub.url, "key", BODY)
+
+    assert data["usage"]["total_tokens"] == 70
+    assert len(openai_stub.requests) == 3
+    stats = client.stats()
+    assert (stats["calls"], stats["retries"], stats["failures"]) == (1, 2, 0)
+    assert stats["latency_seconds"]["count"] == 1
+
+
+def test_gives_up_after_max_retries(openai_stub):
+    openai_stub.status = 502
+    client = _client(max_retries=1)
+
+    with pytest.raises(requests.HTTPError):
+        client.chat_completion(openai_stub.url, "key", BODY)
+    assert len(openai_stub.requests) == 2
+
+
+def test_client_errors_are_not_retried_and_keep_circuit_closed(openai_stub):
+    openai_stub.status = 401
+    client = _client(failure_threshold=1)
+
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            client.chat_completion(openai_stub.url, "key", BODY)
+    assert len(openai_stub.requests) == 2
+    assert client.breaker.state == "closed"
+
+
+def test_circuit_breaker_short_circuits_and_recovers(openai_stub):
+    openai_stub.status = 500
+    client = _client(max_retries=0)
+
+    for _ in range(3):
+        with pytest.raises(requests.HTTPError):
+            client.chat_completion(openai_stub.url, "key", BODY)
+    assert client.breaker.state == "open"
+
+    with pytest.raises(LLMUnavailableError):
+        client.chat_completion(openai_stub.url, "key", BODY)
+    assert len(openai_stub.requests) == 3
+    assert client.stats()["short_circuited"] == 1
+
+    time.sleep(0.25)
+    openai_stub.status = 200
+    assert client.chat_completion(openai_stub.url, "key", BODY)["choices"]
+    assert client.breaker.state == "closed"
+
+
+def test_bounds_concurrent_upstream_calls(openai_stub):
+    openai_stub.delay = 0.1
+    client = _client(max_concurrency=2)
+
+    threads = [
+        threading.Thread(target=client.chat_completion, args=(openai_stub.url, "key", BODY))
+        for _ in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(openai_stub.requests) == 6
+    assert openai_stub.max_in_flight == 2
+
+
+def test_chat_falls_back_when_circuit_is_open(client, make_user, auth_headers, openai_stub):
+    tripped = _client()
+    for _ in range(3):
+        tripped.breaker.record_failure()
+    reset_llm_client(tripped)
+
+    response = client.post("/api/chat/send", json={"message": "hi"}, headers=auth_headers(make_user()))
+
+    assert response.status_code == 201
+    assert "couldn't reach the AI service" in response.get_json()["ai_message"]["content"]
+    assert openai_stub.requests == []
+
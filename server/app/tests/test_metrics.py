@@ -0,0 +1,68 @@
+from app import create_app
+from app.utils.metrics import metrics
+from config import TestingConfig
+
+SCRAPE_HEADERS = {"Authorization": f"Bearer {TestingConfig.METRICS_TOKEN}"}
+
+
+def _sample(text, prefix):
+    """Value of the first metric line starting with ``prefix``."""
+
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} not found")
+
+
+def test_metrics_endpoint_reports_requests_and_sql(client, make_user, auth_headers):
+    headers = auth_headers(make_user(email="vendor@example.com", role="vendor"))
+    client.post("/api/products/", json={"title": "Chair"}, headers=headers)
+    labels = 'blueprint="products",endpoint="products.get_products",method="GET"'
+    before = metrics.responses.get(
+        ((("blueprint", "products"), ("endpoint", "products.get_products"), ("method", "GET")), 200), 0
+    )
+    client.get("/api/products/")
+    client.get("/api/products/")
+    client.get("/api/nowhere")
+
+    response = client.get("/api/metrics", headers=SCRAPE_HEADERS)
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    text = response.get_data(as_text=True)
+
+    assert _sample(text, f'http_requests_total{{{labels},status="200"}}') == before + 2
+    assert _sample(text, 'http_requests_total{blueprint="",endpoint="unmatched",method="GET",status="404"}') >= 1
+    assert _sample(text, f'http_request_duration_seconds_count{{{labels}}}') >= 2
+    assert _sample(text, f"sql_queries_total{{{labels}}}") >= 4  # version + page, per request
+    assert _sample(text, "http_requests_in_flight") == 1  # the scrape itself
+    assert "# TYPE llm_request_duration_seconds histogram" in text
+    assert 'llm_events_total{event="calls"}' in text
+
+
+def test_metrics_can_be_disabled():
+    config = type("NoMetricsConfig", (TestingConfig,), {"METRICS_ENABLED": False})
+    app = create_app(config)
+    assert app.test_client().get("/api/metrics", headers=SCRAPE_HEADERS).status_code == 404
+
+
+def test_metrics_require_the_configured_token(client):
+    assert client.get("/api/metrics").status_code == 401
+    assert client.get("/api/metrics", headers={"Authorization": "Bearer guess"}).status_code == 401
+    assert client.get("/api/metrics", headers=SCRAPE_HEADERS).status_code == 200
+
+
+def test_metrics_are_hidden_without_a_token():
+    config = type("NoTokenConfig", (TestingConfig,), {"METRICS_TOKEN": None})
+    app = create_app(config)
+    assert app.test_client().get("/api/metrics").status_code == 404
+
+
+def test_service_counters_replace_the_health_routes(client):
+    for name in ("cache", "ai-summaries", "impact-factors", "passwords", "llm"):
+        assert client.get(f"/api/health/{name}").status_code == 404
+
+    text = client.get("/api/metrics", headers=SCRAPE_HEADERS).get_data(as_text=True)
+    assert _sample(text, 'ai_summary_cache_lookups_total{result="miss"}') >= 0
+    assert _sample(text, 'password_hash_jobs_total{kind="hashed"}') >= 0
+    assert _sample(text, "password_hash_workers") == 0  # TestingConfig hashes inline
+    assert _sample(text, "impact_factors_info{version=") == 1
@@ -0,0 +1,99 @@
+import json
+import os
+import pstats
+
+import pytest
+
+from app.utils.profiling import TOKEN_HEADER, sign_profile_token
+
+
+@pytest.fixture()
+def profile_dir(app, tmp_path):
+    app.config.update(PROFILING_DIR=str(tmp_path), PROFILING_MODE="cprofile")
+    return tmp_path
+
+
+def _summaries(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+
+
+def test_signed_header_profiles_the_request(client, profile_dir):
+    client.get("/api/products/")
+    assert _summaries(profile_dir) == []
+
+    bad = sign_profile_token("/api/products/other")
+    client.get("/api/products/", headers={TOKEN_HEADER: bad})
+    expired = sign_profile_token("/api/products/", ttl_seconds=-1)
+    client.get("/api/products/", headers={TOKEN_HEADER: expired})
+    assert _summaries(profile_dir) == []
+
+    response = client.get("/api/products/", headers={TOKEN_HEADER: sign_profile_token("/api/products/")})
+    assert response.status_code == 200
+    [summary_name] = _summaries(profile_dir)
+    profile_id = summary_name[: -len(".json")]
+    stats = pstats.Stats(str(profile_dir / f"{profile_id}.prof"))
+    assert stats.total_calls > 0
+
+
+def test_tokens_are_refused_without_a_profiling_secret(app, client, profile_dir):
+    import hashlib
+    import hmac
+    import time
+
+    token = sign_profile_token("/api/products/")
+    app.config["PROFILING_SECRET"] = None
+    client.get("/api/products/", headers={TOKEN_HEADER: token})
+
+    # a token signed with SECRET_KEY (whose default is public) is no good either
+    expires = int(time.time()) + 300
+    key = app.config["SECRET_KEY"].encode("utf-8")
+    forged = f"{expires}." + hmac.new(key, f"{expires}:/api/products/".encode("utf-8"), hashlib.sha256).hexdigest()
+    client.get("/api/products/", headers={TOKEN_HEADER: forged})
+    assert _summaries(profile_dir) == []
+    with pytest.raises(RuntimeError):
+        sign_profile_token("/api/products/")
+
+
+
+def test_admin_flag_and_profile_routes(app, client, make_user, auth_headers, profile_dir):
+    admin = auth_headers(make_user(email="admin@example.com", role="admin"))
+    buyer = auth_headers(make_user())
+
+    client.get("/api/products/?_profile=1", headers=buyer)
+    assert client.get("/api/admin/profiles", headers=buyer).status_code == 403
+    assert client.get("/api/admin/profiles", headers=admin).get_json()["items"] == []
+
+    client.get("/api/products/?_profile=sample", headers=admin)
+    [item] = client.get("/api/admin/profiles", headers=admin).get_json()["items"]
+    assert item["trigger"] == "admin" and item["mode"] == "sample"
+    assert item["endpoint"] == "products.get_products" and item["status"] == 200
+
+    detail = client.get(f"/api/admin/profiles/{item['id']}", headers=admin).get_json()
+    assert detail["spans"] and all(span["kind"] == "sql" for span in detail["spans"])
+    assert detail["sql_ms"] > 0
+
+    data = client.get(f"/api/admin/profiles/{item['id']}/data", headers=admin)
+    assert data.status_code == 200
+    assert "attachment" in data.headers["Content-Disposition"]
+    assert client.get("/api/admin/profiles/../../etc/passwd/data", headers=admin).status_code == 404
+
+
+def test_sampled_mode_and_rotation(app, client, profile_dir):
+    app.config.update(PROFILING_SAMPLE_EVERY=2, PROFILING_MAX_FILES=2)
+    for _ in range(8):
+        client.get("/api/health")
+    summaries = _summaries(profile_dir)
+    assert len(summaries) == 2
+    assert len(os.listdir(profile_dir)) == 4  # summary + pstats each
+
+
+def test_outbound_llm_calls_are_spans(client, make_user, auth_headers, profile_dir, openai_stub):
+    headers = auth_headers(make_user())
+    headers[TOKEN_HEADER] = sign_profile_token("/api/chat/send")
+    assert client.post("/api/chat/send", json={"message": "hi"}, headers=headers).status_code == 201
+
+    [summary_name] = _summaries(profile_dir)
+    summary = json.loads((profile_dir / summary_name).read_text())
+    [http] = [span for span in summary["spans"] if span["kind"] == "http"]
+    assert http["name"] == f"POST {openai_stub.url} 200"
+    assert summary["http_ms"] > 0
@@ -0,0 +1,65 @@
+import logging
+
+import pytest
+
+from app import create_app, db
+from app.models import Product, User
+from app.utils.query_budget import QueryBudgetExceeded, query_budget, statement_shape
+from config import TestingConfig
+
+
+def _owners_route(app, budget=None):
+    def owners():
+        return {"owners": [product.owner.email for product in Product.query.all()]}
+
+    view = query_budget(budget)(owners) if budget is not None else owners
+    app.add_url_rule("/test/owners", view_func=view)
+
+
+def _seed(make_user, count):
+    for index in range(count):
+        owner = make_user(email=f"vendor{index}@example.com", role="vendor")
+        db.session.add(Product(title=f"Item {index}", owner_id=owner.id))
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def test_lazy_load_per_row_is_flagged(app, client, make_user):
+    _owners_route(app)
+    _seed(make_user, 6)
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        client.get("/test/owners")
+    message = str(excinfo.value)
+    assert "N+1" in message and "FROM users" in message
+    assert "test_query_budget.py" in message  # stack points at the loop
+
+
+def test_declared_budget_is_enforced(app, client, make_user):
+    _owners_route(app, budget=2)
+    _seed(make_user, 2)
+    with pytest.raises(QueryBudgetExceeded, match="exceeds the budget of 2"):
+        client.get("/test/owners")
+
+
+def test_warn_mode_logs_instead_of_raising(caplog):
+    app = create_app(type("WarnConfig", (TestingConfig,), {"SQL_BUDGET_MODE": "warn"}))
+    _owners_route(app, budget=1)
+    with app.app_context():
+        db.create_all()
+        owner = User(email="vendor@example.com", password_hash="x", role="vendor")
+        db.session.add(owner)
+        db.session.flush()
+        db.session.add(Product(title="Chair", owner_id=owner.id))
+        db.session.commit()
+        db.session.expunge_all()
+        with caplog.at_level(logging.WARNING):
+            assert app.test_client().get("/test/owners").status_code == 200
+        db.drop_all()
+    assert "exceeds the budget of 1" in caplog.text
+
+
+def test_statement_shape_folds_values():
+    first = statement_shape("SELECT * FROM users WHERE users.id IN (?, ?, ?) AND name = 'bob' LIMIT 10")
+    second = statement_shape("SELECT * FROM users WHERE users.id IN (?, ?) AND name = 'al' LIMIT 20")
+    assert first == second == "SELECT * FROM users WHERE users.id IN (?...) AND name = ? LIMIT ?"
+    assert statement_shape("SELECT 1 WHERE id = %(id_1)s") == statement_shape("SELECT 2 WHERE id = %(id_2)s")
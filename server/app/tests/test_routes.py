@@ -0,0 +1,204 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import Product, User
+
+
+def _add_products(owner, count, **overrides):
+    base = datetime(2024, 1, 1)
+    products = []
+    for index in range(count):
+        fields = {
+            "title": f"Item {index}",
+            "price": float(index * 100),
+            "condition": "Used",
+            "category": "Furniture" if index % 2 else "Clothing",
+            "location": "Nairobi",
+            "is_donation": index % 5 == 0,
+            "owner_id": owner.id,
+            "created_at": base + timedelta(minutes=index),
+        }
+        fields.update(overrides)
+        products.append(Product(**fields))
+    db.session.add_all(products)
+    db.session.commit()
+    return products
+
+
+def test_health(client):
+    assert client.get("/api/health").get_json() == {"status": "ok"}
+
+
+def test_product_listing_walks_all_pages_with_cursor(client, make_user):
+    owner = make_user(email="vendor@example.com", role="vendor")
+    _add_products(owner, 25)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 10}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/api/products/", query_string=params).get_json()
+        seen.extend(item["id"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    assert len(seen) == 25
+    assert len(set(seen)) == 25
+    # newest first
+    assert seen[0] == 25 and seen[-1] == 1
+
+
+def test_product_listing_keyset_breaks_created_at_ties_by_id(client, make_user):
+    owner = make_user(email="vendor@example.com", role="vendor")
+    _add_products(owner, 5, created_at=datetime(2024, 1, 1))
+
+    first = client.get("/api/products/?limit=3").get_json()
+    second = client.get(f"/api/products/?limit=3&cursor={first['next_cursor']}").get_json()
+
+    assert [p["id"] for p in first["items"]] == [5, 4, 3]
+    assert [p["id"] for p in second["items"]] == [2, 1]
+    assert second["next_cursor"] is None
+
+
+def test_product_listing_filters(client, make_user):
+    owner = make_user(email="vendor@example.com", role="vendor")
+    _add_products(owner, 20)
+
+    body = client.get(
+        "/api/products/",
+        query_string={"category": "Furniture", "min_price": 500, "max_price": 1500, "limit": 100},
+    ).get_json()
+    assert body["items"]
+    for item in body["items"]:
+        assert item["category"] == "Furniture"
+        assert 500 <= item["price"] <= 1500
+
+    donations = client.get("/api/products/?is_donation=true&limit=100").get_json()["items"]
+    assert {item["id"] for item in donations} == {1, 6, 11, 16}
+
+
+def test_product_listing_rejects_bad_arguments(client):
+    assert client.get("/api/products/?cursor=not-a-cursor").status_code == 400
+    assert client.get("/api/products/?limit=abc").status_code == 400
+    assert client.get("/api/products/?is_donation=maybe").status_code == 400
+
+
+def _add_catalog_with_distinct_owners(count):
+    owners = [
+        User(email=f"owner{index}@example.com", name=f"Owner {index}", password_hash="x")
+        for index in range(count)
+    ]
+    db.session.add_all(owners)
+    db.session.flush()
+    db.session.add_all(
+        Product(
+            title=f"Item {index}",
+            owner_id=owner.id,
+            created_at=datetime(2024, 1, 1) + timedelta(seconds=index),
+        )
+        for index, owner in enumerate(owners)
+    )
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def test_product_listing_query_count_is_constant(client, count_queries):
+    _add_catalog_with_distinct_owners(1000)
+
+    pages = 0
+    cursor = None
+    with count_queries() as statements:
+        while True:
+            params = {"limit": 100}
+            if cursor:
+                params["cursor"] = cursor
+            body = client.get("/api/products/", query_string=params).get_json()
+            assert all(item["owner"]["email"] for item in body["items"])
+            pages += 1
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+
+    assert pages == 10
+    # one catalog-version lookup (for the ETag) plus the page itself
+    assert len(statements) == 2 * pages
+
+
+def test_product_listing_can_omit_owner(client, make_user):
+    owner = make_user(email="vendor@example.com", role="vendor")
+    _add_products(owner, 3)
+
+    items = client.get("/api/products/?include_owner=false").get_json()["items"]
+    assert items and all("owner" not in item for item in items)
+
+
+def test_my_products_query_count_is_constant(client, make_user, auth_headers, count_queries):
+    owner = make_user(email="vendor@example.com", role="vendor")
+    _add_products(owner, 1000)
+    headers = auth_headers(owner)
+    db.session.expunge_all()
+
+    with count_queries() as statements:
+        items = client.get("/api/products/mine", headers=headers).get_json()["items"]
+
+    assert len(items) == 1000
+    assert len(statements) == 1
+
+
+def _checkout_query_count(client, headers, count_queries, product_ids):
+    items = [{"product_id": product_id, "quantity": 2} for product_id in product_ids]
+    with count_queries() as statements:
+        response = client.post("/api/products/orders", json={"items": items}, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    return len(statements), response.get_json()
+
+
+def test_checkout_query_count_is_independent_of_cart_size(client, make_user, auth_headers, count_queries):
+    vendor = make_user(email="vendor@example.com", role="vendor")
+    small = [product.id for product in _add_products(vendor, 1)]
+    large = [product.id for product in _add_products(vendor, 20)]
+
+    counts = []
+    for index, cart in enumerate((small, large)):
+        buyer = make_user(email=f"buyer{index}@example.com")
+        headers = auth_headers(buyer)
+        db.session.expunge_all()
+        count, body = _checkout_query_count(client, headers, count_queries, cart)
+        assert len(body["orders"]) == len(cart)
+        assert all(order["product"]["owner"]["email"] == "vendor@example.com" for order in body["orders"])
+        counts.append(count)
+
+    assert counts[0] == counts[1]
+
+
+def test_checkout_updates_cached_dashboard_incrementally(client, make_user, auth_headers, count_queries):
+    vendor = make_user(email="vendor@example.com", role="vendor")
+    first = [product.id for product in _add_products(vendor, 2)]
+    second = [product.id for product in _add_products(vendor, 3)]
+    buyer = make_user()
+    headers = auth_headers(buyer)
+
+    db.session.expunge_all()
+
+    # nothing cached yet: the checkout builds the dashboard and caches it
+    cold_count, _ = _checkout_query_count(client, headers, count_queries, first)
+    # the cached dashboard is updated in place
+    warm_count, body = _checkout_query_count(client, headers, count_queries, second)
+    assert warm_count < cold_count
+
+    dashboard = body["dashboard"]
+    fresh = client.get("/api/products/stats", headers=headers).get_json()
+    assert dashboard["purchases_count"] == fresh["purchases_count"] == 5
+    assert dashboard["purchases_total"] == fresh["purchases_total"]
+    assert sorted(o["id"] for o in dashboard["recent_orders"]) == sorted(o["id"] for o in fresh["recent_orders"])
+    assert dashboard["insights"]["metrics"] == fresh["insights"]["metrics"]
+
+    from app import cache
+
+    cache.clear()
+    rebuilt = client.get("/api/products/stats", headers=headers).get_json()
+    assert rebuilt["purchases_count"] == 5
+    assert rebuilt["insights"]["metrics"] == dashboard["insights"]["metrics"]
@@ -0,0 +1,108 @@
+"""Schema checks: migration parity and index usage of the hot queries."""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import tuple_
+
+from app import db
+from app.models import ChatMessage, Order, Product
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "migrations")
+
+
+def _plan(query):
+    statement = getattr(query, "statement", query)
+    compiled = statement.compile(dialect=db.engine.dialect)
+    params = [compiled.params[name] for name in compiled.positiontup]
+    rows = db.session.connection().exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {compiled}", tuple(params)
+    ).fetchall()
+    return [row[-1] for row in rows]
+
+
+def _assert_uses_index(plan, index_name):
+    assert any(index_name in line for line in plan), plan
+    for line in plan:
+        if line.startswith("SCAN ") and "USING" not in line:
+            pytest.fail(f"full table scan in plan: {plan}")
+
+
+def test_catalog_page_uses_keyset_index(app):
+    cursor = (datetime(2024, 1, 1), 10)
+    query = (
+        Product.query.filter(tuple_(Product.created_at, Product.id) < cursor)
+        .order_by(Product.created_at.desc(), Product.id.desc())
+        .limit(25)
+    )
+    _assert_uses_index(_plan(query), "ix_products_created_at_id")
+
+
+def test_catalog_category_filter_uses_composite_index(app):
+    query = (
+        Product.query.filter(Product.category == "Furniture")
+        .order_by(Product.created_at.desc(), Product.id.desc())
+        .limit(25)
+    )
+    _assert_uses_index(_plan(query), "ix_products_category_created_at_id")
+
+
+def test_seller_listings_use_owner_index(app):
+    query = Product.query.filter_by(owner_id=1).order_by(Product.created_at.desc())
+    _assert_uses_index(_plan(query), "ix_products_owner_id_created_at")
+
+
+def test_seller_sales_join_uses_indexes(app):
+    query = (
+        db.session.query(db.func.count(Order.id))
+        .join(Product)
+        .filter(Product.owner_id == 1)
+    )
+    plan = _plan(query)
+    _assert_uses_index(plan, "ix_products_owner_id_created_at")
+    _assert_uses_index(plan, "ix_orders_product_id")
+
+
+def test_buyer_order_history_uses_buyer_index(app):
+    query = Order.query.filter_by(buyer_id=1).order_by(Order.purchased_at.desc())
+    _assert_uses_index(_plan(query), "ix_orders_buyer_id_purchased_at")
+
+
+def test_user_insight_window_uses_buyer_index(app):
+    start = datetime.utcnow() - timedelta(days=180)
+    query = Order.query.filter(Order.buyer_id == 1, Order.purchased_at >= start)
+    _assert_uses_index(_plan(query), "ix_orders_buyer_id_purchased_at")
+
+
+def test_platform_insight_window_uses_purchased_at_index(app):
+    start = datetime.utcnow() - timedelta(days=180)
+    query = Order.query.filter(Order.purchased_at >= start)
+    _assert_uses_index(_plan(query), "ix_orders_purchased_at")
+
+
+def test_chat_history_uses_user_index(app):
+    query = ChatMessage.query.filter_by(user_id=1).order_by(
+        ChatMessage.created_at.desc(), ChatMessage.id.desc()
+    )
+    _assert_uses_index(_plan(query), "ix_chat_messages_user_id_created_at_id")
+
+
+def test_migrations_build_the_model_schema(tmp_path):
+    from flask_migrate import upgrade
+    from sqlalchemy import create_engine, inspect
+
+    from config import TestingConfig
+    from app import create_app
+
+    class MigratedConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'migrated.db'}"
+
+    migrated = create_app(MigratedConfig)
+    with migrated.app_context():
+        upgrade(directory=MIGRATIONS_DIR)
+
+    inspector = inspect(create_engine(MigratedConfig.SQLALCHEMY_DATABASE_URI))
+    for table in db.metadata.sorted_tables:
+        expected = {index.name for index in table.indexes}
+        actual = {index["name"] for index in inspector.get_indexes(table.name)}
+        assert expected <= actual, table.name
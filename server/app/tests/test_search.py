@@ -0,0 +1,81 @@
+from app import db
+from app.models import Product
+
+
+def _listing(owner, title, **fields):
+    fields.setdefault("description", "")
+    return {"title": title, "owner_id": owner.id, **fields}
+
+
+def _create(client, headers, **fields):
+    response = client.post("/api/products/", json=fields, headers=headers)
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+def test_search_ranks_title_matches_first(client, make_user, auth_headers):
+    headers = auth_headers(make_user(email="vendor@example.com", role="vendor"))
+    in_description = _create(client, headers, title="Oak shelf", description="Goes well with a wooden chair")
+    in_title = _create(client, headers, title="Wooden chair", description="Solid and repaired")
+    _create(client, headers, title="Denim jacket", category="Clothing")
+
+    items = client.get("/api/products/search?q=wooden chair").get_json()["items"]
+    assert [item["id"] for item in items] == [in_title, in_description]
+    assert items[0]["owner"]["email"] == "vendor@example.com"
+
+
+def test_search_matches_prefix_stems_and_other_fields(client, make_user, auth_headers):
+    headers = auth_headers(make_user(email="vendor@example.com", role="vendor"))
+    product_id = _create(client, headers, title="Vintage lamps", category="Lighting", location="Nairobi")
+
+    for query in ("lamp", "vint", "lighting", "nairobi", "NAIROBI lamp"):
+        items = client.get("/api/products/search", query_string={"q": query}).get_json()["items"]
+        assert [item["id"] for item in items] == [product_id], query
+
+
+def test_search_index_follows_updates_and_deletes(client, make_user, auth_headers):
+    headers = auth_headers(make_user(email="vendor@example.com", role="vendor"))
+    product_id = _create(client, headers, title="Bamboo desk")
+
+    client.put(f"/api/products/{product_id}", json={"title": "Teak desk"}, headers=headers)
+    assert client.get("/api/products/search?q=bamboo").get_json()["items"] == []
+    assert len(client.get("/api/products/search?q=teak").get_json()["items"]) == 1
+
+    client.delete(f"/api/products/{product_id}", headers=headers)
+    assert client.get("/api/products/search?q=teak").get_json()["items"] == []
+
+
+def test_search_paginates(client, make_user, auth_headers):
+    headers = auth_headers(make_user(email="vendor@example.com", role="vendor"))
+    for index in range(7):
+        _create(client, headers, title=f"Reclaimed table {index}")
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "table", "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/api/products/search", query_string=params).get_json()
+        seen.extend(item["id"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert sorted(seen) == list(range(1, 8))
+
+
+def test_search_treats_query_syntax_as_text(client):
+    assert client.get('/api/products/search?q="OR NEAR(*').status_code == 200
+    assert client.get("/api/products/search?q=").status_code == 400
+    assert client.get("/api/products/search?q=x&cursor=bogus").status_code == 400
+
+
+def test_rebuild_search_index(app, make_user):
+    from app.services.search_service import rebuild_search_index, search_product_ids
+
+    owner = make_user()
+    db.session.add(Product(**_listing(owner, "Copper kettle")))
+    db.session.commit()
+    assert search_product_ids("kettle", 10) == ([], False)
+
+    assert rebuild_search_index() == 1
+    assert search_product_ids("kettle", 10) == ([1], False)
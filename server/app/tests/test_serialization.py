@@ -0,0 +1,49 @@
+import json
+
+from app import db
+from app.models import Product
+from app.utils import serialization
+from app.utils.serialization import product_row_to_dict, product_rows
+
+
+def _catalog(owner):
+    db.session.add_all([
+        Product(title="Lamp", price=10.0, category="Home & Living", condition="Used", owner_id=owner.id),
+        Product(title="Gift", description="free", is_donation=True, owner_id=owner.id, image_url="x.png"),
+    ])
+    db.session.commit()
+
+
+def test_row_shape_matches_to_dict(app, make_user):
+    _catalog(make_user(email="vendor@example.com"))
+
+    for include_owner in (True, False):
+        rows = db.session.execute(product_rows(include_owner).order_by(Product.id)).all()
+        expected = [p.to_dict(include_owner=include_owner) for p in Product.query.order_by(Product.id)]
+        assert [product_row_to_dict(row, include_owner) for row in rows] == expected
+
+
+def test_stdlib_fallback_encodes_the_same(app, make_user, monkeypatch):
+    _catalog(make_user())
+    payload = {"items": [p.to_dict() for p in Product.query], "next_cursor": None}
+
+    fast = serialization.dumps(payload)
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert json.loads(serialization.dumps(payload)) == json.loads(fast)
+
+
+def test_my_products_streams_in_chunks(client, make_user, auth_headers, monkeypatch):
+    monkeypatch.setattr(serialization, "STREAM_CHUNK_ROWS", 2)
+    owner = make_user(email="vendor@example.com", role="vendor")
+    db.session.add_all(Product(title=f"Item {i}", owner_id=owner.id) for i in range(5))
+    db.session.commit()
+
+    response = client.get("/api/products/mine", headers=auth_headers(owner))
+    assert response.is_streamed
+    chunks = list(response.response)
+    assert len(chunks) == 5  # opening, 3 row chunks, closing
+    items = json.loads(b"".join(chunks))["items"]
+    assert sorted(item["id"] for item in items) == [1, 2, 3, 4, 5]
+
+    empty = client.get("/api/products/mine", headers=auth_headers(make_user()))
+    assert json.loads(empty.data) == {"items": []}
@@ -0,0 +1,147 @@
+import json
+from itertools import product as combinations
+
+import pytest
+
+from app import db
+from app.models import Product
+from app.utils.sustainability import estimate_co2_batch, estimate_product_co2_per_purchase
+
+CATEGORIES = ["Electronics", " furniture ", "Clothing", "Unknown", "", None]
+CONDITIONS = ["New", "Used - Like New", "pre-loved", "Broken", None]
+
+
+def test_batch_matches_single_estimates():
+    rows = list(combinations(CATEGORIES, CONDITIONS, (False, True)))
+    categories, conditions, donations = zip(*rows)
+
+    expected = [
+        estimate_product_co2_per_purchase(Product(category=c, condition=k, is_donation=d))
+        for c, k, d in rows
+    ]
+    assert estimate_co2_batch(categories, conditions, donations) == expected
+
+
+def test_batch_rejects_ragged_columns():
+    with pytest.raises(ValueError):
+        estimate_co2_batch(["Clothing"], [], [False])
+
+
+def test_co2_savings_is_stored_and_kept_current(app, make_user):
+    owner = make_user()
+    product = Product(title="Desk", category="Furniture", condition="Used", owner_id=owner.id)
+    db.session.add(product)
+    db.session.commit()
+    assert product.co2_savings == estimate_product_co2_per_purchase(product)
+
+    product.is_donation = True
+    db.session.commit()
+    assert product.co2_savings == estimate_product_co2_per_purchase(product)
+    assert product.to_dict()["co2_savings_per_purchase"] == product.co2_savings
+
+
+def test_refresh_product_co2_backfills_stale_rows(app, make_user):
+    from app.services.impact_service import refresh_product_co2
+
+    owner = make_user()
+    db.session.add_all(Product(title=f"Item {i}", category="Clothing", owner_id=owner.id) for i in range(5))
+    db.session.commit()
+    db.session.execute(
+        db.update(Product).where(Product.id <= 3).values(co2_savings=None, co2_factors_version=None)
+    )
+    db.session.commit()
+
+    assert refresh_product_co2(batch_size=2) == 3
+    db.session.expire_all()
+    assert {p.co2_savings for p in Product.query} == {estimate_product_co2_per_purchase(Product(category="Clothing"))}
+    assert refresh_product_co2() == 0
+
+
+def _write_factors(path, version, baseline=1.8):
+    from app.utils.sustainability import DEFAULT_FACTORS_PATH
+
+    with open(DEFAULT_FACTORS_PATH, encoding="utf-8") as handle:
+        data = json.load(handle)
+    data.update(version=version, baseline_savings_kg=baseline)
+    path.write_text(json.dumps(data))
+
+
+@pytest.fixture()
+def factor_file(app, tmp_path):
+    from app.utils import sustainability
+
+    path = tmp_path / "factors.json"
+    _write_factors(path, "test.1")
+    app.config.update(IMPACT_FACTORS_PATH=str(path), IMPACT_FACTORS_RELOAD_SECONDS=0.01)
+    sustainability.load_factors()
+    yield path
+    sustainability.load_factors(sustainability.DEFAULT_FACTORS_PATH)
+
+
+def _reload_after_edit(path, version, **fields):
+    import os
+    import time
+
+    from app.utils.sustainability import get_factors
+
+    before = os.stat(path).st_mtime
+    _write_factors(path, version, **fields)
+    os.utime(path, (before + 5, before + 5))
+    time.sleep(0.02)
+    return get_factors()
+
+
+def test_factor_edits_reload_without_restart(app, make_user, factor_file):
+    owner = make_user()
+    product = Product(title="Jacket", category="Clothing", condition="Used", owner_id=owner.id)
+    db.session.add(product)
+    db.session.commit()
+    assert product.co2_factors_version == "test.1"
+    old_value = product.co2_savings
+
+    assert _reload_after_edit(factor_file, "test.2", baseline=3.6).version == "test.2"
+    # stale stored values are not served; they are recomputed on read
+    assert product.to_dict()["co2_savings_per_purchase"] == pytest.approx(old_value * 2, abs=0.02)
+
+
+def test_refresh_only_touches_stale_versions(app, make_user, factor_file):
+    from app.services.impact_service import refresh_product_co2
+
+    owner = make_user()
+    db.session.add_all(Product(title=f"Item {i}", category="Clothing", owner_id=owner.id) for i in range(3))
+    db.session.commit()
+    assert refresh_product_co2() == 0
+
+    _reload_after_edit(factor_file, "test.2", baseline=3.6)
+    assert refresh_product_co2() == 3
+    assert {p.co2_factors_version for p in Product.query} == {"test.2"}
+
+
+def test_broken_factor_edit_keeps_current_table(app, factor_file):
+    import os
+    import time
+
+    from app.utils.sustainability import get_factors
+
+    before = os.stat(factor_file).st_mtime
+    factor_file.write_text("{not json")
+    os.utime(factor_file, (before + 5, before + 5))
+    time.sleep(0.02)
+    assert get_factors().version == "test.1"
+
+
+def test_insights_are_stamped_with_factor_version(client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    insights = client.post("/api/insights/", json={}, headers=headers).get_json()["insights"]
+    assert insights["impact"]["factor_version"] == "2024.1"
+
+
+def test_zero_reload_interval_disables_reloading(app, factor_file, monkeypatch):
+    import time
+
+    from app.utils import sustainability
+
+    app.config["IMPACT_FACTORS_RELOAD_SECONDS"] = 0
+    # long past any non-zero interval
+    monkeypatch.setattr(sustainability, "_factors_checked_at", time.monotonic() - 3600)
+    assert _reload_after_edit(factor_file, "test.2").version == "test.1"
@@ -0,0 +1,228 @@
+"""Small result cache for dashboard and insight payloads.
+
+Entries are grouped into *scopes* (``user:<id>``, ``platform``, ``catalog``).
+Each scope has a generation counter that is part of every cache key built
+under it, so invalidating a scope is a single counter bump and stale
+entries simply stop being addressed and age out.
+
+Two backends are provided: an in-process LRU with per-entry TTL (the
+default) and a Redis-compatible backend that works with any client
+exposing ``get``/``set``/``incr``/``delete``. Note that the in-process
+backend is per worker: invalidations in one worker do not reach others, so
+staleness there is bounded only by the TTL. Use Redis when running more
+than one worker; ``gunicorn.conf.py`` defaults to a single worker unless
+``CACHE_BACKEND=redis``.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional
+
+_MISSING = object()
+
+
+class MemoryCacheBackend:
+    """Thread-safe LRU mapping with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        # generation counters live outside the LRU so they are never evicted
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        expires_at = time.monotonic() + ttl if ttl else 0.0
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = self._counters.get(key, 0) + 1
+            self._counters[key] = value
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Backend for a Redis (or Redis-protocol compatible) client.
+
+    Values are stored as JSON, so only JSON-serialisable payloads can be
+    cached through it.
+    """
+
+    def __init__(self, client: Any, prefix: str = "cirqlex:cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return _MISSING
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        payload = json.dumps(value, separators=(",", ":"))
+        if ttl:
+            self.client.set(self.prefix + key, payload, ex=max(int(ttl), 1))
+        else:
+            self.client.set(self.prefix + key, payload)
+
+    def get_counter(self, key: str) -> int:
+        raw = self.client.get(self.prefix + "gen:" + key)
+        return int(raw) if raw is not None else 0
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(self.prefix + "gen:" + key))
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*"))
+
+
+class ResultCache:
+    """Flask extension wrapping a cache backend with scoped invalidation."""
+
+    def __init__(self, app=None):
+        self.backend: Any = MemoryCacheBackend()
+        self.default_ttl: Optional[float] = 60.0
+        self.enabled = True
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        config = app.config
+        self.enabled = config.get("CACHE_ENABLED", True)
+        self.default_ttl = config.get("CACHE_DEFAULT_TTL", 60)
+        backend = (config.get("CACHE_BACKEND") or "memory").lower()
+        if backend == "redis":
+            import redis  # only imported when this backend is selected
+
+            client = redis.Redis.from_url(config["CACHE_REDIS_URL"])
+            self.backend = RedisCacheBackend(client, config.get("CACHE_KEY_PREFIX", "cirqlex:cache:"))
+        else:
+            self.backend = MemoryCacheBackend(config.get("CACHE_MAX_ENTRIES", 1024))
+        with self._stats_lock:
+            self._stats = dict.fromkeys(self._stats, 0)
+        app.extensions["result_cache"] = self
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _scoped_key(self, key: str, scopes: Iterable[str]) -> str:
+        generations = ",".join(f"{scope}@{self.backend.get_counter(scope)}" for scope in scopes)
+        return f"{key}|{generations}"
+
+    def get_or_set(
+        self,
+        key: str,
+        producer: Callable[[], Any],
+        scopes: Iterable[str] = (),
+        ttl: Optional[float] = None,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Return the cached value for ``key`` or compute and store it.
+
+        A computed value for which ``cache_if`` returns false is returned
+        without being stored.
+        """
+
+        if not self.enabled:
+            return producer()
+
+        full_key = self._scoped_key(key, scopes)
+        value = self.backend.get(full_key)
+        if value is not _MISSING:
+            self._count("hits")
+            return value
+
+        self._count("misses")
+        value = producer()
+        if cache_if is None or cache_if(value):
+            self.backend.set(full_key, value, self.default_ttl if ttl is None else ttl)
+        return value
+
+    def get(self, key: str, scopes: Iterable[str] = (), default: Any = None) -> Any:
+        """Return the cached value for ``key`` without computing it."""
+
+        if not self.enabled:
+            return default
+        value = self.backend.get(self._scoped_key(key, scopes))
+        if value is _MISSING:
+            self._count("misses")
+            return default
+        self._count("hits")
+        return value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        scopes: Iterable[str] = (),
+        ttl: Optional[float] = None,
+    ) -> None:
+        """Store ``value`` under the current generation of ``scopes``."""
+
+        if self.enabled:
+            self.backend.set(self._scoped_key(key, scopes), value, self.default_ttl if ttl is None else ttl)
+
+    def invalidate(self, *scopes: str) -> None:
+        """Drop every entry cached under any of ``scopes``."""
+
+        for scope in dict.fromkeys(scopes):
+            self.backend.incr(scope)
+            self._count("invalidations")
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def counters(self) -> dict:
+        """Hit/miss/invalidation counts of this process (no backend round trip)."""
+
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def stats(self) -> dict:
+        stats = self.counters()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["entries"] = len(self.backend)
+        stats["backend"] = type(self.backend).__name__
+        return stats
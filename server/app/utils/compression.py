@@ -0,0 +1,77 @@
+"""Negotiated gzip / brotli compression for JSON responses.
+
+Registered as an ``after_request`` hook by :func:`init_compression`. Only
+buffered ``application/json`` bodies of at least ``COMPRESS_MIN_SIZE`` bytes
+are compressed: product listings and search pages, dashboards and
+insights. Streamed responses (the SSE ``/api/chat/stream`` relay) and file
+downloads are left alone so they keep flushing as they are produced.
+Brotli is used when the optional ``brotli`` module is installed and the
+client accepts it, gzip otherwise.
+"""
+from __future__ import annotations
+
+import gzip
+
+from flask import Flask, Response, request
+
+try:  # optional dependency
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COMPRESSIBLE_TYPES = frozenset({"application/json"})
+
+
+def available_encodings() -> tuple:
+    """Content codings this process can produce, most preferred first."""
+
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding) -> str | None:
+    """Pick the best coding offered by ``accept_encoding`` (a werkzeug accept header)."""
+
+    best, best_quality = None, 0.0
+    for encoding in available_encodings():
+        quality = accept_encoding[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, level: int = 6) -> bytes:
+    if encoding == "br":
+        # brotli quality 0-11; keep it proportional to the gzip level
+        return brotli.compress(body, quality=min(11, max(0, level - 1)))
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def init_compression(app: Flask) -> None:
+    @app.after_request
+    def _compress_response(response: Response) -> Response:
+        if not app.config.get("COMPRESS_RESPONSES", True):
+            return response
+        response.vary.add("Accept-Encoding")
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or response.mimetype not in COMPRESSIBLE_TYPES
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+        body = response.get_data()
+        if len(body) < app.config.get("COMPRESS_MIN_SIZE", 1024):
+            return response
+
+        response.set_data(compress(body, encoding, app.config.get("COMPRESS_LEVEL", 6)))
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak=weak)
+        return response
@@ -0,0 +1,50 @@
+"""Engine settings for the production database and local SQLite runs.
+
+Server databases (Postgres via ``DATABASE_URL``) get a bounded, pre-pinged
+connection pool sized from ``DB_POOL_*``; every worker process holds its
+own pool, so ``workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)`` must stay under
+the server's connection limit. File-backed SQLite gets WAL journaling and a
+busy timeout so concurrent workers read while one writes instead of failing
+with "database is locked".
+"""
+from __future__ import annotations
+
+from typing import Any, Mapping
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+
+def engine_options(config: Mapping[str, Any]) -> dict:
+    """``SQLALCHEMY_ENGINE_OPTIONS`` derived from the ``DB_*`` settings."""
+
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() == "sqlite":
+        # Flask-SQLAlchemy picks the pool for SQLite (static for :memory:)
+        return {}
+    return {
+        "pool_size": config.get("DB_POOL_SIZE", 5),
+        "max_overflow": config.get("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": config.get("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": config.get("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": config.get("DB_POOL_PRE_PING", True),
+    }
+
+
+def configure_sqlite(engine: Engine, config: Mapping[str, Any]) -> None:
+    """Apply WAL mode and ``busy_timeout`` to each new SQLite connection."""
+
+    if engine.dialect.name != "sqlite" or not engine.url.database or engine.url.database == ":memory:":
+        return
+    busy_timeout = int(config.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    wal = config.get("SQLITE_WAL", True)
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {busy_timeout}")
+        if wal:
+            cursor.execute("PRAGMA journal_mode = WAL")
+            # safe with WAL: a crash can lose the last commit, never corrupt
+            cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.close()
@@ -0,0 +1,113 @@
+"""Small request-parsing helpers shared by the route modules."""
+from __future__ import annotations
+
+import base64
+from datetime import datetime
+from typing import Any, FrozenSet, Iterable, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+_TRUE_VALUES = {"1", "true", "yes", "on"}
+_FALSE_VALUES = {"0", "false", "no", "off"}
+
+
+def encode_cursor(created_at: Optional[datetime], row_id: int) -> str:
+    """Encode a ``(created_at, id)`` keyset position as an opaque token."""
+
+    stamp = created_at.isoformat() if created_at else ""
+    raw = f"{stamp}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, int]:
+    """Reverse :func:`encode_cursor`. Raises ``ValueError`` on malformed input."""
+
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        stamp, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(stamp), int(row_id)
+    except Exception as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def parse_limit(value: Any, default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    """Clamp a ``limit`` query argument to ``1..maximum``."""
+
+    if value in (None, ""):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    return min(max(limit, 1), maximum)
+
+
+def parse_bool(value: Any) -> Optional[bool]:
+    """Interpret a query-string flag, returning ``None`` when it is absent."""
+
+    if value in (None, ""):
+        return None
+    text = str(value).strip().lower()
+    if text in _TRUE_VALUES:
+        return True
+    if text in _FALSE_VALUES:
+        return False
+    raise ValueError(f"invalid boolean value: {value}")
+
+
+def parse_float(value: Any) -> Optional[float]:
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid number: {value}")
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Opaque token for result sets that can only be paged by position
+    (e.g. relevance-ranked search)."""
+
+    return base64.urlsafe_b64encode(f"@{offset}".encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_offset_cursor(token: str) -> int:
+    """Reverse :func:`encode_offset_cursor`. Raises ``ValueError`` on malformed input."""
+
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii")
+        if not raw.startswith("@"):
+            raise ValueError(raw)
+        offset = int(raw[1:])
+    except Exception as exc:
+        raise ValueError("invalid cursor") from exc
+    if offset < 0:
+        raise ValueError("invalid cursor")
+    return offset
+
+
+def parse_fields(value: Any, allowed: Iterable[str]) -> Optional[FrozenSet[str]]:
+    """Parse a ``fields=a,b,c`` sparse-fieldset argument.
+
+    Returns ``None`` when absent (meaning "all fields"); raises ``ValueError``
+    naming any field not in ``allowed``.
+    """
+
+    if value in (None, ""):
+        return None
+    fields = frozenset(part.strip() for part in str(value).split(",") if part.strip())
+    unknown = sorted(fields - set(allowed))
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def pick_fields(data: dict, fields: Optional[FrozenSet[str]]) -> dict:
+    """Trim a serialized row to ``fields`` (``None`` keeps everything)."""
+
+    if fields is None:
+        return data
+    return {key: value for key, value in data.items() if key in fields}
@@ -0,0 +1,60 @@
+"""Conditional-request and caching helpers for JSON endpoints."""
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+from typing import Any, Optional
+
+from flask import Response, current_app, request
+
+# Content codings applied by utils.compression; each suffixes the ETag
+ENCODED_ETAG_SUFFIXES = ("-br", "-gzip")
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong validator from the values a response was computed from."""
+
+    raw = "|".join(str(part) for part in parts).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:32]
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """Return a 304 if the client already holds this representation.
+
+    ``If-None-Match`` takes precedence over ``If-Modified-Since``, as in
+    RFC 9110. Returns ``None`` when the full body must be sent.
+    """
+
+    if request.if_none_match:
+        # a compressed copy carries the same validator plus a coding suffix
+        matched = any(
+            request.if_none_match.contains(candidate)
+            for candidate in (etag,) + tuple(etag + suffix for suffix in ENCODED_ETAG_SUFFIXES)
+        )
+    elif last_modified is not None and request.if_modified_since is not None:
+        # HTTP dates have one-second resolution
+        matched = last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    else:
+        matched = False
+
+    if not matched:
+        return None
+    return apply_cache_headers(Response(status=304), etag, last_modified)
+
+
+def apply_cache_headers(response: Response, etag: str, last_modified: Optional[datetime] = None) -> Response:
+    """Attach the validator and the public catalog caching policy.
+
+    Browsers revalidate on every use (cheap: a 304 skips serialization
+    entirely); shared caches such as a CDN may serve the response for
+    ``CATALOG_CDN_MAX_AGE`` seconds, and that long again while revalidating.
+    """
+
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    s_maxage = current_app.config.get("CATALOG_CDN_MAX_AGE", 30)
+    response.headers["Cache-Control"] = (
+        f"public, max-age=0, s-maxage={s_maxage}, stale-while-revalidate={s_maxage}"
+    )
+    return response
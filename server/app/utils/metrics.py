@@ -0,0 +1,299 @@
+"""Per-request metrics in Prometheus text format.
+
+:func:`init_metrics` hooks the request cycle and the SQLAlchemy engine and
+serves ``/api/metrics``:
+
+* ``http_request_duration_seconds`` histogram per blueprint/endpoint/method
+* ``http_requests_total`` by status code, ``http_requests_in_flight``
+* ``http_request_sql_queries`` histogram and ``sql_queries_total`` /
+  ``sql_seconds_total`` per endpoint
+* the shared LLM client's call latency, time to first token and counters
+* result cache, AI summary cache and password hashing counters, and the
+  active impact factor table version
+
+Every request costs a few ``perf_counter`` calls and one locked dict
+update; with ``METRICS_ENABLED`` off nothing is registered at all. Scrapes
+authenticate with ``Authorization: Bearer <METRICS_TOKEN>``; without a
+configured token the route answers 404, a missing or wrong one gets 401. Values
+are per worker process, like the in-memory cache: with several gunicorn
+workers each scrape sees the worker that answered it.
+"""
+from __future__ import annotations
+
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from flask import Flask, Response, current_app, g, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds (seconds) of the request latency buckets
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the statements-per-request buckets
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class LatencyHistogram:
+    """Cumulative-bucket latency histogram, Prometheus style."""
+
+    def __init__(self, buckets=REQUEST_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._counts[bisect_left(self.buckets, seconds)] += 1
+            self._sum += seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative = []
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            cumulative.append(("+Inf" if bound == float("inf") else bound, running))
+        return {"buckets": cumulative, "count": running, "sum": round(total, 6)}
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def render_histogram(name: str, snapshot: dict, labels: Labels = ()) -> List[str]:
+    lines = [
+        f"{name}_bucket{_format_labels(labels, [('le', str(bound))])} {count}"
+        for bound, count in snapshot["buckets"]
+    ]
+    lines.append(f"{name}_sum{_format_labels(labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.durations: Dict[Labels, LatencyHistogram] = {}
+        self.sql_per_request: Dict[Labels, LatencyHistogram] = {}
+        self.responses: Dict[Tuple[Labels, int], int] = defaultdict(int)
+        self.sql_queries: Dict[Labels, int] = defaultdict(int)
+        self.sql_seconds: Dict[Labels, float] = defaultdict(float)
+
+    def started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, labels: Labels, status: int, seconds: float, queries: int, sql_seconds: float) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.responses[(labels, status)] += 1
+            self.sql_queries[labels] += queries
+            self.sql_seconds[labels] += sql_seconds
+            durations = self.durations.get(labels)
+            if durations is None:
+                durations = self.durations[labels] = LatencyHistogram(REQUEST_BUCKETS)
+                self.sql_per_request[labels] = LatencyHistogram(SQL_COUNT_BUCKETS)
+            sql_histogram = self.sql_per_request[labels]
+        durations.observe(seconds)
+        sql_histogram.observe(queries)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            in_flight = self.in_flight
+            responses = sorted(self.responses.items())
+            sql_queries = sorted(self.sql_queries.items())
+            sql_seconds = sorted(self.sql_seconds.items())
+            durations = sorted(self.durations.items())
+            sql_per_request = sorted(self.sql_per_request.items())
+
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served by this worker.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {in_flight}",
+            "# HELP http_requests_total Responses by endpoint and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        lines += [
+            f"http_requests_total{_format_labels(labels, [('status', str(status))])} {count}"
+            for (labels, status), count in responses
+        ]
+        lines += [
+            "# HELP http_request_duration_seconds Time spent handling a request.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for labels, histogram in durations:
+            lines += render_histogram("http_request_duration_seconds", histogram.snapshot(), labels)
+        lines += [
+            "# HELP http_request_sql_queries SQL statements issued per request.",
+            "# TYPE http_request_sql_queries histogram",
+        ]
+        for labels, histogram in sql_per_request:
+            lines += render_histogram("http_request_sql_queries", histogram.snapshot(), labels)
+        lines += ["# HELP sql_queries_total SQL statements issued.", "# TYPE sql_queries_total counter"]
+        lines += [f"sql_queries_total{_format_labels(labels)} {count}" for labels, count in sql_queries]
+        lines += ["# HELP sql_seconds_total Time spent in SQL statements.", "# TYPE sql_seconds_total counter"]
+        lines += [f"sql_seconds_total{_format_labels(labels)} {round(total, 6)}" for labels, total in sql_seconds]
+        return lines
+
+
+def render_llm_metrics(stats: dict) -> List[str]:
+    """Prometheus lines for ``LLMClient.stats()``."""
+
+    lines = [
+        "# HELP llm_request_duration_seconds Upstream LLM call latency, retries included.",
+        "# TYPE llm_request_duration_seconds histogram",
+        *render_histogram("llm_request_duration_seconds", stats["latency_seconds"]),
+        "# HELP llm_time_to_first_token_seconds Time until the first streamed token.",
+        "# TYPE llm_time_to_first_token_seconds histogram",
+        *render_histogram("llm_time_to_first_token_seconds", stats["time_to_first_token_seconds"]),
+        "# HELP llm_events_total LLM client calls, retries and failures.",
+        "# TYPE llm_events_total counter",
+    ]
+    for name in ("calls", "retries", "failures", "short_circuited", "rejected"):
+        lines.append(f'llm_events_total{{event="{name}"}} {stats[name]}')
+    lines += [
+        "# HELP llm_circuit_open Whether the LLM circuit breaker is rejecting calls.",
+        "# TYPE llm_circuit_open gauge",
+        f"llm_circuit_open {0 if stats['circuit'] == 'closed' else 1}",
+    ]
+    return lines
+
+
+def render_service_metrics() -> List[str]:
+    """Prometheus lines for the in-process caches, the password hasher and
+    the impact factor table; cheap to collect (no database or Redis calls)."""
+
+    from .. import cache
+    from ..services import summary_cache
+    from ..services.password_service import get_password_hasher
+    from .sustainability import factors_version
+
+    results = cache.counters()
+    summaries = summary_cache.counters()
+    passwords = get_password_hasher().stats()
+    lines = [
+        "# HELP result_cache_events_total Result cache lookups and scope invalidations.",
+        "# TYPE result_cache_events_total counter",
+    ]
+    lines += [f'result_cache_events_total{{event="{name}"}} {count}' for name, count in sorted(results.items())]
+    lines += [
+        "# HELP ai_summary_cache_lookups_total AI summaries served from cache (hit) or requested from OpenAI (miss).",
+        "# TYPE ai_summary_cache_lookups_total counter",
+        f'ai_summary_cache_lookups_total{{result="hit"}} {summaries["hits"]}',
+        f'ai_summary_cache_lookups_total{{result="miss"}} {summaries["misses"]}',
+        "# HELP ai_summary_tokens_saved_total OpenAI tokens not spent thanks to cached summaries.",
+        "# TYPE ai_summary_tokens_saved_total counter",
+        f"ai_summary_tokens_saved_total {summaries['tokens_saved']}",
+        "# HELP password_hash_jobs_total Password hashing jobs by kind; rejected ones hit the slot limit.",
+        "# TYPE password_hash_jobs_total counter",
+    ]
+    lines += [
+        f'password_hash_jobs_total{{kind="{name}"}} {passwords[name]}'
+        for name in ("hashed", "verified", "rehashed", "rejected")
+    ]
+    lines += [
+        "# HELP password_hash_seconds_total Time callers spent waiting for pooled hashes.",
+        "# TYPE password_hash_seconds_total counter",
+        f"password_hash_seconds_total {passwords['seconds']}",
+        "# HELP password_hash_workers Password hashing processes per web worker (0 = inline).",
+        "# TYPE password_hash_workers gauge",
+        f"password_hash_workers {passwords['workers']}",
+        "# HELP impact_factors_info Active sustainability factor table.",
+        "# TYPE impact_factors_info gauge",
+        f"impact_factors_info{_format_labels((('version', factors_version()),))} 1",
+    ]
+    return lines
+
+
+metrics = RequestMetrics()
+
+_request_state = threading.local()
+
+
+def _on_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_request_state, "active", False):
+        conn.info.setdefault("metrics_query_started", []).append(time.perf_counter())
+
+
+def _on_after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_request_state, "active", False):
+        started = conn.info["metrics_query_started"].pop()
+        _request_state.queries += 1
+        _request_state.sql_seconds += time.perf_counter() - started
+
+
+def instrument_engine(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _on_before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _on_before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _on_after_cursor_execute)
+
+
+def init_metrics(app: Flask, engine: Engine) -> None:
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    instrument_engine(engine)
+
+    @app.before_request
+    def _start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        _request_state.active = True
+        _request_state.queries = 0
+        _request_state.sql_seconds = 0.0
+        metrics.started()
+
+    @app.after_request
+    def _note_response_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_request_metrics(exc):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return
+        _request_state.active = False
+        labels = (
+            ("blueprint", request.blueprint or ""),
+            ("endpoint", request.endpoint or "unmatched"),
+            ("method", request.method),
+        )
+        metrics.finished(
+            labels,
+            g.pop("metrics_status", 500),
+            time.perf_counter() - started,
+            _request_state.queries,
+            _request_state.sql_seconds,
+        )
+
+    @app.get("/api/metrics")
+    def prometheus_metrics():
+        from ..services.llm_client import get_llm_client
+
+        token = current_app.config.get("METRICS_TOKEN")
+        if not token:
+            return jsonify({"error": "Not found"}), 404
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+            return jsonify({"error": "Invalid metrics token"}), 401
+
+        lines = metrics.render() + render_llm_metrics(get_llm_client().stats()) + render_service_metrics()
+        return Response("\n".join(lines) + "\n", content_type=CONTENT_TYPE)
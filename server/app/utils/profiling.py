@@ -0,0 +1,308 @@
+"""On-demand request profiling.
+
+A request is profiled when any of these holds:
+
+* it carries ``X-Profile-Token`` made by :func:`sign_profile_token` (or
+  ``flask profile-token PATH``) for its path and not yet expired; tokens
+  are signed with ``PROFILING_SECRET`` and ignored while it is unset
+* an admin passes ``?_profile=1`` (or ``=cprofile`` / ``=sample``)
+* ``PROFILING_SAMPLE_EVERY = N`` is set and it is the N-th request
+
+Two profilers are available (``PROFILING_MODE`` or the query flag):
+``cprofile`` records every call on the request thread (exact, slower), and
+``sample`` snapshots the request thread's stack every
+``PROFILING_SAMPLE_INTERVAL_MS`` from a helper thread (cheap; written as
+folded stacks for flamegraph.pl or speedscope). Both also record SQL
+statements and outbound HTTP calls (:func:`record_span`) as timed spans.
+
+Each profile is a ``<id>.json`` summary plus a ``.prof`` (pstats) or
+``.folded`` data file in ``PROFILING_DIR``; only the newest
+``PROFILING_MAX_FILES`` are kept. Admins list and download them through
+``/api/admin/profiles``.
+"""
+from __future__ import annotations
+
+import cProfile
+import hashlib
+import hmac
+import io
+import itertools
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional
+
+import click
+from flask import Flask, current_app, g, request
+from flask.cli import with_appcontext
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+TOKEN_HEADER = "X-Profile-Token"
+QUERY_FLAG = "_profile"
+MODES = ("cprofile", "sample")
+
+_request_state = threading.local()
+_counter = itertools.count(1)
+
+
+def _secret() -> Optional[bytes]:
+    # deliberately no fallback to SECRET_KEY, whose default is public
+    secret = current_app.config.get("PROFILING_SECRET")
+    return secret.encode("utf-8") if secret else None
+
+
+def sign_profile_token(path: str, ttl_seconds: int = 300, now: Optional[float] = None) -> str:
+    """``X-Profile-Token`` value allowing ``path`` to be profiled for ``ttl_seconds``."""
+
+    secret = _secret()
+    if secret is None:
+        raise RuntimeError("PROFILING_SECRET is not set")
+    expires = int((now if now is not None else time.time()) + ttl_seconds)
+    signature = hmac.new(secret, f"{expires}:{path}".encode("utf-8"), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_profile_token(token: str, path: str) -> bool:
+    secret = _secret()
+    expires, _, signature = token.partition(".")
+    if secret is None or not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(secret, f"{expires}:{path}".encode("utf-8"), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+def _requested_by_admin() -> bool:
+    from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+    from .. import db
+    from ..models import User
+
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+        user = db.session.get(User, int(identity)) if identity is not None else None
+    except Exception:
+        return False
+    return bool(user and user.is_admin())
+
+
+class _StackSampler(threading.Thread):
+    """Collects the target thread's stack every ``interval`` seconds."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> Counter:
+        self._stopped.set()
+        self.join()
+        return self.stacks
+
+
+class RequestProfile:
+    def __init__(self, mode: str, trigger: str, interval: float):
+        self.mode = mode
+        self.trigger = trigger
+        self.started = time.perf_counter()
+        self.spans: List[dict] = []
+        self._profiler: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_StackSampler] = None
+        if mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._sampler = _StackSampler(threading.get_ident(), interval)
+            self._sampler.start()
+
+    def add_span(self, kind: str, name: str, started: float, seconds: float) -> None:
+        self.spans.append({
+            "kind": kind,
+            "name": name[:500],
+            "start_ms": round((started - self.started) * 1000, 3),
+            "duration_ms": round(seconds * 1000, 3),
+        })
+
+    def finish(self, directory: str, max_files: int, meta: dict) -> str:
+        elapsed = time.perf_counter() - self.started
+        profile_id = (
+            f"{datetime.utcnow():%Y%m%dT%H%M%S}-{(meta.get('endpoint') or 'unmatched').replace('.', '-')}"
+            f"-{uuid.uuid4().hex[:8]}"
+        )
+        os.makedirs(directory, exist_ok=True)
+        summary = dict(
+            meta,
+            id=profile_id,
+            mode=self.mode,
+            trigger=self.trigger,
+            duration_ms=round(elapsed * 1000, 3),
+            sql_ms=round(sum(s["duration_ms"] for s in self.spans if s["kind"] == "sql"), 3),
+            http_ms=round(sum(s["duration_ms"] for s in self.spans if s["kind"] == "http"), 3),
+            spans=self.spans,
+        )
+
+        if self._profiler is not None:
+            self._profiler.disable()
+            data_file = f"{profile_id}.prof"
+            self._profiler.dump_stats(os.path.join(directory, data_file))
+            text = io.StringIO()
+            pstats.Stats(self._profiler, stream=text).sort_stats("cumulative").print_stats(25)
+            summary["top"] = text.getvalue()
+        else:
+            stacks = self._sampler.stop()
+            data_file = f"{profile_id}.folded"
+            with open(os.path.join(directory, data_file), "w", encoding="utf-8") as handle:
+                for stack, count in stacks.most_common():
+                    handle.write(f"{stack} {count}\n")
+            summary["samples"] = sum(stacks.values())
+        summary["data_file"] = data_file
+
+        with open(os.path.join(directory, f"{profile_id}.json"), "w", encoding="utf-8") as handle:
+            json.dump(summary, handle, indent=2)
+        _rotate(directory, max_files)
+        return profile_id
+
+
+def _summary_names(directory: str) -> List[str]:
+    """``<id>.json`` names in ``directory``, oldest first."""
+
+    names = [name for name in os.listdir(directory) if name.endswith(".json")]
+    return sorted(names, key=lambda name: (os.path.getmtime(os.path.join(directory, name)), name))
+
+
+def _rotate(directory: str, max_files: int) -> None:
+    for name in _summary_names(directory)[:-max_files] if max_files > 0 else []:
+        stem = name[: -len(".json")]
+        for suffix in (".json", ".prof", ".folded"):
+            try:
+                os.remove(os.path.join(directory, stem + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(directory: str) -> List[dict]:
+    """Summaries of the stored profiles, newest first (without spans)."""
+
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in reversed(_summary_names(directory)):
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as handle:
+                summary = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        profiles.append({key: value for key, value in summary.items() if key not in ("spans", "top")})
+    return profiles
+
+
+def profile_directory(app: Flask) -> str:
+    return app.config.get("PROFILING_DIR") or os.path.join(app.instance_path, "profiles")
+
+
+def record_span(kind: str, name: str, started: float, seconds: float) -> None:
+    """Attach a timed span (``perf_counter`` start) to the profile of this request, if any."""
+
+    profile = getattr(_request_state, "profile", None)
+    if profile is not None:
+        profile.add_span(kind, name, started, seconds)
+
+
+def _on_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_request_state, "profile", None) is not None:
+        conn.info.setdefault("profile_query_started", []).append(time.perf_counter())
+
+
+def _on_after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_request_state, "profile", None) is not None and conn.info.get("profile_query_started"):
+        started = conn.info["profile_query_started"].pop()
+        record_span("sql", statement, started, time.perf_counter() - started)
+
+
+def _choose_trigger(app: Flask) -> Optional[tuple]:
+    mode = app.config.get("PROFILING_MODE", "sample")
+    token = request.headers.get(TOKEN_HEADER)
+    if token and verify_profile_token(token, request.path):
+        return "token", mode
+    flag = request.args.get(QUERY_FLAG)
+    if flag and _requested_by_admin():
+        return "admin", flag if flag in MODES else mode
+    every = app.config.get("PROFILING_SAMPLE_EVERY", 0)
+    if every and next(_counter) % every == 0:
+        return "sampled", mode
+    return None
+
+
+def init_profiling(app: Flask, engine: Engine) -> None:
+    if not app.config.get("PROFILING_ENABLED", True):
+        return
+    if not event.contains(engine, "before_cursor_execute", _on_before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _on_before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _on_after_cursor_execute)
+
+    @app.before_request
+    def _start_profile():
+        _request_state.profile = None
+        chosen = _choose_trigger(app)
+        if chosen is None:
+            return
+        trigger, mode = chosen
+        interval = app.config.get("PROFILING_SAMPLE_INTERVAL_MS", 5) / 1000
+        _request_state.profile = RequestProfile(mode, trigger, interval)
+
+    @app.after_request
+    def _note_profile_status(response):
+        if getattr(_request_state, "profile", None) is not None:
+            g.profile_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_profile(exc):
+        profile = getattr(_request_state, "profile", None)
+        if profile is None:
+            return
+        _request_state.profile = None
+        meta = {
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint,
+            "status": g.pop("profile_status", 500),
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        try:
+            profile.finish(profile_directory(app), app.config.get("PROFILING_MAX_FILES", 50), meta)
+        except OSError:
+            app.logger.exception("could not write request profile")
+
+
+@click.command("profile-token")
+@click.argument("path")
+@click.option("--ttl", default=300, show_default=True, help="Seconds the token stays valid.")
+@with_appcontext
+def profile_token_command(path, ttl):
+    """Print an X-Profile-Token header that profiles requests to PATH."""
+
+    try:
+        click.echo(f"{TOKEN_HEADER}: {sign_profile_token(path, ttl)}")
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
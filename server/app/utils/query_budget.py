@@ -0,0 +1,146 @@
+"""Per-request SQL budgets and N+1 detection.
+
+Views declare how many statements they may issue::
+
+    @product_bp.route('/orders', methods=['GET'])
+    @query_budget(2)
+    @jwt_required()
+    def get_my_orders(): ...
+
+(``query_budget`` goes directly under the route decorator so it marks the
+function Flask registers.) On tracked requests every statement is counted
+and reduced to its *shape* (bound values, IN-lists and literals folded
+away). A request fails the check when it exceeds its budget
+(``SQL_BUDGET_DEFAULT`` when undeclared, ``None`` for no limit) or repeats
+one shape ``SQL_REPEAT_THRESHOLD`` times - the signature of a lazy
+relationship loaded once per row.
+
+``SQL_BUDGET_MODE`` decides what happens:
+
+* ``raise`` (tests): the response raises :class:`QueryBudgetExceeded`
+* ``warn`` (development, production): a warning with the stack of the
+  offending statement is logged, for ``SQL_BUDGET_SAMPLE_RATE`` of requests
+  (all of them in development, 1% in production)
+* ``off`` (the base ``Config``): nothing is registered
+
+Only statements issued before the view returns are counted; rows pulled
+later by a streamed body are not.
+"""
+from __future__ import annotations
+
+import random
+import re
+import threading
+import traceback
+from collections import Counter
+from typing import Callable, List, Optional
+
+from flask import Flask, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_PARAM = re.compile(r"%\(\w+\)s|:\w+|\$\d+")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+
+_request_state = threading.local()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request issued more statements than its budget, or an N+1 pattern."""
+
+
+def query_budget(limit: Optional[int]) -> Callable:
+    """Declare the most SQL statements a view may issue per request."""
+
+    def decorator(view):
+        view.query_budget = limit
+        return view
+
+    return decorator
+
+
+def statement_shape(statement: str) -> str:
+    """``statement`` with bound values, IN-lists and literals folded away."""
+
+    shape = _STRING.sub("?", statement)
+    shape = _PARAM.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PARAM_LIST.sub("(?...)", shape)
+    return " ".join(shape.split())
+
+
+def _app_stack() -> str:
+    """Stack of the current statement, trimmed to this application's frames."""
+
+    frames = [
+        frame for frame in traceback.extract_stack()[:-3]
+        if "/app/" in frame.filename and "/utils/query_budget.py" not in frame.filename
+    ]
+    return "".join(traceback.format_list(frames[-8:])) or "".join(traceback.format_stack(limit=12))
+
+
+class _RequestQueries:
+    def __init__(self, budget: Optional[int], repeat_threshold: int):
+        self.budget = budget
+        self.repeat_threshold = repeat_threshold
+        self.count = 0
+        self.shapes: Counter = Counter()
+        self.problems: List[str] = []
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        shape = statement_shape(statement)
+        self.shapes[shape] += 1
+        if self.budget is not None and self.count == self.budget + 1:
+            self.problems.append(
+                f"statement {self.count} exceeds the budget of {self.budget}:\n  {shape}\n{_app_stack()}"
+            )
+        if self.shapes[shape] == self.repeat_threshold:
+            self.problems.append(
+                f"same statement issued {self.repeat_threshold} times (N+1?):\n  {shape}\n{_app_stack()}"
+            )
+
+
+def _on_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    tracked = getattr(_request_state, "queries", None)
+    if tracked is not None:
+        tracked.record(statement)
+
+
+def init_query_budget(app: Flask, engine: Engine) -> None:
+    mode = app.config.get("SQL_BUDGET_MODE", "off")
+    if mode == "off":
+        return
+    if mode not in ("raise", "warn"):
+        raise ValueError(f"SQL_BUDGET_MODE must be off, warn or raise, not {mode!r}")
+    if not event.contains(engine, "before_cursor_execute", _on_before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _on_before_cursor_execute)
+
+    @app.before_request
+    def _start_query_budget():
+        _request_state.queries = None
+        if mode == "warn" and random.random() >= app.config.get("SQL_BUDGET_SAMPLE_RATE", 1.0):
+            return
+        view = app.view_functions.get(request.endpoint)
+        budget = getattr(view, "query_budget", app.config.get("SQL_BUDGET_DEFAULT"))
+        _request_state.queries = _RequestQueries(budget, app.config.get("SQL_REPEAT_THRESHOLD", 5))
+
+    @app.after_request
+    def _check_query_budget(response):
+        tracked = getattr(_request_state, "queries", None)
+        _request_state.queries = None
+        if tracked is None or not tracked.problems:
+            return response
+        message = f"{request.method} {request.path} ({request.endpoint}) issued {tracked.count} statements; " + (
+            "\n".join(tracked.problems)
+        )
+        if mode == "raise":
+            raise QueryBudgetExceeded(message)
+        app.logger.warning("SQL budget: %s", message)
+        return response
+
+    @app.teardown_request
+    def _stop_query_budget(exc):
+        _request_state.queries = None
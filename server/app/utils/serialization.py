@@ -0,0 +1,146 @@
+"""Fast-path JSON for large list responses.
+
+``Model.to_dict()`` stays the reference shape. List endpoints that can
+return many rows instead select just the columns they need as tuples
+(``product_rows``), shape each row with ``product_row_to_dict`` and encode
+with orjson when it is installed (stdlib ``json`` otherwise). Unbounded
+lists can be streamed one chunk of rows at a time with ``stream_items``.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from flask import Response, stream_with_context
+from sqlalchemy import select
+
+from ..models import DEFAULT_PRODUCT_IMAGE_URL, Product, User
+from .sustainability import ImpactFactors, get_factors
+
+try:  # optional accelerator
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+STREAM_CHUNK_ROWS = 500
+
+# Keys a ``fields=`` argument may name, per resource
+PRODUCT_FIELDS = frozenset({
+    "id", "title", "description", "price", "condition", "category", "location",
+    "image_url", "is_donation", "owner_id", "created_at", "updated_at", "status",
+    "verified", "admin_notes", "co2_savings_per_purchase", "owner",
+})
+ORDER_FIELDS = frozenset({"id", "buyer_id", "product_id", "price", "purchased_at", "product"})
+
+
+def dumps(payload: Any) -> bytes:
+    """Encode ``payload`` as compact UTF-8 JSON."""
+
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    return Response(dumps(payload), status=status, mimetype="application/json")
+
+
+def stream_items(rows: Iterable[Any], shape: Callable[[Any], dict], **extra: Any) -> Response:
+    """Stream ``{"items": [...], **extra}`` without building the whole list.
+
+    ``rows`` should be a lazily-fetched result (e.g. ``yield_per``); rows
+    are shaped and encoded ``STREAM_CHUNK_ROWS`` at a time.
+    """
+
+    def generate() -> Iterator[bytes]:
+        yield b'{"items":['
+        separator = b""
+        chunk: list[bytes] = []
+        for row in rows:
+            chunk.append(dumps(shape(row)))
+            if len(chunk) >= STREAM_CHUNK_ROWS:
+                yield separator + b",".join(chunk)
+                separator, chunk = b",", []
+        if chunk:
+            yield separator + b",".join(chunk)
+        # splice the extra keys in after the array: ``],"key":...}``
+        yield b"]," + dumps(extra)[1:] if extra else b"]}"
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
+
+_PRODUCT_COLUMNS = (
+    Product.id,
+    Product.title,
+    Product.description,
+    Product.price,
+    Product.condition,
+    Product.category,
+    Product.location,
+    Product.image_url,
+    Product.is_donation,
+    Product.owner_id,
+    Product.created_at,
+    Product.updated_at,
+    Product.co2_savings,
+    Product.co2_factors_version,
+)
+_OWNER_COLUMNS = (User.email, User.name, User.role, User.created_at.label("owner_created_at"))
+
+
+def product_rows(include_owner: bool = True):
+    """``SELECT`` of exactly the columns ``product_row_to_dict`` reads, in
+    the order it unpacks them.
+
+    Add filters/ordering as with ``Product.query``; the owner columns come
+    from an outer join rather than a second object per row.
+    """
+
+    if not include_owner:
+        return select(*_PRODUCT_COLUMNS)
+    return select(*_PRODUCT_COLUMNS, *_OWNER_COLUMNS).outerjoin(User, User.id == Product.owner_id)
+
+
+def product_row_to_dict(row: Any, include_owner: bool = True, factors: Optional[ImpactFactors] = None) -> dict:
+    """Shape a ``product_rows()`` row exactly like ``Product.to_dict()``.
+
+    Pass ``factors`` (``get_factors()``) when shaping many rows so the
+    factor table is resolved once per response rather than per row.
+    """
+
+    (
+        product_id, title, description, price, condition, category, location,
+        image_url, is_donation, owner_id, created_at, updated_at, co2, co2_version,
+    ) = row[:14]
+    factors = factors or get_factors()
+    if co2 is None or co2_version != factors.version:
+        co2 = factors.estimate_co2(category, condition, is_donation)
+
+    data = {
+        "id": product_id,
+        "title": title,
+        "description": description,
+        "price": price,
+        "condition": condition,
+        "category": category,
+        "location": location,
+        "image_url": image_url or DEFAULT_PRODUCT_IMAGE_URL,
+        "is_donation": is_donation,
+        "owner_id": owner_id,
+        "created_at": created_at.isoformat() if created_at else None,
+        "updated_at": updated_at.isoformat() if updated_at else None,
+        "status": "approved",
+        "verified": True,
+        "admin_notes": None,
+        "co2_savings_per_purchase": round(co2, 2),
+    }
+    if include_owner:
+        email, name, role, owner_created_at = row[14:]
+        data["owner"] = None if email is None else {
+            "id": owner_id,
+            "email": email,
+            "name": name,
+            "role": role,
+            "created_at": owner_created_at.isoformat() if owner_created_at else None,
+        }
+    return data
@@ -1,33 +1,25 @@
 """Utility helpers for estimating sustainability impact metrics."""
 from __future__ import annotations
 
-from typing import Any
-
-# Baseline CO2 savings in kilograms for a typical circular purchase
-_BASELINE_SAVINGS_KG = 1.8
-
-# Multipliers tuned from average lifecycle assessments for different product categories
-_CATEGORY_FACTORS: dict[str, float] = {
-    "electronics": 1.6,
-    "furniture": 1.8,
-    "clothing": 1.4,
-    "footwear": 1.3,
-    "home & living": 1.5,
-    "education": 1.1,
-    "lifestyle": 1.2,
-}
-
-# Condition multipliers – better condition items avoid more emissions by delaying new production
-_CONDITION_FACTORS: dict[str, float] = {
-    "new": 1.0,
-    "brand new": 1.0,
-    "used - like new": 1.4,
-    "used - good": 1.3,
-    "used": 1.2,
-    "pre-loved": 1.25,
-}
-
-_DONATION_BONUS = 1.3  # donations often displace a full purchase
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Optional, Sequence, Tuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import case, func
+
+_logger = logging.getLogger(__name__)
+
+# Conditions that count as a first-hand (non-circular) purchase
+_NEW_CONDITIONS = ("new", "brand new")
+
+_DEFAULT_CATEGORY = "General"
+
+# Categories are free text, so cap the per-table estimate memo
+_MAX_MEMOISED_ESTIMATES = 4096
 
 
 def _normalise_key(value: Any) -> str:
@@ -36,6 +28,120 @@ def _normalise_key(value: Any) -> str:
     return value.strip().lower()
 
 
+class ImpactFactors:
+    """One compiled version of the impact factor tables.
+
+    Built from the JSON document in ``app/data/impact_factors.json`` (or
+    ``IMPACT_FACTORS_PATH``). Lookup keys are normalised once here and
+    per-combination estimates are memoised, so estimating is a dict hit.
+    """
+
+    def __init__(self, data: dict):
+        try:
+            self.version = str(data["version"])
+            self.baseline_savings_kg = float(data["baseline_savings_kg"])
+            self.category_factors = {
+                _normalise_key(key): float(value) for key, value in data["category_factors"].items()
+            }
+            self.condition_factors = {
+                _normalise_key(key): float(value) for key, value in data["condition_factors"].items()
+            }
+            self.default_category_factor = float(data.get("default_category_factor", 1.0))
+            self.default_condition_factor = float(data.get("default_condition_factor", 1.0))
+            self.donation_bonus = float(data.get("donation_bonus", 1.0))
+            impact = data.get("impact") or {}
+            self.co2_per_circular_order = float(impact["co2_per_circular_order"])
+            self.waste_per_order = float(impact["waste_per_order"])
+            self.trees_per_circular_order = float(impact["trees_per_circular_order"])
+        except (KeyError, TypeError, ValueError, AttributeError) as exc:
+            raise ValueError(f"invalid impact factor table: {exc}") from exc
+        self._estimates: dict[tuple, float] = {}
+
+    def estimate_co2(self, category: Any, condition: Any, is_donation: Any) -> float:
+        key = (_normalise_key(category), _normalise_key(condition), bool(is_donation))
+        value = self._estimates.get(key)
+        if value is None:
+            value = self.baseline_savings_kg
+            value *= self.category_factors.get(key[0], self.default_category_factor)
+            value *= self.condition_factors.get(key[1], self.default_condition_factor)
+            if key[2]:
+                value *= self.donation_bonus
+            value = max(round(value, 2), 0.0)
+            if len(self._estimates) < _MAX_MEMOISED_ESTIMATES:
+                self._estimates[key] = value
+        return value
+
+
+DEFAULT_FACTORS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "impact_factors.json")
+_DEFAULT_RELOAD_SECONDS = 30.0
+
+_factors_lock = threading.Lock()
+_factors: Optional[ImpactFactors] = None
+_factors_source: Optional[Tuple[str, float]] = None  # (path, mtime) last loaded
+_factors_checked_at = 0.0
+
+
+def _factors_setting(name: str, default: Any) -> Any:
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+def load_factors(path: Optional[str] = None) -> ImpactFactors:
+    """Read, validate and install a factor table. Raises ``ValueError`` (or
+    ``OSError``) and keeps the current table if the file is unusable."""
+
+    global _factors, _factors_source, _factors_checked_at
+    # an unset or empty IMPACT_FACTORS_PATH means the bundled table
+    path = path or _factors_setting("IMPACT_FACTORS_PATH", None) or DEFAULT_FACTORS_PATH
+    mtime = os.stat(path).st_mtime
+    with open(path, encoding="utf-8") as handle:
+        try:
+            factors = ImpactFactors(json.load(handle))
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"invalid impact factor table: {exc}") from exc
+    with _factors_lock:
+        _factors = factors
+        _factors_source = (path, mtime)
+        _factors_checked_at = time.monotonic()
+    return factors
+
+
+def get_factors() -> ImpactFactors:
+    """The active factor table, re-read when its file has changed.
+
+    The file is stat'ed at most every ``IMPACT_FACTORS_RELOAD_SECONDS``, so
+    edits reach running workers without a restart. A broken edit is logged
+    and the previous table stays in use.
+    """
+
+    global _factors_checked_at
+    factors = _factors
+    if factors is None:
+        return load_factors()
+
+    interval = _factors_setting("IMPACT_FACTORS_RELOAD_SECONDS", _DEFAULT_RELOAD_SECONDS)
+    now = time.monotonic()
+    if interval <= 0 or now - _factors_checked_at < interval:
+        return factors
+
+    with _factors_lock:
+        if now - _factors_checked_at < interval:
+            return _factors
+        _factors_checked_at = now
+        path, mtime = _factors_source
+    try:
+        if os.stat(path).st_mtime != mtime:
+            return load_factors(path)
+    except (OSError, ValueError) as exc:
+        _logger.error("Keeping impact factors %s; reload failed: %s", factors.version, exc)
+    return _factors
+
+
+def factors_version() -> str:
+    return get_factors().version
+
+
 def estimate_product_co2_per_purchase(product: Any) -> float:
     """Estimate kilograms of CO2 saved when this product is reused once.
 
@@ -46,11 +152,74 @@ def estimate_product_co2_per_purchase(product: Any) -> float:
     if product is None:
         return 0.0
 
-    category_factor = _CATEGORY_FACTORS.get(_normalise_key(getattr(product, "category", "")), 1.0)
-    condition_factor = _CONDITION_FACTORS.get(_normalise_key(getattr(product, "condition", "")), 1.1)
+    return get_factors().estimate_co2(
+        getattr(product, "category", ""),
+        getattr(product, "condition", ""),
+        getattr(product, "is_donation", False),
+    )
+
+
+def estimate_co2_batch(
+    categories: Sequence[Any],
+    conditions: Sequence[Any],
+    donations: Sequence[Any],
+) -> list[float]:
+    """:func:`estimate_product_co2_per_purchase` over columns.
+
+    Takes parallel sequences of category, condition and is_donation values
+    and returns a list. Each distinct combination is estimated once, so
+    results match the per-product function exactly.
+    """
+
+    factors = get_factors()
+    if not len(categories) == len(conditions) == len(donations):
+        raise ValueError("category, condition and donation columns differ in length")
+
+    memo: dict[tuple, float] = {}
+    results = []
+    for key in zip(categories, conditions, (bool(flag) for flag in donations)):
+        value = memo.get(key)
+        if value is None:
+            value = memo[key] = factors.estimate_co2(*key)
+        results.append(value)
+    return results
+
+
+def is_circular_product(product: Any) -> bool:
+    """Whether buying ``product`` counts as a circular (reuse) purchase."""
 
-    value = _BASELINE_SAVINGS_KG * category_factor * condition_factor
+    if product is None:
+        return False
     if getattr(product, "is_donation", False):
-        value *= _DONATION_BONUS
+        return True
+    condition = (getattr(product, "condition", None) or "").lower()
+    return condition not in _NEW_CONDITIONS
+
+
+def impact_category(product: Any) -> str:
+    """Category label used when bucketing purchases for impact reports."""
+
+    if product is None:
+        return _DEFAULT_CATEGORY
+    return getattr(product, "category", None) or _DEFAULT_CATEGORY
+
+
+def circular_product_sql(product_table: Any) -> Any:
+    """SQL expression mirroring :func:`is_circular_product` (1 or 0).
+
+    ``product_table`` is the mapped ``Product`` class or an alias of it; rows
+    where the outer-joined product is missing evaluate to 0.
+    """
+
+    return case(
+        (product_table.id.is_(None), 0),
+        (product_table.is_donation.is_(True), 1),
+        (func.lower(func.coalesce(product_table.condition, "")).in_(_NEW_CONDITIONS), 0),
+        else_=1,
+    )
+
+
+def impact_category_sql(product_table: Any) -> Any:
+    """SQL expression mirroring :func:`impact_category`."""
 
-    return max(round(value, 2), 0.0)
+    return func.coalesce(func.nullif(product_table.category, ""), _DEFAULT_CATEGORY)
@@ -0,0 +1,5 @@
+"""Standalone performance benchmarks.
+
+Run from ``server/`` with ``python -m benchmarks.<name>``; each prints a
+JSON report to stdout.
+"""
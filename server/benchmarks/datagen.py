@@ -0,0 +1,255 @@
+"""Synthetic marketplace generator for benchmarks.
+
+    python -m benchmarks.datagen --scale 100k --database-url sqlite:////tmp/bench.db
+
+Fills an empty database with users, products, orders and chat messages
+using batched Core INSERTs (no ORM objects, no per-row flush), then
+rebuilds the derived tables (impact buckets, search index). ``--scale``
+sets the product, order and message counts; users are a tenth of that.
+Every table can be sized separately with ``--users`` etc. Output is
+deterministic for a given ``--seed``: ids are assigned explicitly, so
+benchmark fixtures (user 1 is an admin, user 2 a vendor, user 3 a buyer
+with orders and chat history) are stable between runs.
+
+All users share the password :data:`PASSWORD`.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text
+
+from app import create_app, db
+from app.models import ChatMessage, Order, Product, User
+from app.services.impact_service import rebuild_user_impact
+from app.services.password_service import hash_password
+from app.services.search_service import ensure_search_index, rebuild_search_index
+from app.utils.sustainability import estimate_co2_batch, factors_version
+from config import ProductionConfig
+
+PASSWORD = "benchmark-password"
+BATCH_ROWS = 10_000
+
+ADMIN_ID, VENDOR_ID, BUYER_ID = 1, 2, 3
+
+CATEGORIES = ("Electronics", "Furniture", "Clothing", "Footwear", "Home & Living", "Education", "Lifestyle")
+CONDITIONS = ("New", "Used - Like New", "Used - Good", "Used", "Pre-loved")
+LOCATIONS = ("Nairobi", "Mombasa", "Kisumu", "Nakuru", "Eldoret", "Thika")
+NOUNS = ("chair", "table", "jacket", "lamp", "phone", "laptop", "sofa", "bookshelf", "sneakers", "kettle")
+ADJECTIVES = ("vintage", "solid", "compact", "refurbished", "handmade", "classic", "sturdy", "modern")
+
+
+def parse_count(value: str) -> int:
+    """``"10k"`` -> 10000, ``"1.5m"`` -> 1500000."""
+
+    value = value.strip().lower().replace("_", "")
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    if multiplier != 1:
+        value = value[:-1]
+    return int(float(value) * multiplier)
+
+
+def plan(scale: int, users=None, products=None, orders=None, messages=None) -> dict:
+    """Row counts per table for ``scale``; explicit counts win."""
+
+    return {
+        "users": max(users if users is not None else scale // 10, 50),
+        "products": products if products is not None else scale,
+        "orders": orders if orders is not None else scale,
+        "messages": messages if messages is not None else scale,
+    }
+
+
+def _insert(table, rows):
+    if rows:
+        db.session.execute(table.insert(), rows)
+
+
+def _batched(total, make_row):
+    batch = []
+    for index in range(1, total + 1):
+        batch.append(make_row(index))
+        if len(batch) == BATCH_ROWS:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _product_price(product_id: int) -> float:
+    return float((product_id * 7919) % 20_000) / 2
+
+
+def _generate_users(count, now, password_hash):
+    vendors_every = 10
+
+    def make(index):
+        role = "admin" if index == ADMIN_ID else "vendor" if index == VENDOR_ID or index % vendors_every == 0 else "buyer"
+        return {
+            "id": index,
+            "email": f"user{index}@bench.example.com",
+            "name": f"User {index}",
+            "password_hash": password_hash,
+            "role": role,
+            "created_at": now - timedelta(days=400) + timedelta(seconds=index),
+        }
+
+    for batch in _batched(count, make):
+        _insert(User.__table__, batch)
+    return [VENDOR_ID] + list(range(vendors_every, count + 1, vendors_every))
+
+
+def _generate_products(count, vendor_ids, now, rng):
+    version = factors_version()
+    start = now - timedelta(days=365)
+    step = timedelta(days=365) / max(count, 1)
+
+    def make(index):
+        noun = rng.choice(NOUNS)
+        return {
+            "id": index,
+            "title": f"{rng.choice(ADJECTIVES).title()} {noun} #{index}",
+            "description": f"A {rng.choice(ADJECTIVES)} {noun}, collected from the seller in {rng.choice(LOCATIONS)}.",
+            "price": _product_price(index),
+            "condition": rng.choice(CONDITIONS),
+            "category": rng.choice(CATEGORIES),
+            "location": rng.choice(LOCATIONS),
+            "is_donation": rng.random() < 0.1,
+            # the benchmark vendor owns every 20th product
+            "owner_id": VENDOR_ID if index % 20 == 0 else rng.choice(vendor_ids),
+            "created_at": start + step * index,
+            "updated_at": start + step * index,
+        }
+
+    for batch in _batched(count, make):
+        estimates = estimate_co2_batch(
+            [row["category"] for row in batch],
+            [row["condition"] for row in batch],
+            [row["is_donation"] for row in batch],
+        )
+        for row, estimate in zip(batch, estimates):
+            row["co2_savings"] = float(estimate)
+            row["co2_factors_version"] = version
+        _insert(Product.__table__, batch)
+
+
+def _generate_orders(count, users, products, now, rng):
+    start = now - timedelta(days=365)
+
+    def make(index):
+        # the benchmark buyer places one order in fifty
+        buyer = BUYER_ID if index % 50 == 0 else rng.randint(1, users)
+        product = rng.randint(1, products)
+        return {
+            "id": index,
+            "buyer_id": buyer,
+            "product_id": product,
+            "price": _product_price(product),
+            "purchased_at": start + timedelta(seconds=rng.randint(0, 365 * 86_400)),
+        }
+
+    for batch in _batched(count, make):
+        _insert(Order.__table__, batch)
+
+
+def _generate_messages(count, users, now, rng):
+    chatty = max(users // 10, 1)
+    start = now - timedelta(days=90)
+    step = timedelta(days=90) / max(count, 1)
+
+    def make(index):
+        user = BUYER_ID if index % 10 == 0 else rng.randint(1, chatty)
+        role = "user" if index % 2 else "assistant"
+        content = (
+            f"Do you have a {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} near {rng.choice(LOCATIONS)}?"
+            if role == "user"
+            else f"Yes - try the {rng.choice(CATEGORIES).lower()} listings; reuse saves CO2."
+        )
+        return {"id": index, "user_id": user, "role": role, "content": content, "created_at": start + step * index}
+
+    for batch in _batched(count, make):
+        _insert(ChatMessage.__table__, batch)
+
+
+def _sync_sequences():
+    """Advance Postgres id sequences past the explicit ids just inserted."""
+
+    if db.engine.dialect.name != "postgresql":
+        return
+    for table in ("users", "products", "orders", "chat_messages"):
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 1)) FROM {table}"
+        ))
+
+
+def generate(counts: dict, seed: int = 42) -> dict:
+    """Populate the (empty) database bound to the current app; returns timings."""
+
+    if db.session.scalar(select(func.count()).select_from(User)):
+        raise RuntimeError("database already has users; generate into an empty database")
+
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    timings = {}
+
+    started = time.perf_counter()
+    vendor_ids = _generate_users(counts["users"], now, hash_password(PASSWORD))
+    timings["users"] = time.perf_counter() - started
+
+    for name, step in (
+        ("products", lambda: _generate_products(counts["products"], vendor_ids, now, rng)),
+        ("orders", lambda: _generate_orders(counts["orders"], counts["users"], counts["products"], now, rng)),
+        ("messages", lambda: _generate_messages(counts["messages"], counts["users"], now, rng)),
+    ):
+        started = time.perf_counter()
+        step()
+        db.session.commit()
+        timings[name] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    _sync_sequences()
+    rebuild_user_impact()
+    ensure_search_index()
+    rebuild_search_index()
+    db.session.commit()
+    timings["derived"] = time.perf_counter() - started
+    return {name: round(seconds, 3) for name, seconds in timings.items()}
+
+
+def bench_app(database_url: str, **overrides):
+    """App on ``database_url`` with production settings minus the dev/test hooks."""
+
+    settings = {
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "SQL_BUDGET_MODE": "off",
+        "PROFILING_ENABLED": False,
+        "PASSWORD_HASH_WORKERS": 0,
+        **overrides,
+    }
+    return create_app(type("BenchmarkConfig", (ProductionConfig,), settings))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--scale", type=parse_count, default=10_000)
+    for table in ("users", "products", "orders", "messages"):
+        parser.add_argument(f"--{table}", type=parse_count)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    counts = plan(args.scale, args.users, args.products, args.orders, args.messages)
+    app = bench_app(args.database_url, BCRYPT_LOG_ROUNDS=args.bcrypt_rounds)
+    with app.app_context():
+        db.create_all()
+        timings = generate(counts, args.seed)
+    json.dump({"benchmark": "datagen", "rows": counts, "seconds": timings}, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
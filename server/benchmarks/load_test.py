@@ -0,0 +1,168 @@
+"""Throughput of the gunicorn deployment as the worker count grows.
+
+    python -m benchmarks.load_test --workers 1,2,4 --duration 10
+
+Builds a SQLite (WAL) catalog of ``--rows`` products in a temp directory,
+then for each worker count starts gunicorn with ``gunicorn.conf.py`` and
+drives ``--path`` from ``--concurrency`` keep-alive client threads for
+``--duration`` seconds. Reports requests/second and latency percentiles.
+The client shares the machine with the server, so run it on a host with
+spare cores (or point ``--url`` at a remote deployment) for clean numbers.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from app import create_app, db
+from config import ProductionConfig
+
+from .serialization import _populate
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _build_database(path, rows):
+    uri = f"sqlite:///{path}"
+    app = create_app(type("LoadTestConfig", (ProductionConfig,), {"SQLALCHEMY_DATABASE_URI": uri}))
+    with app.app_context():
+        db.create_all()
+        _populate(rows)
+        db.engine.dispose()
+    return uri
+
+
+def _start_server(uri, workers, threads, port):
+    env = dict(
+        os.environ,
+        DATABASE_URL=uri,
+        FLASK_ENV="production",
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_THREADS=str(threads),
+        PORT=str(port),
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--access-logfile", "/dev/null", "--log-level", "warning"],
+        cwd=SERVER_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base}/api/health", timeout=1).ok:
+                return process, base
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start")
+
+
+def drive(url, concurrency, duration):
+    """Hit ``url`` from ``concurrency`` threads; return throughput and latencies."""
+
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def _client():
+        session = requests.Session()
+        local = []
+        failed = 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                response = session.get(url, timeout=30)
+                response.content
+                if response.status_code != 200:
+                    failed += 1
+            except requests.RequestException:
+                failed += 1
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=_client) for _ in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+
+    def _pct(q):
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 1) if latencies else None
+
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": _pct(0.50),
+        "p95_ms": _pct(0.95),
+        "p99_ms": _pct(0.99),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--threads", type=int, default=4, help="threads per worker")
+    parser.add_argument("--rows", type=int, default=5_000)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--path", default="/api/products/?limit=20")
+    parser.add_argument("--url", help="benchmark an already running server instead")
+    args = parser.parse_args(argv)
+
+    results = []
+    if args.url:
+        results.append({"url": args.url, **drive(args.url + args.path, args.concurrency, args.duration)})
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            uri = _build_database(os.path.join(tmp, "load.db"), args.rows)
+            for workers in (int(value) for value in args.workers.split(",")):
+                process, base = _start_server(uri, workers, args.threads, _free_port())
+                try:
+                    drive(base + args.path, args.concurrency, 1.0)  # warm up
+                    results.append({
+                        "workers": workers,
+                        "threads": args.threads,
+                        **drive(base + args.path, args.concurrency, args.duration),
+                    })
+                finally:
+                    process.terminate()
+                    process.wait(timeout=30)
+
+    json.dump(
+        {
+            "benchmark": "load_test",
+            "path": args.path,
+            "concurrency": args.concurrency,
+            "cpus": os.cpu_count(),
+            "results": results,
+        },
+        sys.stdout,
+        indent=2,
+    )
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
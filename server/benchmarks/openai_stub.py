@@ -0,0 +1,111 @@
+"""Local stand-in for the OpenAI chat completions endpoint.
+
+    python -m benchmarks.openai_stub --port 8089 --latency-ms 300
+
+Answers plain and ``stream: true`` requests with fixed content after
+``latency`` seconds (per token chunk when streaming: ``chunk_delay``), so
+route timings measure this app rather than the network or the model.
+:func:`use_stub` points the chat and insight services at a running stub.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INSIGHT_CONTENT = json.dumps({
+    "environmentalImpact": "Your second-hand purchases kept furniture and electronics in use.",
+    "recommendedActions": ["Keep buying pre-loved", "Donate what you no longer use", "Repair before replacing"],
+})
+STREAM_CHUNKS = ("Pre-loved ", "furniture ", "is ", "a ", "great ", "choice.")
+
+
+class OpenAIStub:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, chunk_delay=0.0):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.calls = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                stub.calls += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if payload.get("stream"):
+                    return self._stream()
+                body = json.dumps({
+                    "choices": [{"message": {"role": "assistant", "content": INSIGHT_CONTENT}}],
+                    "usage": {"prompt_tokens": 120, "completion_tokens": 40, "total_tokens": 160},
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for chunk in STREAM_CHUNKS:
+                    if stub.chunk_delay:
+                        time.sleep(stub.chunk_delay)
+                    event = {"choices": [{"delta": {"content": chunk}}]}
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}/v1/chat/completions"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def use_stub(url: str) -> None:
+    """Send this process's OpenAI calls to ``url``."""
+
+    from app.services import ai_service, chat_service
+    from app.services.llm_client import reset_llm_client
+
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark-key")
+    ai_service.OPENAI_URL = url
+    chat_service.OPENAI_URL = url
+    reset_llm_client()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--chunk-delay-ms", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    stub = OpenAIStub(args.host, args.port, args.latency_ms / 1000, args.chunk_delay_ms / 1000)
+    print(f"OpenAI stub listening on {stub.url}", flush=True)
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
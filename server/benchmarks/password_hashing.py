@@ -0,0 +1,81 @@
+"""bcrypt verification throughput, inline and through the process pool.
+
+    python -m benchmarks.password_hashing --rounds 10,12 --seconds 5
+
+For each cost, reports logins (password checks) per second done inline on
+one thread, and through a ``PasswordHasher`` pool of ``--workers``
+processes driven by twice as many client threads, each also divided by
+the number of cores used.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from app.services.password_service import PasswordHasher, _check, _hash
+
+
+def _inline(stored, seconds):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        _check(stored, "password123", False)
+        count += 1
+    return count / seconds
+
+
+def _pooled(stored, seconds, workers):
+    hasher = PasswordHasher(workers=workers, queue_depth=2, wait_seconds=60)
+    hasher.check(stored, "password123")  # start the pool
+    counts = []
+    deadline = time.perf_counter() + seconds
+
+    def _client():
+        count = 0
+        while time.perf_counter() < deadline:
+            hasher.check(stored, "password123")
+            count += 1
+        counts.append(count)
+
+    threads = [threading.Thread(target=_client) for _ in range(workers * 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    hasher.shutdown()
+    return sum(counts) / seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", default="10,12", help="comma-separated bcrypt costs")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    cores_used = min(args.workers, os.cpu_count() or 1)
+    results = []
+    for rounds in (int(value) for value in args.rounds.split(",")):
+        stored = _hash("password123", rounds, b"2b", False)
+        inline = _inline(stored, args.seconds)
+        pooled = _pooled(stored, args.seconds, args.workers)
+        results.append({
+            "rounds": rounds,
+            "inline_logins_per_second": round(inline, 1),
+            "pool_logins_per_second": round(pooled, 1),
+            "pool_logins_per_second_per_core": round(pooled / cores_used, 1),
+            "ms_per_login": round(1000 / inline, 1),
+        })
+
+    json.dump(
+        {"benchmark": "password_hashing", "cpus": os.cpu_count(), "workers": args.workers, "results": results},
+        sys.stdout,
+        indent=2,
+    )
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
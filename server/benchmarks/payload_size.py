@@ -0,0 +1,63 @@
+"""Measure response bytes for sparse fieldsets and content codings.
+
+    python -m benchmarks.payload_size --rows 10000 --limit 100
+
+Fetches one catalog page through the test client with and without
+``fields=`` and with ``identity``, ``gzip`` and (if installed) ``br``
+encodings, reporting the body size of each combination.
+"""
+import argparse
+import json
+import sys
+
+from app import create_app, db
+from app.utils.compression import available_encodings
+from config import TestingConfig
+
+from .serialization import _populate
+
+FIELDSETS = {
+    "all": None,
+    "card": "id,title,price,image_url,category,location",
+    "card+owner": "id,title,price,image_url,owner",
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        _populate(args.rows)
+
+    client = app.test_client()
+    results = []
+    for label, fields in FIELDSETS.items():
+        query = {"limit": args.limit}
+        if fields:
+            query["fields"] = fields
+        for encoding in ("identity",) + available_encodings():
+            response = client.get("/api/products/", query_string=query, headers={"Accept-Encoding": encoding})
+            results.append({
+                "fields": label,
+                "encoding": response.headers.get("Content-Encoding", "identity"),
+                "bytes": len(response.data),
+            })
+
+    baseline = results[0]["bytes"]
+    for result in results:
+        result["ratio"] = round(result["bytes"] / baseline, 3)
+    json.dump(
+        {"benchmark": "payload_size", "rows": args.rows, "limit": args.limit, "results": results},
+        sys.stdout,
+        indent=2,
+    )
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Repeatable timings for every API route on a synthetic marketplace.
+
+    python -m benchmarks.routes --scale 100k --iterations 30 --output results.json
+    python -m benchmarks.routes --scale 100k --baseline results.json
+
+Generates a marketplace with :mod:`benchmarks.datagen` (into a temporary
+SQLite file unless ``--database-url`` points at an existing, already
+generated database with ``--reuse``), answers OpenAI calls from the local
+:mod:`benchmarks.openai_stub`, then drives each route through the Flask
+test client: ``--warmup`` untimed calls, then ``--iterations`` timed ones.
+Per route it reports latency percentiles, the SQL statement count and the
+status codes seen. ``--output`` saves the run as JSON (with the commit it
+was taken at); ``--baseline`` prints the p50 ratio against a saved run.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, func, select
+
+from app import cache, db
+from app.models import Product, User
+
+from .datagen import ADMIN_ID, BUYER_ID, PASSWORD, VENDOR_ID, bench_app, generate, parse_count, plan
+from .openai_stub import OpenAIStub, use_stub
+
+
+def _headers(user_id):
+    return {"Authorization": f"Bearer {create_access_token(identity=str(user_id))}"}
+
+
+def _disposable_product():
+    """Insert a product for a destructive case; returns its id."""
+
+    now = datetime.utcnow()
+    product = Product(title="Disposable lamp", price=10.0, category="Lifestyle", owner_id=VENDOR_ID, created_at=now)
+    db.session.add(product)
+    db.session.commit()
+    return product.id
+
+
+def route_cases(state):
+    """``(name, method, prepare)``; ``prepare(i)`` runs untimed and returns ``(path, request kwargs)``."""
+
+    admin, vendor, buyer = _headers(ADMIN_ID), _headers(VENDOR_ID), _headers(BUYER_ID)
+    products = state["products"]
+    run = state["run"]
+
+    def fixed(path, **kwargs):
+        return lambda i: (path, kwargs)
+
+    def cold(scope, path, **kwargs):
+        def prepare(i):
+            cache.invalidate(scope)
+            return path, kwargs
+        return prepare
+
+    def checkout(i):
+        product_id = 1 + (i * 7_919) % products
+        return "/api/products/orders", {"json": {"items": [{"product_id": product_id}]}, "headers": buyer}
+
+    def summary(i):
+        return f"/api/insights/summary/{state['summary_job']}", {"headers": buyer}
+
+    return [
+        # products: reads
+        ("products.list", "GET", fixed("/api/products/?limit=20")),
+        ("products.list_filtered", "GET", fixed("/api/products/?limit=20&category=Furniture&location=Nairobi")),
+        ("products.list_fields", "GET", fixed("/api/products/?limit=100&fields=id,title,price")),
+        ("products.search", "GET", fixed("/api/products/search?q=vintage+chair&limit=20")),
+        ("products.detail", "GET", lambda i: (f"/api/products/{1 + (i * 104_729) % products}", {})),
+        ("products.mine", "GET", fixed("/api/products/mine", headers=vendor)),
+        ("products.orders", "GET", fixed("/api/products/orders", headers=buyer)),
+        ("products.stats_cold", "GET", cold(f"user:{BUYER_ID}", "/api/products/stats", headers=buyer)),
+        ("products.stats_cached", "GET", fixed("/api/products/stats", headers=buyer)),
+        ("products.platform_stats_cold", "GET", cold("platform", "/api/products/stats/platform", headers=admin)),
+        # insights
+        ("insights.analyze_cold", "POST", cold(f"user:{BUYER_ID}", "/api/insights/", json={"timeframe_days": 90}, headers=buyer)),
+        ("insights.summary", "GET", summary),
+        # auth
+        ("auth.login", "POST", fixed("/api/auth/login", json={"email": f"user{BUYER_ID}@bench.example.com", "password": PASSWORD})),
+        ("auth.me", "GET", fixed("/api/auth/me", headers=buyer)),
+        ("auth.signup", "POST", lambda i: ("/api/auth/signup", {"json": {"email": f"new-{run}-{i}@bench.example.com", "password": PASSWORD}})),
+        # chat
+        ("chat.messages", "GET", fixed("/api/chat/messages?limit=50", headers=buyer)),
+        ("chat.send", "POST", fixed("/api/chat/send", json={"message": "Any sofas in Nairobi?"}, headers=buyer)),
+        ("chat.stream", "POST", fixed("/api/chat/stream", json={"message": "And lamps?"}, headers=buyer)),
+        # products: writes
+        ("products.create", "POST", lambda i: ("/api/products/", {"json": {"title": f"Bench chair {run}-{i}", "price": 25, "category": "Furniture"}, "headers": vendor})),
+        ("products.update", "PUT", lambda i: (f"/api/products/{state['vendor_product']}", {"json": {"price": 30 + i % 7}, "headers": vendor})),
+        ("products.delete", "DELETE", lambda i: (f"/api/products/{_disposable_product()}", {"headers": vendor})),
+        ("products.checkout", "POST", checkout),
+        ("chat.clear", "DELETE", fixed("/api/chat/clear", headers=buyer)),
+    ]
+
+
+def _settled_summary_job(client, headers, timeout=10.0):
+    """Start the buyer's background AI summary and wait for it to finish."""
+
+    ai = client.post("/api/insights/", json={"timeframe_days": 90}, headers=headers).get_json()["insights"]["ai"]
+    job_id = ai.get("job_id")
+    deadline = time.monotonic() + timeout
+    while job_id and ai.get("status") == "pending" and time.monotonic() < deadline:
+        time.sleep(0.05)
+        ai = client.get(f"/api/insights/summary/{job_id}", headers=headers).get_json()["ai"]
+    return job_id or "missing"
+
+
+class _StatementCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, *args):
+        self.count += 1
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def time_case(client, counter, method, prepare, warmup, iterations):
+    seconds, statements, statuses = [], [], {}
+    for index in range(warmup + iterations):
+        path, kwargs = prepare(index)
+        before = counter.count
+        started = time.perf_counter()
+        response = client.open(path, method=method, **kwargs)
+        response.get_data()  # drain streamed bodies inside the timing
+        elapsed = time.perf_counter() - started
+        response.close()
+        if index < warmup:
+            continue
+        seconds.append(elapsed)
+        statements.append(counter.count - before)
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+    return {
+        "p50_ms": round(statistics.median(seconds) * 1000, 3),
+        "p95_ms": round(_percentile(seconds, 0.95) * 1000, 3),
+        "mean_ms": round(statistics.fmean(seconds) * 1000, 3),
+        "min_ms": round(min(seconds) * 1000, 3),
+        "sql_statements": statistics.median(statements),
+        "statuses": statuses,
+    }
+
+
+def _git_revision():
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--", "."], capture_output=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return revision + ("-dirty" if dirty.strip() else "")
+
+
+def compare(baseline, current):
+    """Lines comparing p50 latency and statement counts with a saved run."""
+
+    previous = {row["route"]: row for row in baseline["results"]}
+    lines = [f"{'route':32} {'base p50':>10} {'p50':>10} {'ratio':>7} {'sql':>9}"]
+    for row in current["results"]:
+        old = previous.get(row["route"])
+        if old is None:
+            lines.append(f"{row['route']:32} {'-':>10} {row['p50_ms']:>10.2f} {'new':>7}")
+            continue
+        ratio = row["p50_ms"] / old["p50_ms"] if old["p50_ms"] else float("inf")
+        sql = f"{old['sql_statements']:g}->{row['sql_statements']:g}"
+        flag = "  <-- slower" if ratio > 1.2 else ""
+        lines.append(f"{row['route']:32} {old['p50_ms']:>10.2f} {row['p50_ms']:>10.2f} {ratio:>7.2f} {sql:>9}{flag}")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=parse_count, default=10_000)
+    for table in ("users", "products", "orders", "messages"):
+        parser.add_argument(f"--{table}", type=parse_count)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--reuse", action="store_true", help="skip generation; the database is already populated")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--only", help="comma-separated route names (prefix match)")
+    parser.add_argument("--output", help="write the JSON results here as well as to stdout")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    args = parser.parse_args(argv)
+
+    tmp = None
+    database_url = args.database_url
+    if database_url is None:
+        tmp = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+
+    stub = OpenAIStub(latency=args.llm_latency_ms / 1000).start()
+    use_stub(stub.url)
+    counts = plan(args.scale, args.users, args.products, args.orders, args.messages)
+    app = bench_app(database_url, BCRYPT_LOG_ROUNDS=args.bcrypt_rounds)
+    results = []
+    try:
+        with app.app_context():
+            generated = None
+            if not args.reuse:
+                db.create_all()
+                generated = generate(counts)
+            counts = {
+                "users": db.session.scalar(select(func.count()).select_from(User)),
+                "products": db.session.scalar(select(func.count()).select_from(Product)),
+                "orders": counts["orders"],
+                "messages": counts["messages"],
+            }
+            vendor_product = db.session.scalar(
+                select(Product.id).where(Product.owner_id == VENDOR_ID).order_by(Product.id).limit(1)
+            )
+            client = app.test_client()
+            buyer = _headers(BUYER_ID)
+            state = {
+                "products": counts["products"],
+                "vendor_product": vendor_product,
+                "summary_job": _settled_summary_job(client, buyer),
+                "run": datetime.utcnow().strftime("%Y%m%d%H%M%S%f"),
+            }
+            counter = _StatementCounter(db.engine)
+            only = tuple(args.only.split(",")) if args.only else None
+            for name, method, prepare in route_cases(state):
+                if only and not name.startswith(only):
+                    continue
+                timing = time_case(client, counter, method, prepare, args.warmup, args.iterations)
+                results.append({"route": name, "method": method, **timing})
+                print(f"{name:32} p50 {timing['p50_ms']:9.2f} ms  sql {timing['sql_statements']:g}", file=sys.stderr)
+            db.engine.dispose()
+    finally:
+        stub.close()
+        if tmp is not None:
+            tmp.cleanup()
+
+    report = {
+        "benchmark": "routes",
+        "revision": _git_revision(),
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "database": database_url.split(":", 1)[0],
+        "rows": counts,
+        "generate_seconds": generated,
+        "iterations": args.iterations,
+        "llm_latency_ms": args.llm_latency_ms,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    sys.stdout.write(text + "\n")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            print("\n".join(compare(json.load(handle), report)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Compare the ``to_dict`` + ``jsonify`` path with the tuple fast path.
+
+    python -m benchmarks.serialization --rows 100000
+
+Reports wall time, rows/second and tracemalloc peak for each strategy on
+an in-memory SQLite catalog of ``--rows`` products (one owner per 50).
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import joinedload
+
+from app import create_app, db
+from app.models import Product, User
+from app.utils.serialization import dumps, product_row_to_dict, product_rows, stream_items
+from app.utils.sustainability import get_factors
+from config import TestingConfig
+
+
+def _populate(rows):
+    owners = max(rows // 50, 1)
+    db.session.execute(
+        User.__table__.insert(),
+        [{"email": f"owner{i}@example.com", "name": f"Owner {i}", "password_hash": "x", "role": "vendor"} for i in range(owners)],
+    )
+    start = datetime(2024, 1, 1)
+    batch = []
+    for index in range(rows):
+        batch.append({
+            "title": f"Item {index}",
+            "description": "Gently used, collected from the owner's home.",
+            "price": float(index % 5000),
+            "condition": ("Used", "New", "Pre-loved")[index % 3],
+            "category": ("Furniture", "Clothing", "Electronics")[index % 3],
+            "location": "Nairobi",
+            "is_donation": index % 7 == 0,
+            "owner_id": index % owners + 1,
+            "created_at": start + timedelta(seconds=index),
+        })
+        if len(batch) == 10_000:
+            db.session.execute(Product.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(Product.__table__.insert(), batch)
+    db.session.commit()
+
+
+def _to_dict_path(app):
+    products = Product.query.options(joinedload(Product.owner)).order_by(Product.created_at.desc()).all()
+    return app.json.dumps({"items": [p.to_dict() for p in products]}).encode("utf-8")
+
+
+def _fast_path():
+    rows = db.session.execute(product_rows().order_by(Product.created_at.desc())).all()
+    factors = get_factors()
+    return dumps({"items": [product_row_to_dict(row, True, factors) for row in rows]})
+
+
+def _streamed_path():
+    query = product_rows().order_by(Product.created_at.desc()).execution_options(yield_per=500)
+    factors = get_factors()
+    response = stream_items(db.session.execute(query), lambda row: product_row_to_dict(row, True, factors))
+    return sum(len(chunk) for chunk in response.response)
+
+
+def _measure(label, func, rows):
+    # time and memory are measured in separate runs; tracemalloc slows
+    # allocation-heavy code down several-fold
+    db.session.expunge_all()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+
+    db.session.expunge_all()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    size = result if isinstance(result, int) else len(result)
+    return {
+        "strategy": label,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed),
+        "peak_mb": round(peak / 2**20, 1),
+        "bytes": size,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    app = create_app(TestingConfig)
+    with app.app_context(), app.test_request_context():
+        db.create_all()
+        _populate(args.rows)
+        results = [
+            _measure("to_dict+jsonify", lambda: _to_dict_path(app), args.rows),
+            _measure("tuples+fast_json", _fast_path, args.rows),
+            _measure("tuples+streamed", _streamed_path, args.rows),
+        ]
+    json.dump({"benchmark": "serialization", "rows": args.rows, "results": results}, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
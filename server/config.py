@@ -9,18 +9,115 @@ class Config:
         f"sqlite:///{os.path.abspath(os.path.join(os.path.dirname(__file__), 'instance', 'app.db'))}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool per worker process for server databases (utils/database.py)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() != "false"
+    # Local SQLite files: WAL journal so readers don't block on a writer
+    SQLITE_WAL = os.getenv("SQLITE_WAL", "true").lower() != "false"
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-jwt-secret-change-in-production")
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=7)
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173,https://cirqlex-group11project.onrender.com").split(",")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+    # bcrypt cost; existing hashes are migrated on the next successful login
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", "12"))
+    # Password hashing process pool per web worker (services/password_service.py);
+    # 0 hashes inline
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_QUEUE_DEPTH = int(os.getenv("PASSWORD_HASH_QUEUE_DEPTH", "4"))
+    PASSWORD_HASH_WAIT_SECONDS = float(os.getenv("PASSWORD_HASH_WAIT_SECONDS", "2"))
+
+    # Dashboard/insight result cache: "memory" (per worker) or "redis"
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", os.getenv("REDIS_URL"))
+    CACHE_DEFAULT_TTL = int(os.getenv("CACHE_DEFAULT_TTL", "60"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+
+    # OpenAI insight summaries run on a background pool and are polled
+    AI_SUMMARY_ASYNC = os.getenv("AI_SUMMARY_ASYNC", "true").lower() != "false"
+    AI_SUMMARY_WORKERS = int(os.getenv("AI_SUMMARY_WORKERS", "2"))
+    AI_SUMMARY_CACHE_TTL_HOURS = int(os.getenv("AI_SUMMARY_CACHE_TTL_HOURS", str(24 * 7)))
+    AI_SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("AI_SUMMARY_CACHE_MAX_ENTRIES", "5000"))
+
+    # Shared OpenAI HTTP client (services/llm_client.py)
+    LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "10"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+    LLM_CIRCUIT_FAILURES = int(os.getenv("LLM_CIRCUIT_FAILURES", "5"))
+    LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+
+    # Shared-cache (CDN) lifetime for public catalog responses; browsers
+    # always revalidate with the ETag
+    CATALOG_CDN_MAX_AGE = int(os.getenv("CATALOG_CDN_MAX_AGE", "30"))
+
+    # Request/SQL/LLM metrics at /api/metrics (utils/metrics.py); scrapes
+    # must send "Authorization: Bearer <METRICS_TOKEN>", and the route
+    # answers 404 until a token is configured
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() != "false"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+    # Per-request SQL budgets and N+1 detection (utils/query_budget.py):
+    # "off", "warn" (log a sample of offending requests) or "raise"
+    SQL_BUDGET_MODE = os.getenv("SQL_BUDGET_MODE", "off")
+    SQL_BUDGET_SAMPLE_RATE = float(os.getenv("SQL_BUDGET_SAMPLE_RATE", "1.0"))
+    SQL_BUDGET_DEFAULT = int(os.environ["SQL_BUDGET_DEFAULT"]) if os.getenv("SQL_BUDGET_DEFAULT") else None
+    SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", "5"))
+
+    # Request profiling (utils/profiling.py): X-Profile-Token header signed
+    # with PROFILING_SECRET (tokens are refused while it is unset), admin
+    # ?_profile=1, or every N-th request when PROFILING_SAMPLE_EVERY > 0
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "true").lower() != "false"
+    PROFILING_SECRET = os.getenv("PROFILING_SECRET")
+    PROFILING_MODE = os.getenv("PROFILING_MODE", "sample")
+    PROFILING_SAMPLE_EVERY = int(os.getenv("PROFILING_SAMPLE_EVERY", "0"))
+    PROFILING_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "5"))
+    PROFILING_DIR = os.getenv("PROFILING_DIR")
+    PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", "50"))
+
+    # gzip/brotli for buffered JSON responses (utils/compression.py)
+    COMPRESS_RESPONSES = os.getenv("COMPRESS_RESPONSES", "true").lower() != "false"
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+
+    # Sustainability factor tables (JSON); re-read when the file changes,
+    # checked at most every RELOAD_SECONDS (0 disables reloading)
+    IMPACT_FACTORS_PATH = os.getenv("IMPACT_FACTORS_PATH")
+    IMPACT_FACTORS_RELOAD_SECONDS = float(os.getenv("IMPACT_FACTORS_RELOAD_SECONDS", "30"))
+
+    # Chat context sent to the model: recent window + rolling summary
+    CHAT_HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", "20"))
+    CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "1500"))
+    CHAT_SUMMARY_BATCH = int(os.getenv("CHAT_SUMMARY_BATCH", "10"))
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    SQL_BUDGET_MODE = os.getenv("SQL_BUDGET_MODE", "warn")
 
 
 class ProductionConfig(Config):
     DEBUG = False
+    # log budget overruns for a small sample of requests
+    SQL_BUDGET_MODE = os.getenv("SQL_BUDGET_MODE", "warn")
+    SQL_BUDGET_SAMPLE_RATE = float(os.getenv("SQL_BUDGET_SAMPLE_RATE", "0.01"))
+
+
+class TestingConfig(Config):
+    TESTING = True
+    DEBUG = False
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_WORKERS = 0
+    SQL_BUDGET_MODE = "raise"
+    LLM_BACKOFF_BASE = 0.01
+    METRICS_TOKEN = "test-metrics-token"
+    PROFILING_SECRET = "test-profiling-secret"
 
 
 def get_config():
@@ -0,0 +1,65 @@
+"""Gunicorn settings, picked up automatically when started from ``server/``.
+
+    gunicorn            # serves wsgi:app with the settings below
+
+Requests are mostly I/O bound (database, OpenAI), so each worker process
+runs a small thread pool. With ``CACHE_BACKEND=redis`` the worker count
+defaults to ``2 * CPUs + 1`` capped at ``GUNICORN_MAX_WORKERS``; with the
+in-memory result cache it defaults to a single worker with more threads,
+because cache invalidations only reach the worker that made them.
+``WEB_CONCURRENCY`` (set by most PaaS hosts) overrides either default, and a
+warning is logged at startup when it asks for several workers on the memory
+backend. Keep ``workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)`` under the
+database's connection limit.
+"""
+import multiprocessing
+import os
+
+wsgi_app = "wsgi:app"
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+_shared_cache = os.getenv("CACHE_BACKEND", "memory").lower() != "memory"
+if _shared_cache:
+    _default_workers = min(2 * multiprocessing.cpu_count() + 1, int(os.getenv("GUNICORN_MAX_WORKERS", "8")))
+else:
+    _default_workers = 1
+workers = int(os.getenv("WEB_CONCURRENCY", _default_workers))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4" if _shared_cache else "8"))
+
+# gthread heartbeats from its main loop, so long SSE chat streams do not
+# trip the worker timeout; this bounds a wedged worker
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+# recycle workers now and then to bound slow leaks; jitter avoids all
+# workers restarting at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+
+# the app is built per worker: create_app opens the engine pool and the
+# summary thread pool, neither of which survives a fork
+preload_app = False
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    if workers > 1 and not _shared_cache:
+        server.log.warning(
+            "%d workers share no result cache (CACHE_BACKEND=memory): invalidations reach only "
+            "one worker and the others serve stale data for up to CACHE_DEFAULT_TTL; "
+            "set CACHE_BACKEND=redis or WEB_CONCURRENCY=1",
+            workers,
+        )
+
+
+def post_worker_init(worker):
+    # fork the password-hashing pool while this worker has no request threads yet
+    from app.services.password_service import get_password_hasher
+
+    with worker.wsgi.app_context():
+        get_password_hasher().start()
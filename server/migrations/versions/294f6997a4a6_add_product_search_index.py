@@ -0,0 +1,54 @@
+"""add product search index
+
+SQLite gets an FTS5 table (populated here; kept in sync by the product
+routes), Postgres a GIN index over a weighted tsvector expression. The
+DDL mirrors app/services/search_service.py.
+
+Revision ID: 294f6997a4a6
+Revises: d9d7b83f844b
+Create Date: 2026-10-18 08:13:17.837750
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '294f6997a4a6'
+down_revision = 'd9d7b83f844b'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts "
+    "USING fts5(title, description, category, location, tokenize='porter unicode61')"
+)
+POSTGRES_INDEX_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_products_search ON products USING gin (("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(category, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(location, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'D')))"
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(SQLITE_FTS_DDL)
+        op.execute(
+            "INSERT INTO products_fts (rowid, title, description, category, location) "
+            "SELECT id, coalesce(title, ''), coalesce(description, ''), "
+            "coalesce(category, ''), coalesce(location, '') FROM products"
+        )
+    elif dialect == 'postgresql':
+        op.execute(POSTGRES_INDEX_DDL)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS products_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_products_search")
@@ -0,0 +1,11 @@
+"""Production WSGI entry point: ``gunicorn wsgi:app`` (see gunicorn.conf.py).
+
+Unlike ``app.py`` this never falls back to the development config, so a
+missing ``FLASK_ENV`` cannot turn on debug mode or seed sample data.
+"""
+import os
+
+from app import create_app
+from config import DevelopmentConfig, ProductionConfig
+
+app = create_app(DevelopmentConfig if os.getenv("FLASK_ENV") == "development" else ProductionConfig)